@@ -0,0 +1,206 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+import fnmatch
+import gc
+import itertools
+import json
+import platform
+import sys
+import time
+import timeit
+
+__all__ = [
+    'Skip',
+    'benchmark',
+    'compare',
+    'load',
+    'measure',
+    'run',
+    'save',
+]
+
+# Modules that register benchmarks when imported, in the order they are run.
+MODULES = (
+    'bench_fmp',
+    'bench_websocket',
+    'bench_json',
+    'bench_model',
+    'bench_events',
+    'bench_async',
+    'bench_import',
+    'bench_client',
+)
+
+# Registered benchmarks, indexed by name.
+registry = OrderedDict()
+
+class Skip(Exception):
+    """
+    Raised by benchmark setup functions when they can't run in the current
+    environment (an optional dependency is missing for example).
+    """
+
+def benchmark(name, **params):
+    """
+    Registers a benchmark, the decorated function is called with every
+    combination of the parameters and must return a callable which runs one
+    operation of the benchmark.
+
+    The returned callable may have a `close` attribute which is called once
+    the measure is done to release resources acquired by the setup.
+    """
+    def decorator(setup):
+        keys = sorted(params)
+        for values in itertools.product(*[params[k] for k in keys]):
+            args = OrderedDict(zip(keys, values))
+            registry[make_name(name, args)] = (setup, args)
+        return setup
+    return decorator
+
+def make_name(name, params):
+    if not params:
+        return name
+    return '%s[%s]' % (name, ','.join('%s=%s' % (k, v) for k, v in params.items()))
+
+def measure(func, repeat=5, min_time=0.1):
+    """
+    Measures the time it takes to call `func`, returns a dict of statistics
+    where times are expressed in seconds per call.
+    """
+    timer  = timeit.Timer(func)
+    number = 1
+
+    # Calibrate the number of calls per run so a single run lasts at least
+    # min_time, short runs are dominated by the timer's resolution.
+    while True:
+        elapsed = timer.timeit(number)
+        if elapsed >= min_time:
+            break
+        number = max(number * 2, int(number * min_time / max(elapsed, 1e-9) * 1.2))
+
+    times = sorted(timer.timeit(number) / number for _ in range(repeat))
+    mean  = sum(times) / len(times)
+    return OrderedDict((
+        ('number', number),
+        ('repeat', repeat),
+        ('min',    times[0]),
+        ('median', times[len(times) // 2]),
+        ('mean',   mean),
+        ('max',    times[-1]),
+    ))
+
+def run(patterns=None, repeat=5, min_time=0.1, output=None):
+    """
+    Runs every registered benchmark which name is one of `patterns` or
+    matches one of them as a glob (or all of them) and returns the results.
+    """
+    for module in MODULES:
+        __import__('benchmarks.' + module)
+
+    results = OrderedDict()
+
+    for name, (setup, params) in registry.items():
+        if patterns and not any(name == p or fnmatch.fnmatch(name, p) for p in patterns):
+            continue
+
+        try:
+            func = setup(**params)
+        except Skip as e:
+            if output is not None:
+                output.write('%-60s skipped (%s)\n' % (name, e))
+            continue
+
+        try:
+            gc.collect()
+            stats = measure(func, repeat, min_time)
+        finally:
+            close = getattr(func, 'close', None)
+            if close is not None:
+                close()
+
+        stats['params'] = params
+        results[name]   = stats
+
+        if output is not None:
+            output.write('%-60s %s\n' % (name, format_time(stats['median'])))
+            output.flush()
+
+    return OrderedDict((
+        ('python',    platform.python_version()),
+        ('platform',  platform.platform()),
+        ('timestamp', time.time()),
+        ('results',   results),
+    ))
+
+def compare(base, head, threshold=0.1, metric='median'):
+    """
+    Compares two sets of results, returns a list of tuples made of the
+    benchmark name, the base and head times and a status which is either
+    `'regression'`, `'improvement'` or `'ok'`.
+    """
+    changes = [ ]
+    base    = base['results']
+    head    = head['results']
+
+    for name, stats in head.items():
+        if name not in base:
+            continue
+
+        t0 = base[name][metric]
+        t1 = stats[metric]
+
+        if t1 > (t0 * (1 + threshold)):
+            status = 'regression'
+        elif t1 < (t0 * (1 - threshold)):
+            status = 'improvement'
+        else:
+            status = 'ok'
+
+        changes.append((name, t0, t1, status))
+    return changes
+
+def format_time(t):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if t >= scale:
+            return '%8.3f %s' % (t / scale, unit)
+    return '%8.3f ns' % (t / 1e-9)
+
+def load(path):
+    with open(path) as f:
+        return json.load(f, object_pairs_hook=OrderedDict)
+
+def save(results, path):
+    if path == '-':
+        json.dump(results, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+        return
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
@@ -0,0 +1,77 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import argparse
+import sys
+
+from . import compare
+from . import format_time
+from . import load
+from . import run
+from . import save
+
+def main(argv=None):
+    parser   = argparse.ArgumentParser(prog='python -m benchmarks', description='Runs the frankly SDK benchmarks.')
+    commands = parser.add_subparsers(dest='command')
+
+    p = commands.add_parser('run', help='run the benchmarks and write the results as JSON')
+    p.add_argument('patterns', nargs='*', help='glob patterns selecting the benchmarks to run')
+    p.add_argument('-o', '--output', default='-', help='path of the JSON results file (default: stdout)')
+    p.add_argument('-r', '--repeat', default=5, type=int, help='number of runs per benchmark')
+    p.add_argument('-t', '--min-time', default=0.1, type=float, help='minimum duration of a run (in seconds)')
+
+    p = commands.add_parser('compare', help='compare two results files and report regressions')
+    p.add_argument('base', help='results of the reference run')
+    p.add_argument('head', help='results of the run to check')
+    p.add_argument('--threshold', default=0.1, type=float, help='relative change reported as a regression (default: 0.1)')
+    p.add_argument('--metric', default='median', choices=('min', 'median', 'mean'))
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'run':
+        results = run(args.patterns, args.repeat, args.min_time, output=sys.stderr)
+        save(results, args.output)
+        return 0
+
+    if args.command == 'compare':
+        changes = compare(load(args.base), load(args.head), args.threshold, args.metric)
+        regressions = 0
+
+        for name, t0, t1, status in changes:
+            if status == 'regression':
+                regressions += 1
+            print('%-60s %s %s %+7.1f%%  %s' % (name, format_time(t0), format_time(t1), 100 * (t1 - t0) / t0, status))
+
+        print('%d benchmarks compared, %d regressions' % (len(changes), regressions))
+        return 1 if regressions else 0
+
+    parser.print_help()
+    return 2
+
+if __name__ == '__main__':
+    sys.exit(main())
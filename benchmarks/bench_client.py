@@ -0,0 +1,90 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.mock as mock
+
+from . import benchmark
+
+def make_client(transport, server, async=False):
+    address = server.address if transport == 'http' else server.ws_address
+    client  = frankly.Client(address, async=async)
+    client.open('key', 'secret')
+    return client
+
+def make_closer(client, server):
+    def close():
+        client.close()
+        server.close()
+    return close
+
+@benchmark('client.read', transport=('http', 'ws'))
+def read(transport):
+    server = mock.Server()
+    server.start()
+    client = make_client(transport, server)
+
+    def run():
+        client.read_app(1)
+
+    run.close = make_closer(client, server)
+    return run
+
+@benchmark('client.read_pipelined', transport=('http', 'ws'), depth=(10, 100))
+def read_pipelined(transport, depth):
+    # Submits depth reads for distinct resources before waiting for any of the
+    # responses, the timing covers the whole batch.
+    server = mock.Server()
+    server.start()
+    client = make_client(transport, server, async=True)
+    rooms  = [client.create_room(title='room %s' % i).wait(5).id for i in range(depth)]
+
+    def run():
+        for promise in [client.read_room(id) for id in rooms]:
+            promise.wait(5)
+
+    run.close = make_closer(client, server)
+    return run
+
+@benchmark('client.read_batch', transport=('http', 'ws'), depth=(10, 100))
+def read_batch(transport, depth):
+    # Same workload as client.read_pipelined, sent through client.batch from a
+    # synchronous client.
+    server = mock.Server()
+    server.start()
+    client = make_client(transport, server)
+    rooms  = [client.create_room(title='room %s' % i).id for i in range(depth)]
+
+    def run():
+        with client.batch() as batch:
+            for id in rooms:
+                batch.read_room(id)
+        batch.results(5)
+
+    run.close = make_closer(client, server)
+    return run
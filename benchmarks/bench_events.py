@@ -0,0 +1,54 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly.events as events
+
+from . import benchmark
+
+@benchmark('events.Emitter.emit', listeners=(0, 1, 10, 100))
+def emit(listeners):
+    emitter = events.Emitter()
+    for _ in range(listeners):
+        emitter.on('update', lambda *args: None)
+    return lambda: emitter.emit('update', 1)
+
+@benchmark('events.Iterator', batch=(1, 100))
+def iterate(batch):
+    emitter  = events.Emitter()
+    iterator = events.Iterator(emitter, 'update')
+    iterator.start()
+
+    def run():
+        for _ in range(batch):
+            emitter.emit('update', 1)
+        if batch == 1:
+            iterator.get()
+        else:
+            next(iterator.batches(batch))
+
+    return run
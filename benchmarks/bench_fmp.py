@@ -0,0 +1,66 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly.fmp as fmp
+import frankly.util as util
+
+from . import benchmark
+
+SIZES = (64, 4096, 262144)
+
+def make_packet(size):
+    return fmp.Packet(fmp.OK, 1, 42, ['rooms', '1', 'messages'], { 'limit': 10 }, util.Object(
+        id         = 1,
+        sender     = util.Object(id=1, display_name='R2D2'),
+        contents   = [util.Object(type='text/plain', value='x' * size)],
+        created_on = '2015-06-01T00:00:00.000Z',
+        updated_on = '2015-06-01T00:00:00.000Z',
+    ))
+
+@benchmark('fmp.encode', size=SIZES)
+def encode(size):
+    packet = make_packet(size)
+    return lambda: fmp.encode(packet)
+
+@benchmark('fmp.decode', size=SIZES)
+def decode(size):
+    data = fmp.encode(make_packet(size))
+    return lambda: fmp.decode(data)
+
+@benchmark('fmp.Decoder', count=(1, 100))
+def decoder(count):
+    # Many small packets delivered in a single frame, like a batch of responses
+    # read from a websocket.
+    data = fmp.encode_many([make_packet(64)] * count)
+
+    def run():
+        d = fmp.Decoder()
+        d.feed(data)
+        for _ in d:
+            pass
+    return run
@@ -0,0 +1,68 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import os
+import subprocess
+import sys
+
+from . import benchmark
+
+# Modules that importing the package must not load, they're only needed by the
+# backends or features that use them.
+DEFERRED = (
+    'concurrent.futures',
+    'http.cookiejar',
+    'iso8601',
+    'jwt',
+    'multiprocessing',
+    'requests',
+    'ssl',
+)
+
+def python(code):
+    # Runs code in a new interpreter so the imports aren't served from the
+    # modules already loaded by the benchmark process.
+    env  = dict(os.environ)
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env['PYTHONPATH'] = os.pathsep.join(x for x in (root, env.get('PYTHONPATH')) if x)
+    return subprocess.check_output([sys.executable, '-c', code], env=env)
+
+def loaded(module):
+    """
+    Returns the list of modules in DEFERRED that get loaded by importing
+    `module` in a new interpreter.
+    """
+    code = 'import sys, %s; print(",".join(m for m in %r if m in sys.modules))' % (module, DEFERRED)
+    return [x for x in python(code).decode('utf-8').strip().split(',') if x]
+
+@benchmark('import', module=('sys', 'frankly'))
+def import_module(module):
+    # The time of importing sys is the cost of starting the interpreter, the
+    # difference with the other modules is the time it takes to import them.
+    code = 'import ' + module
+    return lambda: python(code)
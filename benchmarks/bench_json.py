@@ -0,0 +1,53 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly.util as util
+import json
+
+from . import benchmark
+
+def make_message(id):
+    return {
+        'id'         : id,
+        'sender'     : { 'id': 1, 'display_name': 'R2D2', 'created_on': '2015-06-01T00:00:00.000Z' },
+        'contents'   : [{ 'type': 'text/plain', 'value': 'beep beep' }],
+        'created_on' : '2015-06-01T00:00:00.000Z',
+        'updated_on' : '2015-06-01T00:00:00.000Z',
+    }
+
+@benchmark('util.JsonDecoder', count=(1, 100))
+def json_decoder(count):
+    data = json.dumps([make_message(i) for i in range(count)])
+    return lambda: json.loads(data, cls=util.JsonDecoder)
+
+@benchmark('util.parse_date', format=('api', 'iso8601'))
+def parse_date(format):
+    # Dates in the API's fixed format take the fast path, others are parsed by
+    # the iso8601 module.
+    date = '2015-06-01T12:30:00.000Z' if format == 'api' else '2015-06-01T12:30:00+02:00'
+    return lambda: util.parse_date(date)
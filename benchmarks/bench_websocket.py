@@ -0,0 +1,76 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly.websocket.webtools as webtools
+import os
+
+from . import Skip
+from . import benchmark
+
+# The default engine is the one picked by webtools, others are measured on their
+# own to compare them.
+ENGINES = {
+    'default' : webtools._xor_mask,
+    'loop'    : webtools._xor_mask_loop,
+    'int'     : webtools._xor_mask_int,
+    'wsaccel' : webtools._xor_mask_wsaccel,
+}
+
+@benchmark('webtools.xor_mask', engine=('default', 'loop', 'int', 'wsaccel'), size=(64, 4096, 65536, 1048576))
+def xor_mask(engine, size):
+    data = bytearray(os.urandom(size))
+    key  = b'\x78\x56\x34\x12'
+    mask = ENGINES[engine]
+
+    if mask is None:
+        raise Skip("wsaccel is not installed")
+
+    return lambda: mask(data, key)
+
+@benchmark('websocket_header.encode', length=(100, 1000, 100000), mask=(0, 1))
+def header_encode(length, mask):
+    data   = bytearray(16)
+    header = webtools.websocket_header()
+    header.fin    = 1
+    header.opcode = 2
+    header.length = length
+    header.mask   = mask
+    header.key    = 0x12345678
+    return lambda: header.encode(data)
+
+@benchmark('websocket_header.decode', length=(100, 1000, 100000), mask=(0, 1))
+def header_decode(length, mask):
+    data   = bytearray(16)
+    header = webtools.websocket_header()
+    header.fin    = 1
+    header.opcode = 2
+    header.length = length
+    header.mask   = mask
+    header.key    = 0x12345678
+    header.encode(data)
+    return lambda: header.decode(data)
@@ -26,6 +26,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import importlib
 import mimetypes
 import os
 import six
@@ -34,19 +35,22 @@ urlparse = urllib.parse.urlparse
 
 from . import async
 from . import logger
+from . import metrics
 from . import version
 from . import errors
 from . import events
 from . import fmp
 from . import util
 from . import auth
+from . import cache
 from . import http
-from . import ws
 from . import core
 
+from .cache import Cache
 from .errors import Error
 from .events import Emitter as EventEmitter
 from .core import BaseClient
+from .core import Batch
 from .core import EventIterator
 from .util import Object
 from .auth import Session
@@ -57,6 +61,8 @@ from .version import __version__
 __all__ = [
     'Client',
     'BaseClient',
+    'Batch',
+    'Cache',
     'EventIterator',
     'EventEmitter',
     'Error',
@@ -94,7 +100,54 @@ class Client(BaseClient):
     only after sucessfuly authenticating.
     """
 
-    def __init__(self, address='https', connect_timeout=5, request_timeout=5, async=False):
+    # Methods that can be called on the batches returned by `batch`, they only
+    # send a request through the `create`, `read`, `update` or `delete` methods.
+    batch_operations = frozenset((
+        'create_announcement',
+        'create_file',
+        'create_room',
+        'create_room_message',
+        'create_room_message_flag',
+        'create_room_owner',
+        'create_room_moderator',
+        'create_room_member',
+        'create_room_announcer',
+        'create_room_subscriber',
+        'create_room_participant',
+        'create_user',
+        'delete_announcement',
+        'delete_room',
+        'delete_room_owner',
+        'delete_room_moderator',
+        'delete_room_member',
+        'delete_room_announcer',
+        'delete_room_subscriber',
+        'delete_room_participant',
+        'delete_session',
+        'delete_user',
+        'read_announcement',
+        'read_announcement_list',
+        'read_announcement_room_list',
+        'read_app',
+        'read_room',
+        'read_room_list',
+        'read_room_message',
+        'read_room_message_list',
+        'read_room_owner_list',
+        'read_room_moderator_list',
+        'read_room_member_list',
+        'read_room_announcer_list',
+        'read_room_subscriber_list',
+        'read_room_participant_list',
+        'read_room_count',
+        'read_session',
+        'read_user',
+        'read_user_ban',
+        'update_room',
+        'update_user',
+    ))
+
+    def __init__(self, address='https', connect_timeout=5, request_timeout=5, async=False, pool_size=10, pool_idle_timeout=60, flush_delay=0, cache=None, models=False, max_inflight=1024):
         """
         Creates a new instance of this class.
 
@@ -117,6 +170,40 @@ class Client(BaseClient):
         operation or is rejected with the error that got generated.  
         If callbacks are set on the promise through `frankly.Promise.then` they will
         be called from a different thread.
+
+        - `pool_size (int)`  
+        On HTTP clients, the maximum number of persistent connections kept open
+        to the Frankly API and shared between threads.
+
+        - `pool_idle_timeout (int or float)`  
+        On HTTP clients, the amount of time (in seconds) after which idle
+        connections are closed instead of being reused.
+
+        - `flush_delay (int or float)`  
+        On WebSocket clients, how long (in seconds) outgoing packets may be
+        held so they get sent together with the ones that follow. Packets are
+        sent immediately when set to zero.
+
+        - `cache (frankly.Cache)`  
+        When set, the results of `read_room`, `read_user`, `read_app`,
+        `read_room_count` and the `read_room_*_list` methods are cached and kept
+        up to date with the changes pushed by the server.
+
+        - `models (bool)`  
+        When set to True, objects returned by the API are loaded as the compact
+        classes of `frankly.model` (`Room`, `Message`, `User`, `App` and
+        `Session`) instead of `frankly.Object` dicts, and so are the events
+        emitted for the updates pushed by the server. These classes support the
+        same attribute and item access but use much less memory, and they can be
+        passed back to the API (for example `client.update_room(room.id, **room)`).
+
+        - `max_inflight (int)`  
+        The maximum number of requests that the client keeps in flight, the
+        actual limit adapts to the API's responses: it grows while latencies
+        stay low and is halved when requests time out or get 429 or 5xx errors.
+        Requests submitted beyond the limit are queued by the client. Setting
+        it to zero disables the limit. Synchronous HTTP clients authenticated
+        with an app key and secret send requests directly and aren't limited.
         """
         if not (isinstance(address, str) or isinstance(address, six.text_type)):
             raise TypeError("address must be a string")
@@ -133,6 +220,27 @@ class Client(BaseClient):
         if request_timeout < 0:
             raise ValueError("request timeout must be a positive value")
 
+        if not isinstance(pool_size, int):
+            raise TypeError("pool size must be a int")
+
+        if pool_size <= 0:
+            raise ValueError("pool size must be a positive value")
+
+        if not (isinstance(pool_idle_timeout, int) or isinstance(pool_idle_timeout, float)):
+            raise TypeError("pool idle timeout must be a int or float")
+
+        if pool_idle_timeout < 0:
+            raise ValueError("pool idle timeout must be a positive value")
+
+        if flush_delay < 0:
+            raise ValueError("flush delay must be a positive value")
+
+        if not isinstance(max_inflight, int):
+            raise TypeError("max inflight must be a int")
+
+        if max_inflight < 0:
+            raise ValueError("max inflight must be a positive value")
+
         if address == 'https':
             address = 'https://app.franklychat.com'
         elif address == 'wss':
@@ -143,7 +251,7 @@ class Client(BaseClient):
         if url.scheme not in ('http', 'https', 'ws', 'wss'):
             raise ValueError("unsupported protocol: " + address)
 
-        BaseClient.__init__(self, url, connect_timeout, request_timeout, async)
+        BaseClient.__init__(self, url, connect_timeout, request_timeout, async, pool_size, pool_idle_timeout, flush_delay, cache, models, max_inflight)
 
     def __enter__(self):
         return self
@@ -160,6 +268,15 @@ class Client(BaseClient):
         # declared in core.BaseClient
         return self._address
 
+    @property
+    def cache(self):
+        """
+        This property exposes the `frankly.Cache` used by the client to cache
+        the results of read operations, it is None if caching is disabled.
+        """
+        # declared in core.BaseClient
+        return self._cache
+
     @property
     def async(self):
         """
@@ -237,6 +354,45 @@ class Client(BaseClient):
         """
         return self._close(code, reason, async)
 
+    def batch(self, concurrency=None):
+        """
+        Creates a batch of operations that are sent together, which is much
+        faster than calling the client methods one by one when performing many
+        operations.
+
+        The batch exposes the same `create_*`, `read_*`, `update_*` and
+        `delete_*` methods as the client, they record operations and return
+        promises instead of sending requests. The operations are sent when the
+        batch is used in a `with` statement and the block exits, or when its
+        `send` method is called:
+
+            with client.batch() as batch:
+                for user_id in user_ids:
+                    batch.delete_room_member(room_id, user_id)
+
+            for result, error in batch.results():
+                ...
+
+        On websocket clients the requests are pipelined over the connection,
+        on HTTP clients they are sent by a pool of threads. The pool is kept for
+        the next batches with the same concurrency, its threads exit after being
+        idle for `pool_idle_timeout` seconds or when the client is closed.
+
+        **Arguments**
+
+        - `concurrency (int)`  
+        The maximum number of HTTP requests running at the same time, defaults
+        to the size of the connection pool.
+
+        **Return**
+
+        The method returns a `frankly.core.Batch` object, its `results` method
+        returns the (result, error) tuples of the operations in order and
+        `as_completed` yields (index, result, error) tuples as operations
+        complete.
+        """
+        return core.Batch(self, concurrency)
+
     def create(self, path, params=None, payload=None):
         """
         This method exposes a generic interface for creating objects through
@@ -469,6 +625,40 @@ class Client(BaseClient):
     def delete_user(self, user_id):
         return self.delete(('users', user_id))
 
+    def iter_room_messages(self, room_id, start=None, stop=None, page_size=100, **params):
+        """
+        Generator yielding the messages of a room one by one, going from the most
+        recent to the oldest ones.  
+        Unlike `read_room_message_list` it isn't limited to a single page, it
+        walks the whole history (or the requested range) of the room, fetching
+        each page while the previous one is being consumed. Only two pages are
+        held in memory at any time.
+
+        **Arguments**
+
+        - `room_id (int)`  
+        The identifier of the room to read messages from.
+
+        - `start (int)`  
+        The id of the first message to return, defaults to the most recent
+        message of the room.
+
+        - `stop (int)`  
+        The id of the message where the iteration stops, the message itself is
+        not returned. Defaults to iterating until the first message of the room.
+
+        - `page_size (int)`  
+        How many messages are requested per call to the API.
+
+        - `sticky (bool)`  
+        Same as the argument of `read_room_message_list`.
+
+        **Return**
+
+        The method returns a generator of message objects.
+        """
+        return self._iter_pages(('rooms', room_id, 'messages'), params, start, stop, page_size)
+
     def read(self, path, params=None, payload=None):
         """
         This method exposes a generic interface for reading objects from the
@@ -634,6 +824,34 @@ class Client(BaseClient):
     def read_app(self, app_id):
         return self.read(('apps', app_id))
 
+    def subscribe(self, pattern, callback):
+        """
+        Registers a callback that is only called for the updates and deletions
+        pushed by the server on paths matching a pattern.
+
+        Signals are routed through an index of the patterns before their event
+        object is built, when neither a subscription nor an `update` or `delete`
+        listener wants a signal it is dropped without further processing.
+
+        **Arguments**
+
+        - `pattern (tuple)`  
+        The path to subscribe to, where None matches any value. For example
+        `('rooms', 42, 'messages', None)` matches every message posted to room 42.
+
+        - `callback (function)`  
+        Called with the event name (`'update'` or `'delete'`) and the event
+        object, the same one that is passed to the `update` and `delete`
+        listeners.
+        """
+        self._routes.add(pattern, callback)
+
+    def unsubscribe(self, pattern, callback):
+        """
+        Removes a callback registered with `subscribe` for the same pattern.
+        """
+        self._routes.remove(pattern, callback)
+
     def update(self, path, params=None, payload=None):
         """
         This method exposes a generic interface for updating objects of the
@@ -1003,3 +1221,10 @@ class Client(BaseClient):
             return promise
 
         return result
+
+def import_ws():
+    # The websocket backend pulls in ssl and http.client, frankly.ws is imported
+    # on first access or when a websocket client is created.
+    return importlib.import_module(__name__ + '.ws')
+
+util.lazy_attributes(__name__, ws=import_ws)
@@ -0,0 +1,1153 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+"""
+This module provides an implementation of the Frankly client built on top of
+asyncio, it requires Python 3.5 or above.
+
+`frankly.aio.Client` exposes the same methods as `frankly.Client`, but every
+method that accesses the Frankly API returns an awaitable object instead of
+blocking the calling thread. The client runs entirely on the event loop, no
+threads are created to maintain connections or dispatch requests.
+"""
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from copy import copy
+from http.cookies import SimpleCookie
+from urllib.parse import parse_qsl
+from urllib.parse import quote
+from urllib.parse import urlencode
+from urllib.parse import urlparse
+
+import asyncio
+import collections
+import mimetypes
+import os
+import ssl
+import time
+
+from . import Client as BaseClient
+from . import auth
+from . import cache
+from . import core
+from . import errors
+from . import fmp
+from . import http
+from . import logger as log
+from . import metrics
+from . import model
+from . import util
+from . import websocket
+
+__all__ = [
+    'Client',
+    'ConnectionPool',
+    'HttpConnection',
+    'WebSocket',
+    'authenticate',
+    'connect',
+    'connect_websocket',
+]
+
+class Client(BaseClient):
+    """
+    This class implements a Frankly client where every operation is a
+    coroutine that runs on an asyncio event loop.
+
+    Instances are meant to be used as asynchronous context managers:
+
+        async with frankly.aio.Client('wss') as client:
+            await client.open(app_key, app_secret)
+            room = await client.read_room(42)
+    """
+
+    def __init__(self, address='https', connect_timeout=5, request_timeout=5, pool_size=10, pool_idle_timeout=60, cache=None, loop=None, models=False):
+        """
+        Creates a new instance of this class, arguments have the same meaning
+        than in `frankly.Client`.
+
+        **Arguments**
+
+        - `loop (asyncio.AbstractEventLoop)`  
+        The event loop that the client runs on, defaults to the current event
+        loop.
+        """
+        BaseClient.__init__(self, address, connect_timeout, request_timeout, False, pool_size, pool_idle_timeout, cache=cache, models=models)
+
+        if loop is None:
+            loop = asyncio.get_event_loop()
+
+        url = urlparse(auth_address(self._address))
+        self._loop    = loop
+        self._http    = ConnectionPool(url.hostname, url.port, url.scheme == 'https', pool_size, pool_idle_timeout)
+        self._session = None
+        self._headers = None
+        self._socket  = None
+        self._task    = None
+
+        # Set on HTTP clients that authenticated with an identity token so they
+        # can authenticate again when their session expires.
+        self._authenticator = None
+
+    def __enter__(self):
+        raise TypeError("frankly.aio.Client must be used with 'async with'")
+
+    def __exit__(self, *args):
+        pass
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    @property
+    def loop(self):
+        """
+        This property exposes the event loop that the client runs on.
+        """
+        return self._loop
+
+    async def open(self, *args, **kwargs):
+        """
+        Coroutine version of `frankly.Client.open`.
+        """
+        argc = len(args)
+
+        if argc == 1:
+            generate_identity_token = args[0]
+            assert hasattr(generate_identity_token, '__call__'), \
+                "the identity token generator must be a callable"
+
+            def authenticator():
+                return authenticate(self._http, generate_identity_token, self._request_timeout)
+
+            return await self._open(authenticator, ready=False)
+
+        if argc == 2:
+            session = auth.Session(args[0], args[1], kwargs.get('user'), kwargs.get('role'), info=util.Object(seed=0))
+
+            async def authenticator():
+                return session
+
+            return await self._open(authenticator, ready=True)
+
+        raise TypeError("frankly.aio.Client.open takes either 1 or 2 arguments but %s were found" % argc)
+
+    async def _open(self, authenticator, ready=False):
+        if self._running:
+            raise RuntimeError("frankly.Client.open called multiple times")
+        self._running = True
+        self._version += 1
+        self._pending = fmp.RequestStore()
+
+        self.emit('open')
+
+        if self._url.scheme in ('ws', 'wss'):
+            # WebSocket connections are maintained by a task that reconnects when the
+            # connection is lost, requests submitted while the client is disconnected
+            # are sent once the connection is established again.
+            self._task = self._loop.create_task(self._run(authenticator, self._version))
+            return
+
+        session = await authenticator()
+        log.debug("authenticated with %s", session)
+        self._set_session(session)
+        self._authenticator = authenticator if not ready else None
+        self.emit('connect')
+        self.emit('authenticate', session)
+
+    async def close(self, code=None, reason=None):
+        """
+        Coroutine version of `frankly.Client.close`.
+        """
+        if not self._running:
+            return
+        self._running = False
+        self._version += 1
+
+        socket, self._socket = self._socket, None
+        task, self._task = self._task, None
+
+        if socket is not None:
+            try:
+                await socket.shutdown(1001 if code is None else code, 'the connection was closed' if reason is None else reason)
+            except Exception as e:
+                log.exception(e)
+            socket.close()
+
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        pending, self._pending = self._pending, None
+        pending.cancel()
+        self._http.close()
+
+        if task is None:
+            self.emit('disconnect')
+        self.emit('close')
+
+    def iter_room_messages(self, room_id, start=None, stop=None, page_size=100, **params):
+        """
+        Asynchronous version of `frankly.Client.iter_room_messages`, the returned
+        object is used with `async for`.
+        """
+        return PageIterator(self, ('rooms', room_id, 'messages'), params, start, stop, page_size)
+
+    def batch(self, concurrency=None):
+        # Coroutines already let requests run concurrently, the operations that a
+        # batch would group are better awaited together with asyncio.gather.
+        raise TypeError("frankly.aio.Client doesn't support batches, use asyncio.gather")
+
+    async def _request(self, operation, path, params=None, payload=None):
+        assert isinstance(operation, int), \
+            "operation must be an integer but %s was found" % type(operation)
+
+        assert isinstance(path, tuple) or isinstance(path, list), \
+            "path must be a tuple or a list but %s was found" % type(path)
+
+        assert params is None or isinstance(params, dict), \
+            "params must be a dict but %s was found" % type(params)
+
+        if params is None:
+            params = { }
+
+        if not self._running:
+            raise RuntimeError("submitting request to closed client")
+
+        timeout = self._request_timeout
+        path    = [str(x) for x in path]
+        packet  = fmp.Packet(operation, 0, self._idseq, path, params, payload)
+        store   = None
+        self._idseq += 1
+
+        if self._cache is not None and operation == fmp.READ and not params and cache.cacheable(path):
+            store  = self._cache
+            result = store.get(path)
+
+            if result is not None:
+                return result
+
+        if operation != fmp.READ:
+            return await self._submit(packet, timeout, store)
+
+        # Concurrent identical reads share the task of the request already in
+        # flight. Every caller awaits it through a shield, the request is only
+        # cancelled when all the callers waiting for it were cancelled.
+        flight = (tuple(path), repr(sorted(params.items())))
+        shared = self._inflight.get(flight)
+
+        if shared is None:
+            shared = self._inflight[flight] = Flight(self._loop.create_task(self._submit(packet, timeout, store)))
+            shared.task.add_done_callback(lambda _: self._land(flight, shared))
+
+        shared.waiters += 1
+        try:
+            return await asyncio.shield(shared.task)
+        except asyncio.CancelledError:
+            if shared.waiters == 1 and not shared.task.done():
+                self._land(flight, shared)
+                shared.task.cancel()
+            raise
+        finally:
+            shared.waiters -= 1
+
+    def _land(self, flight, shared):
+        # Later reads send a new request once the shared one completed or was
+        # cancelled.
+        if self._inflight.get(flight) is shared:
+            del self._inflight[flight]
+
+    async def _submit(self, packet, timeout, store=None):
+        path  = packet.path
+        start = time.time()
+
+        if store is not None:
+            generation = store.generation
+
+        if metrics.hooks:
+            metrics.emit('enqueue', packet)
+
+        if self._task is None:
+            if metrics.hooks:
+                metrics.emit('send', packet)
+            try:
+                result = await self._send_http(packet, timeout)
+            except errors.Error as e:
+                if metrics.hooks:
+                    metrics.emit('response', packet, e.status, time.time() - start)
+                raise
+            if metrics.hooks:
+                metrics.emit('response', packet, 200, time.time() - start)
+            if store is not None:
+                store.put(path, result, generation)
+            return result
+
+        future = self._loop.create_future()
+
+        def resolve(value):
+            if store is not None:
+                store.put(path, value, generation)
+            if not future.done():
+                future.set_result(value)
+
+        def reject(error):
+            if not future.done():
+                future.set_exception(error)
+
+        req = self._pending.store(packet, start + timeout, resolve, reject, start)
+
+        error = None
+
+        try:
+            if self._socket is not None:
+                await self._send_packet(self._socket, req)
+            return await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            if metrics.hooks:
+                metrics.emit('timeout', packet, time.time() - start)
+            raise errors.Error(packet.operation, packet.path, 408, "the request timed out")
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            # The request is removed from the store whether it failed to be sent,
+            # timed out or got cancelled, loading an answered request is a no-op.
+            # Requests that were never answered still complete for the hooks.
+            if self._pending is not None and self._pending.load(packet) is not None:
+                if error is not None and metrics.hooks:
+                    metrics.emit('response', packet, getattr(error, 'status', 500), time.time() - start)
+
+    async def _send_http(self, packet, timeout, retry=True):
+        fields  = copy(self._headers)
+        content = None
+
+        if packet.payload is not None:
+            content = http.encode_request_payload(packet.payload).encode('utf-8')
+            fields['Content-Type'] = 'application/json'
+
+        try:
+            status, _, content = await self._http.request(
+                method  = http.make_method(packet.type),
+                path    = '/' + '/'.join(quote(x, safe='') for x in packet.path),
+                query   = packet.params,
+                fields  = fields,
+                content = content,
+                timeout = timeout,
+            )
+        except errors.Error:
+            raise
+        except Exception as e:
+            raise errors.Error(packet.operation, packet.path, 500, str(e))
+
+        if self._models and 200 <= status < 300:
+            result = model.loads(packet.path, content.decode('utf-8'))
+        else:
+            result = http.decode_response_payload(content.decode('utf-8'))
+
+        # The session of clients authenticated with an identity token may expire, in
+        # that case the client authenticates again and retries the request once.
+        if status == 401 and retry and self._authenticator is not None:
+            self._set_session(await self._authenticator())
+            return await self._send_http(packet, timeout, retry=False)
+
+        if status < 200 or status >= 300:
+            raise errors.Error(packet.operation, packet.path, status, result)
+
+        return result
+
+    async def _send_packet(self, socket, req):
+        packet = core.prepare_packet(req.packet, self._session.info.seed)
+        log.debug("sending pending %s", packet)
+        frame = fmp.encode(packet)
+
+        if metrics.hooks:
+            metrics.emit('send', req.packet)
+
+        await socket.send(frame)
+
+        if metrics.hooks:
+            metrics.emit('frame_send', websocket.BINARY, len(frame))
+
+    async def _upload(self, url, params=None, content=None, content_length=None, content_type=None, content_encoding=None, timeout=None, emitter=None):
+        if not self._running:
+            raise RuntimeError("submitting upload to closed client")
+
+        if timeout is None:
+            timeout = max(self._request_timeout, content_length / 1000)
+
+        url    = urlparse(url)
+        fields = copy(self._headers)
+
+        if content_length is not None:
+            fields['Content-Length'] = str(content_length)
+
+        if content_type is not None:
+            fields['Content-Type'] = content_type
+
+        if content_encoding is not None:
+            fields['Content-Encoding'] = content_encoding
+
+        query = dict(parse_qsl(url.query))
+        if params is not None:
+            query.update(params)
+
+        if url.netloc == urlparse(auth_address(self._address)).netloc:
+            pool = self._http
+        else:
+            pool = ConnectionPool(url.hostname, url.port, url.scheme == 'https', 1)
+
+        try:
+            status, _, result = await pool.request(
+                method  = 'PUT',
+                path    = url.path,
+                query   = query,
+                fields  = fields,
+                content = core.FileProgressUpload(content, content_length, emitter),
+                timeout = timeout,
+            )
+        except Exception as e:
+            raise errors.Error('upload', url.path, 500, str(e))
+        finally:
+            if pool is not self._http:
+                pool.close()
+
+        result = http.decode_response_payload(result.decode('utf-8'))
+
+        if status != 200:
+            raise errors.Error('upload', url.path, status, result)
+
+        return result
+
+    async def update_file(self, url, file_obj, file_size, mime_type=None, encoding=None, timeout=None, emitter=None):
+        """
+        Coroutine version of `frankly.Client.update_file`.
+        """
+        return await self._upload(
+            url,
+            content          = file_obj,
+            content_length   = file_size,
+            content_type     = mime_type,
+            content_encoding = encoding,
+            timeout          = timeout,
+            emitter          = emitter,
+        )
+
+    async def update_file_from_path(self, url, file_path, mime_type=None, encoding=None, timeout=None, emitter=None):
+        """
+        Coroutine version of `frankly.Client.update_file_from_path`.
+        """
+        file_size = os.path.getsize(file_path)
+        guess_type, guess_encoding = mimetypes.guess_type(file_path)
+
+        if mime_type is None:
+            mime_type = guess_type
+
+        if encoding is None:
+            encoding = guess_encoding
+
+        with open(file_path, 'rb') as file_obj:
+            return await self.update_file(
+                url,
+                file_obj  = file_obj,
+                file_size = file_size,
+                mime_type = mime_type,
+                encoding  = encoding,
+                timeout   = timeout,
+                emitter   = emitter,
+            )
+
+    async def upload_file(self, file_obj, file_size, mime_type, category=None, type=None, encoding=None, timeout=None, emitter=None):
+        """
+        Coroutine version of `frankly.Client.upload_file`.
+        """
+        if category is None:
+            category = 'chat'
+
+        file_ = await self.create_file(category=category, type=type)
+        await self.update_file(
+            file_.url,
+            file_obj  = file_obj,
+            file_size = file_size,
+            mime_type = mime_type,
+            encoding  = encoding,
+            timeout   = timeout,
+            emitter   = emitter,
+        )
+        return file_
+
+    async def upload_file_from_path(self, file_path, category=None, type=None, mime_type=None, encoding=None, timeout=None, emitter=None):
+        """
+        Coroutine version of `frankly.Client.upload_file_from_path`.
+        """
+        file_size = os.path.getsize(file_path)
+        guess_type, guess_encoding = mimetypes.guess_type(file_path)
+
+        if mime_type is None:
+            mime_type = guess_type
+
+        if encoding is None:
+            encoding = guess_encoding
+
+        if type is None:
+            type = mime_type.split('/')[0]
+
+        with open(file_path, 'rb') as file_obj:
+            return await self.upload_file(
+                category  = category,
+                type      = type,
+                file_obj  = file_obj,
+                file_size = file_size,
+                mime_type = mime_type,
+                encoding  = encoding,
+                timeout   = timeout,
+                emitter   = emitter,
+            )
+
+    def _set_session(self, session):
+        self._session = session
+        self._headers = make_headers(session)
+
+    async def _run(self, authenticator, version):
+        # This task follows the same steps than `frankly.core.BaseClient._run`,
+        # authenticating, connecting, re-sending pending requests then processing
+        # incoming packets until the connection is lost or the client is closed.
+        delay = 0
+        retry = False
+
+        def incr_delay(delay, error):
+            delay = min(15, max(1, 2 * delay))
+            if metrics.hooks:
+                metrics.emit('backoff', delay, error)
+            return delay
+
+        while self._version == version:
+            if delay != 0:
+                await asyncio.sleep(delay)
+
+            if retry and metrics.hooks:
+                metrics.emit('reconnect', delay)
+            retry = True
+
+            try:
+                session = await authenticator()
+            except Exception as e:
+                delay = incr_delay(delay, e)
+                log.exception(e)
+                self.emit('error', e)
+                continue
+            log.debug("authenticated with %s", session)
+
+            try:
+                url    = self._url
+                socket = await connect_websocket(
+                    host      = url.hostname,
+                    port      = url.port,
+                    secure    = url.scheme == 'wss',
+                    fields    = make_headers(session),
+                    protocols = ['chat'],
+                    timeout   = self._connect_timeout,
+                )
+            except Exception as e:
+                delay = incr_delay(delay, e)
+                log.exception(e)
+                self.emit('error', e)
+                continue
+            delay = 0
+
+            if self._version != version:
+                socket.close()
+                return
+
+            if self._cache is not None:
+                self._cache.clear()
+
+            self._set_session(session)
+            self._socket = socket
+            self.emit('connect')
+            self.emit('authenticate', session)
+
+            pinger  = self._loop.create_task(self._ping(socket))
+            decoder = fmp.Decoder(self._models)
+            running = True
+            try:
+                for req in list(self._pending):
+                    await self._send_packet(socket, req)
+
+                while running:
+                    opcode, payload = await socket.recv()
+
+                    if opcode is None or opcode == websocket.CLOSE:
+                        break
+
+                    if metrics.hooks:
+                        metrics.emit('frame_recv', opcode, len(payload))
+
+                    if opcode == websocket.PING:
+                        await socket.pong(payload)
+                        continue
+
+                    if opcode == websocket.BINARY:
+                        try:
+                            decoder.feed(payload)
+                            packets = list(decoder)
+                        except Exception as e:
+                            log.exception(e)
+                            decoder = fmp.Decoder(self._models)
+                            continue
+                        for packet in packets:
+                            running = self._on_packet(packet) and running
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                delay = incr_delay(delay, e)
+                log.exception(e)
+                self.emit('error', e)
+            finally:
+                pinger.cancel()
+                if self._socket is socket:
+                    self._socket = None
+                    socket.close()
+                self.emit('disconnect')
+
+    async def _ping(self, socket):
+        while True:
+            await asyncio.sleep(20)
+            try:
+                await socket.ping(b'hi')
+            except Exception as e:
+                log.exception(e)
+
+    def _on_packet(self, packet):
+        if packet.id == 0:
+            signal = self._route_signal(packet)
+            if signal is not None:
+                self._dispatch_signal(*signal)
+            return True
+
+        req = self._pending.load(packet)
+        if req is None:
+            return True
+
+        if metrics.hooks:
+            status = 200 if packet.type == fmp.OK else packet.payload.status
+            metrics.emit('response', req.packet, status, time.time() - req.start)
+
+        if packet.type == fmp.OK:
+            req.resolve(packet.payload)
+            return True
+
+        status = packet.payload.status
+        reason = packet.payload.error
+        req.reject(errors.Error(packet.operation, packet.path, status, reason))
+
+        # We got a 401, the current session expired, returning False drops the
+        # connection so the client authenticates again.
+        return status != 401
+
+class Flight(object):
+    """
+    A read request in flight and the number of callers waiting for its result.
+    """
+
+    def __init__(self, task):
+        self.task    = task
+        self.waiters = 0
+
+class PageIterator(object):
+    """
+    Asynchronous iterator over a collection paginated by id, the asyncio
+    counterpart of `frankly.core.BaseClient._iter_pages`. The next page is
+    requested in a task before the elements of the current one are returned.
+    """
+
+    def __init__(self, client, path, params, start, stop, page_size):
+        self.client    = client
+        self.path      = path
+        self.params    = params
+        self.stop      = stop
+        self.page_size = page_size
+        self.offset    = start
+        self.items     = collections.deque()
+        self.page      = self.fetch(start)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        while not self.items:
+            if self.page is None:
+                raise StopAsyncIteration
+
+            items, self.page = await self.page, None
+
+            if not items:
+                raise StopAsyncIteration
+
+            lowest = min(item.id for item in items)
+            stop   = self.stop
+
+            if lowest > 1 and (self.offset is None or lowest <= self.offset) and (stop is None or (lowest - 1) > stop):
+                self.offset = lowest - 1
+                self.page   = self.fetch(self.offset)
+
+            self.items.extend(item for item in items if stop is None or item.id > stop)
+
+        return self.items.popleft()
+
+    def fetch(self, offset):
+        query = dict(self.params or { }, limit=self.page_size)
+        if offset is not None:
+            query['offset'] = offset
+        return self.client._loop.create_task(self.client._request(fmp.READ, self.path, query))
+
+class HttpConnection(object):
+    """
+    A HTTP/1.1 connection running on asyncio streams.
+    """
+
+    def __init__(self, reader, writer, host):
+        self.reader = reader
+        self.writer = writer
+        self.host   = host
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+            self.reader = None
+
+    async def request(self, method, path, query=None, fields=None, content=None):
+        fields = { } if fields is None else dict(fields)
+        fields.setdefault('Host', self.host)
+
+        if content is None:
+            content = b''
+
+        if isinstance(content, bytes):
+            fields['Content-Length'] = str(len(content))
+
+        self.writer.write(format_request(method, path, query, fields))
+
+        if isinstance(content, core.FileProgressUpload):
+            loop = get_running_loop()
+            while True:
+                # Reading files may block, chunks are read in the default executor
+                # and progress events are emitted from the loop.
+                chunk = content.progress(await loop.run_in_executor(None, content.fileobj.read, 65536))
+                if not chunk:
+                    break
+                self.writer.write(chunk)
+                await self.writer.drain()
+        else:
+            self.writer.write(content)
+            await self.writer.drain()
+
+        return await read_response(self.reader, method)
+
+class ConnectionPool(object):
+    """
+    Bounded pool of persistent HTTP connections to a single host, this is the
+    asyncio counterpart of `frankly.http.ConnectionPool`.
+    """
+
+    def __init__(self, host, port=None, secure=False, size=10, idle_timeout=60):
+        if port is None:
+            port = 443 if secure else 80
+
+        self.host         = host
+        self.port         = port
+        self.secure       = secure
+        self.size         = size
+        self.idle_timeout = idle_timeout
+        self.idle         = collections.deque()
+        self.semaphore    = None
+
+    async def request(self, method, path, query=None, fields=None, content=None, timeout=None):
+        # The semaphore is created on first use so it binds to the running loop on
+        # versions of Python where it takes the loop when it's constructed.
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.size)
+
+        async with self.semaphore:
+            while True:
+                conn, reused = self.acquire(), True
+
+                if conn is None:
+                    conn, reused = await self.connect(timeout), False
+
+                try:
+                    status, fields_, content_, keep_alive = await asyncio.wait_for(
+                        conn.request(method, path, query, fields, content),
+                        timeout,
+                    )
+                except ConnectionClosed:
+                    conn.close()
+                    # The server closed the idle connection before getting the request,
+                    # it's safe to submit it again on a new connection.
+                    if reused and not hasattr(content, 'read'):
+                        continue
+                    raise
+                except BaseException:
+                    conn.close()
+                    raise
+
+                if keep_alive:
+                    self.idle.append((conn, time.time()))
+                else:
+                    conn.close()
+
+                return status, fields_, content_
+
+    def acquire(self):
+        now = time.time()
+
+        while self.idle:
+            conn, last_used = self.idle.pop()
+
+            if self.idle_timeout is None or (now - last_used) <= self.idle_timeout:
+                return conn
+
+            conn.close()
+
+    async def connect(self, timeout=None):
+        host = self.host
+        if self.port not in (80, 443):
+            host += ':%s' % self.port
+        reader, writer = await connect(self.host, self.port, self.secure, timeout)
+        return HttpConnection(reader, writer, host)
+
+    def close(self):
+        while self.idle:
+            conn, _ = self.idle.pop()
+            conn.close()
+
+class ConnectionClosed(IOError):
+    pass
+
+class WebSocket(object):
+    """
+    A websocket connection running on asyncio streams, the interface mirrors
+    the one of `frankly.websocket.WebSocket` with coroutine methods.
+    """
+
+    def __init__(self, reader, writer, mask=False):
+        self.reader = reader
+        self.writer = writer
+        self.mask   = mask
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+    async def recv_frame(self, size_max=None):
+        header = websocket.webtools.websocket_header()
+        data   = await self.reader.readexactly(2)
+        size   = 2
+
+        length = data[1] & 0x7F
+        if length == 126:
+            size += 2
+        elif length == 127:
+            size += 8
+        if data[1] & 0x80:
+            size += 4
+
+        if size > 2:
+            data += await self.reader.readexactly(size - 2)
+        header.decode(data)
+
+        assert bool(self.mask) != bool(header.mask), "got frame with invalid mask bit"
+        assert size_max is None or header.length <= size_max, "got frame longer than maixmum allow length"
+
+        data = bytearray(await self.reader.readexactly(header.length))
+
+        if header.mask:
+            websocket.webtools.xor_mask(data, header.key)
+
+        return header.fin, header.opcode, data
+
+    async def recv(self, size_max=None):
+        opcode  = None
+        payload = None
+
+        try:
+            while True:
+                fin, code, frame = await self.recv_frame(size_max)
+
+                if payload is None:
+                    opcode  = code
+                    payload = frame
+
+                else:
+                    if code != websocket.CONTINUATION:
+                        return None, None
+                    payload.extend(frame)
+
+                if fin:
+                    break
+        except asyncio.IncompleteReadError:
+            return None, None
+
+        if opcode == websocket.TEXT:
+            payload = str(bytes(payload), 'utf-8')
+
+        return opcode, payload
+
+    async def send_frame(self, fin, opcode, frame):
+        header          = websocket.webtools.websocket_header()
+        header.key      = 0
+        header.length   = len(frame)
+        header.opcode   = opcode
+        header.fin      = fin
+        header.mask     = 1 if self.mask else 0
+        header.reserved = 0
+
+        if self.mask:
+            frame = bytearray(frame)
+            header.key = int.from_bytes(os.urandom(4), 'little')
+            websocket.webtools.xor_mask(frame, header.key)
+
+        data = bytearray(16)
+        size = header.encode(data)
+
+        if self.writer is None:
+            raise ConnectionClosed("the websocket connection was closed")
+
+        # Both writes happen without yielding to the event loop so frames sent
+        # from concurrent tasks never get interleaved.
+        self.writer.write(bytes(data[:size]))
+        self.writer.write(bytes(frame))
+        await self.writer.drain()
+
+    async def send(self, payload):
+        if isinstance(payload, str):
+            opcode  = websocket.TEXT
+            payload = payload.encode('utf-8')
+        else:
+            opcode  = websocket.BINARY
+        await self.send_frame(1, opcode, payload)
+
+    async def ping(self, payload):
+        await self.send_frame(1, websocket.PING, payload)
+
+    async def pong(self, payload):
+        await self.send_frame(1, websocket.PONG, payload)
+
+    async def shutdown(self, code, reason):
+        await self.send_frame(1, websocket.CLOSE, websocket.encode_close_frame(code, reason))
+
+async def connect(host, port, secure=False, timeout=None):
+    context = ssl.create_default_context() if secure else None
+    return await asyncio.wait_for(
+        asyncio.open_connection(host, port, ssl=context),
+        timeout,
+    )
+
+async def connect_websocket(host, port=None, secure=False, path='/', fields=None, protocols=None, timeout=None):
+    if port is None:
+        port = 443 if secure else 80
+
+    key    = websocket.make_random_key()
+    fields = { } if fields is None else dict(fields)
+
+    fields['Host'] = host if port in (80, 443) else '%s:%s' % (host, port)
+    fields['Connection'] = 'Upgrade'
+    fields['Upgrade'] = 'websocket'
+    fields['Sec-WebSocket-Key'] = key
+    fields['Sec-WebSocket-Version'] = '13'
+
+    if protocols is not None:
+        fields['Sec-WebSocket-Protocol'] = ', '.join(quote(x) for x in protocols)
+
+    reader, writer = await connect(host, port, secure, timeout)
+    try:
+        writer.write(format_request('GET', path, None, fields))
+        status, fields, _, _ = await asyncio.wait_for(read_response(reader, 'GET'), timeout)
+
+        if status != 101:
+            raise websocket.UpgradeFailure("http server responded with status %s" % status)
+
+        accept = fields.get('sec-websocket-accept')
+        if accept != websocket.hash_key(key):
+            raise websocket.UpgradeFailure("http server responded with an invalid key (%s)" % accept)
+
+        version = fields.get('sec-websocket-version')
+        if version is not None and version != '13':
+            raise websocket.UpgradeFailure("http server responded with another websocket version (%s)" % version)
+    except BaseException:
+        writer.close()
+        raise
+
+    return WebSocket(reader, writer, mask=True)
+
+async def authenticate(pool, generate_identity_token, timeout=None):
+    fields = {
+        'Accept'     : 'application/json',
+        'User-Agent' : auth.USER_AGENT,
+    }
+
+    try:
+        status, _, content = await pool.request('GET', '/auth/nonce', fields=fields, timeout=timeout)
+    except Exception as e:
+        raise errors.Error('auth', '/auth/nonce', 500, str(e))
+
+    if status != 200:
+        raise errors.Error('auth', '/auth/nonce', status, http.decode_response_payload(content.decode('utf-8')))
+
+    try:
+        nonce = http.decode_response_payload(content.decode('utf-8'))
+        token = generate_identity_token(nonce)
+    except errors.Error:
+        raise
+    except Exception as e:
+        raise errors.Error('auth', '/auth', 500, str(e))
+
+    try:
+        fields['Frankly-App-Identity-Token'] = token
+        status, fields, content = await pool.request('GET', '/auth', fields=fields, timeout=timeout)
+    except Exception as e:
+        raise errors.Error('auth', '/auth', 500, str(e))
+
+    info = http.decode_response_payload(content.decode('utf-8'))
+
+    if status != 200:
+        raise errors.Error('auth', '/auth', status, info)
+
+    cookies = { }
+    for header in fields.get('set-cookie', [ ]):
+        for name, morsel in SimpleCookie(header).items():
+            cookies[name] = morsel.value
+
+    return auth.Session(headers=fields, cookies=cookies, info=info)
+
+# asyncio.get_running_loop was added in Python 3.7, before that get_event_loop
+# returns the running loop when it's called from a coroutine.
+get_running_loop = getattr(asyncio, 'get_running_loop', asyncio.get_event_loop)
+
+def auth_address(address):
+    url = urlparse(address)
+
+    if url.scheme == 'wss':
+        return 'https://' + url.netloc
+
+    if url.scheme == 'ws':
+        return 'http://' + url.netloc
+
+    return url.scheme + '://' + url.netloc
+
+def make_headers(session):
+    headers = { 'Accept': 'application/json', 'User-Agent': auth.USER_AGENT }
+
+    if session.cookies is not None:
+        cookie = session.cookies.get('app-token')
+        if cookie is not None:
+            headers['Cookie'] = 'app-token=' + cookie
+    else:
+        if session.key is not None:
+            headers['Frankly-App-Key'] = session.key
+
+        if session.secret is not None:
+            headers['Frankly-App-Secret'] = session.secret
+
+        if session.user is not None:
+            headers['Frankly-App-User-Id'] = str(session.user)
+
+        if session.role is not None:
+            headers['Frankly-App-User-Role'] = session.role
+
+    return headers
+
+def format_query_value(value):
+    if value is True:  return 'true'
+    if value is False: return 'false'
+    if value is None:  return ''
+    return value
+
+def format_request(method, path, query=None, fields=None):
+    target = path
+
+    if query:
+        target += '?' + urlencode([(k, format_query_value(v)) for k, v in query.items()], doseq=True)
+
+    header  = '%s %s HTTP/1.1\r\n' % (method, target)
+    header += ''.join('%s: %s\r\n' % (k, v) for k, v in fields.items())
+    header += '\r\n'
+    return header.encode('utf-8')
+
+async def read_response(reader, method):
+    line = await reader.readline()
+
+    if not line:
+        raise ConnectionClosed("the http connection was closed by the server")
+
+    parts  = line.decode('latin-1').rstrip('\r\n').split(' ', 2)
+    status = int(parts[1])
+    fields = { }
+
+    while True:
+        line = (await reader.readline()).decode('latin-1').rstrip('\r\n')
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        name  = name.strip().lower()
+        value = value.strip()
+        if name == 'set-cookie':
+            fields.setdefault(name, [ ]).append(value)
+        else:
+            fields[name] = value
+
+    keep_alive = parts[0] == 'HTTP/1.1' and fields.get('connection', '').lower() != 'close'
+
+    if method == 'HEAD' or status in (101, 204, 304) or status < 200:
+        content = b''
+
+    elif 'chunked' in fields.get('transfer-encoding', '').lower():
+        content = bytearray()
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            if size == 0:
+                # Skip the trailer section.
+                while (await reader.readline()) not in (b'\r\n', b'\n', b''):
+                    pass
+                break
+            content += await reader.readexactly(size)
+            await reader.readexactly(2)
+        content = bytes(content)
+
+    elif 'content-length' in fields:
+        content = await reader.readexactly(int(fields['content-length']))
+
+    else:
+        content    = await reader.read()
+        keep_alive = False
+
+    return status, fields, content, keep_alive
@@ -30,10 +30,12 @@ from six.moves import queue
 
 import copy
 import functools
-import multiprocessing
+import os
 import six
 import sys
 import threading
+import time
+import warnings
 
 from . import logger as log
 
@@ -76,16 +78,32 @@ def once(f):
 class Promise(object):
 
     def __init__(self, callback, *args, **kwargs):
-        self._lock    = threading.Lock()
-        self._event   = threading.Event()
-        self._result  = None
-        self._resolve = None
-        self._reject  = None
+        self._lock      = threading.Lock()
+        self._event     = threading.Event()
+        self._result    = None
+        self._callbacks = [ ]
 
         if callback is None:
             return
 
-        workers.pick().schedule(None, self._run, callback, *args, **kwargs)
+        workers.schedule(None, self._run, callback, *args, **kwargs)
+
+    @staticmethod
+    def from_future(future):
+        # Returns a promise that gets resolved or rejected when the future (from
+        # concurrent.futures or compatible) completes.
+        promise = Promise(None)
+
+        def done(future):
+            try:
+                result = future.result()
+            except Exception as e:
+                promise.reject(e)
+            else:
+                promise.resolve(result)
+
+        future.add_done_callback(done)
+        return promise
 
     def wait(self, timeout=None):
         if not self._event.wait(timeout):
@@ -99,32 +117,29 @@ class Promise(object):
         assert resolve is not None, "Promise.then: the resolve callback cannot be None"
         assert reject is not None, "Promise.then: the reject callback cannot be None"
 
+        # Multiple pairs of callbacks can be set on a promise, they are called in
+        # the order they were registered.
         with self._lock:
-            self._resolve = resolve
-            self._reject  = reject
+            if self._result is None:
+                self._callbacks.append((resolve, reject))
+                return
 
-            if self._result is not None:
-                self._notify()
+        self._notify([(resolve, reject)])
 
     def resolve(self, value):
-        with self._lock:
-            if self._result is not None:
-                raise RuntimeError("the promise was already resolved")
-            self._result = (value, None)
-            resolve = self._resolve
-        self._event.set()
-        if resolve is not None:
-            self._notify()
+        self._complete((value, None))
 
     def reject(self, value):
+        self._complete((None, value))
+
+    def _complete(self, result):
         with self._lock:
             if self._result is not None:
                 raise RuntimeError("the promise was already resolved")
-            self._result = (None, value)
-            reject = self._reject
+            self._result = result
+            callbacks, self._callbacks = self._callbacks, [ ]
         self._event.set()
-        if reject is not None:
-            self._notify()
+        self._notify(callbacks)
 
     def _run(self, callback, *args, **kwargs):
         result = None
@@ -134,42 +149,40 @@ class Promise(object):
             result = callback(*args, **kwargs)
         except:
             raised = sys.exc_info()[1]
-        self._result = (result, raised)
-        self._event.set()
-
-        with self._lock:
-            if self._resolve is not None:
-                self._notify()
+        self._complete((result, raised))
 
-    def _notify(self):
+    def _notify(self, callbacks):
         ok, ex = self._result
-        if ex is None:
-            self._resolve(ok)
-        else:
-            self._reject(ex)
+        for resolve, reject in callbacks:
+            if ex is None:
+                resolve(ok)
+            else:
+                reject(ex)
 
 class Timer(threading.Thread):
 
     def __init__(self, interval, target=None):
-        threading.Thread.__init__(self, target=self._run)
+        threading.Thread.__init__(self)
+        self.daemon   = True
         self.event    = threading.Event()
-        self.target   = self.run if target is None else target
+        self.target   = target
         self.interval = interval
 
     def __iter__(self):
         interval = self.interval
         while not self.event.wait(timeout=interval):
-            t0 = time.now()
+            t0 = time.time()
             yield t0
-            t1 = time.now()
+            t1 = time.time()
             interval = self.interval - ((t1 - t0) % self.interval)
 
-    def _run(self):
-        for _ in self:
-            self.run()
-
     def run(self):
-        self.target()
+        # Thread.start calls this method, the target is invoked once per interval
+        # until the timer is stopped. A timer without a target keeps ticking and
+        # does nothing, like it did before it looped.
+        for _ in self:
+            if self.target is not None:
+                self.target()
 
     def stop(self):
         self.event.set()
@@ -228,6 +241,13 @@ class Worker(threading.Thread):
         self._schedule(promise._run, callback, *args, **kwargs)
         return promise
 
+    def put(self, item):
+        # Workers running a custom target get the items to process through their
+        # queue instead of callbacks.
+        if self.event.is_set():
+            raise RuntimeError("attempt to push an item to a worker that was already stopped")
+        self.queue.put(item, block=False)
+
     def _schedule(self, callback, *args, **kwargs):
         if self.event.is_set():
             raise RuntimeError("attempt to push a callback to a worker that was already stopped")
@@ -248,26 +268,55 @@ class Worker(threading.Thread):
                 log.exception(e)
 
 class WorkerPool(object):
+    """
+    Pool of threads running jobs from a shared queue.
 
-    def __init__(self, worker_count=0):
-        if worker_count <= 0:
-            worker_count = multiprocessing.cpu_count()
+    Idle threads take the next job from the queue as soon as they're done with
+    their current one, so a slow job only holds up the thread running it. The
+    threads are started on demand, up to `worker_count`, and exit after being
+    idle for `idle_timeout` seconds (a timeout of None keeps them running until
+    the pool is stopped).
 
-        self.lock    = threading.Lock()
-        self.index   = 0
-        self.workers = [ ]
+    When `max_queue` is positive the number of jobs waiting to be picked up is
+    bounded and scheduling a job blocks until there is room in the queue.
 
-        for _ in range(worker_count):
-            self.workers.append(Worker())
+    The pool implements the `concurrent.futures.Executor` interface, `submit`
+    returns a future for the result of the job. The module is imported on the
+    first call to `submit` (on Python 2 it requires the futures backport).
 
-    def __iter__(self):
-        return iter(self.workers)
+    The pool used to be a list of `Worker` instances that jobs were handed to
+    in turn. It no longer has any, `pick`, iterating and indexing the pool are
+    deprecated and give the pool itself in place of a worker. `len` is still
+    the maximum number of threads, `threads` holds the ones that are running.
+    """
+
+    def __init__(self, worker_count=0, max_queue=0, idle_timeout=60):
+        if worker_count <= 0:
+            worker_count = cpu_count()
+
+        if max_queue < 0:
+            raise ValueError("queue size must be a positive value")
+
+        self.size         = worker_count
+        self.idle_timeout = idle_timeout
+        self.lock         = threading.Lock()
+        self.jobs         = queue.Queue()
+        self.room         = threading.Semaphore(max_queue) if max_queue else None
+        self.idle         = 0
+        self.pending      = 0
+        self.threads      = set()
+        self.stopped      = False
 
     def __len__(self):
-        return len(self.workers)
+        return self.size
+
+    def __iter__(self):
+        deprecated("iterating a WorkerPool")
+        return iter([self] * self.size)
 
     def __getitem__(self, index):
-        return self.workers[index]
+        deprecated("indexing a WorkerPool")
+        return ([self] * self.size)[index]
 
     def __enter__(self):
         self.start()
@@ -282,24 +331,136 @@ class WorkerPool(object):
         self.start()
 
     def start(self):
-        for worker in self:
-            worker.start()
+        # Threads are started when jobs get scheduled, there's nothing to do here
+        # but the method is kept so the pool can be used like a worker.
+        pass
 
     def stop(self):
-        for worker in self:
-            worker.stop()
+        with self.lock:
+            if self.stopped:
+                return
+            self.stopped = True
+        # A single marker is enough, every thread puts it back in the queue for
+        # the next one before exiting.
+        self.jobs.put(None)
 
     def join(self):
-        for worker in self:
-            worker.join()
+        while True:
+            with self.lock:
+                threads = [t for t in self.threads if t is not threading.current_thread()]
+            if not threads:
+                break
+            for thread in threads:
+                thread.join()
+
+    def shutdown(self, wait=True):
+        self.stop()
+        if wait:
+            self.join()
 
     def schedule(self, promise, callback, *args, **kwargs):
-        return self.pick().schedule(promise, callback, *args, **kwargs)
+        if promise is None:
+            return self._schedule(callback, args, kwargs)
+        self._schedule(promise._run, (callback,) + args, kwargs)
+        return promise
+
+    def submit(self, callback, *args, **kwargs):
+        from concurrent import futures
+        future = futures.Future()
+        self._schedule(run_future, (future, callback, args, kwargs), { })
+        return future
+
+    def map(self, callback, *iterables, **kwargs):
+        """
+        Works like `concurrent.futures.Executor.map`, all the jobs are submitted
+        when map is called and the results are yielded in order as they become
+        available. The `timeout` applies to the whole iteration and the jobs that
+        haven't started yet are cancelled if the iteration is abandoned.
+        """
+        timeout = kwargs.get('timeout')
+        results = [self.submit(callback, *args) for args in zip(*iterables)]
+
+        if timeout is not None:
+            deadline = time.time() + timeout
+
+        def iterate():
+            try:
+                for future in results:
+                    if timeout is None:
+                        yield future.result()
+                    else:
+                        yield future.result(deadline - time.time())
+            finally:
+                for future in results:
+                    future.cancel()
+
+        return iterate()
 
     def pick(self):
+        deprecated("WorkerPool.pick")
+        return self
+
+    def _schedule(self, callback, args, kwargs):
+        if self.stopped:
+            raise RuntimeError("attempt to push a callback to a worker pool that was already stopped")
+
+        if self.room is not None:
+            self.room.acquire()
+
+        # Jobs are queued as tuples so running one doesn't go through an extra
+        # function call. A thread is started when there are more jobs waiting than
+        # idle threads to run them.
+        self.jobs.put((callback, args, kwargs))
+
         with self.lock:
-            index, self.index = self.index, self.index + 1
-        return self[index % len(self)]
+            self.pending += 1
+            if self.pending > self.idle and len(self.threads) < self.size:
+                thread = threading.Thread(target=self._run)
+                thread.daemon = True
+                self.threads.add(thread)
+                thread.start()
+
+    def _run(self):
+        jobs = self.jobs
+        room = self.room
+        lock = self.lock
+
+        while True:
+            with lock:
+                self.idle += 1
+
+            try:
+                job = jobs.get(timeout=self.idle_timeout)
+            except queue.Empty:
+                # The thread only exits if no jobs were queued in the meantime,
+                # _schedule counts new jobs while holding the lock so it either
+                # sees that the thread is gone or the thread sees the job.
+                with lock:
+                    self.idle -= 1
+                    if self.pending == 0:
+                        self.threads.discard(threading.current_thread())
+                        return
+                continue
+
+            if job is None:
+                jobs.put(None)
+                break
+
+            with lock:
+                self.idle    -= 1
+                self.pending -= 1
+
+            if room is not None:
+                room.release()
+
+            callback, args, kwargs = job
+            try:
+                callback(*args, **kwargs)
+            except Exception as e:
+                log.exception(e)
+
+        with lock:
+            self.threads.discard(threading.current_thread())
 
     def do(self, callback, args):
         return list(self.do_iter(callback, args))
@@ -307,10 +468,6 @@ class WorkerPool(object):
     def do_iter(self, callback, args):
         q = queue.Queue(maxsize=len(args))
 
-        def res_generator():
-            for _ in range(len(args)):
-                yield q.get()
-
         def res_callback(res):
             q.put((res, None))
 
@@ -325,4 +482,26 @@ class WorkerPool(object):
         for _ in range(len(args)):
             yield q.get()
 
+def cpu_count():
+    # os.cpu_count is only available on Python 3, importing multiprocessing just
+    # for this would slow down importing the package.
+    try:
+        return os.cpu_count() or 1
+    except AttributeError:
+        import multiprocessing
+        return multiprocessing.cpu_count()
+
+def deprecated(feature):
+    warnings.warn(feature + " is deprecated", DeprecationWarning, stacklevel=3)
+
+def run_future(future, callback, args, kwargs):
+    if not future.set_running_or_notify_cancel():
+        return
+    try:
+        result = callback(*args, **kwargs)
+    except:
+        future.set_exception(sys.exc_info()[1])
+    else:
+        future.set_result(result)
+
 workers = WorkerPool()
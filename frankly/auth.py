@@ -32,8 +32,6 @@ urlparse = urllib.parse.urlparse
 
 USER_AGENT = 'Frankly-SDK/%s (Python)' % __version__
 
-import jwt
-import requests
 import six
 import time
 
@@ -97,6 +95,7 @@ def generate_identity_token(app_key, app_secret, nonce, uid=None, role=None):
     if role is not None:
         tok['role'] = role
 
+    import jwt
     idt = jwt.encode(tok, app_secret, algorithm='HS256', headers={
         'typ': 'JWS',
         'cty': 'frankly-it;v1',
@@ -177,6 +176,9 @@ class Session(object):
 
 def authenticate(address, generate_identity_token, timeout=None, http=None):
     if http is None:
+        # requests takes a while to import, it's only loaded by the programs
+        # that actually authenticate over HTTP.
+        import requests
         http = requests
 
     # Guess what the address should be if it's set to a websocket endpoint
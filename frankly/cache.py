@@ -0,0 +1,230 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import collections
+import six
+import threading
+import time
+
+from . import fmp
+from . import model
+
+__all__ = [
+    'Cache',
+    'CACHEABLE',
+]
+
+# Templates of the paths for which read results can be cached, None matches
+# any value in a path segment.
+CACHEABLE = (
+    ('rooms', None),
+    ('rooms', None, 'count'),
+    ('rooms', None, 'owners'),
+    ('rooms', None, 'moderators'),
+    ('rooms', None, 'members'),
+    ('rooms', None, 'announcers'),
+    ('rooms', None, 'subscribers'),
+    ('rooms', None, 'participants'),
+    ('users', None),
+    ('apps', None),
+)
+
+# Lists of users of a room, changes to any of them invalidate the room count.
+ROOM_LISTS = ('owners', 'moderators', 'members', 'announcers', 'subscribers', 'participants')
+
+class Cache(object):
+    """
+    Instances of this class are used by clients to cache the results of read
+    operations, entries are updated or invalidated when the server pushes
+    changes to the objects they hold.
+
+    The cache is bounded to `size` entries and evicts the least recently used
+    ones first. Entries expire after `ttl` seconds, `ttls` may map path
+    templates (like `('rooms', None, 'count')`) to specific expiration times.
+
+    Objects returned from the cache are shared between callers and must be
+    treated as read-only.
+
+    Note that the server only pushes changes to clients using a WebSocket
+    connection, on HTTP clients entries are only refreshed when they expire.
+    """
+
+    def __init__(self, size=1000, ttl=60, ttls=None):
+        # Every change bumps the generation, the generation of the last change to
+        # each path is kept in `changed` (or in `deleted` for changes that apply
+        # to the whole subtree) so a signal only discards the results of reads of
+        # the paths it touched. Both tables are bounded like the entries, when a
+        # path is forgotten its generation is kept in `pruned` and puts that
+        # started before it are discarded.
+        self.lock       = threading.Lock()
+        self.size       = size
+        self.ttl        = ttl
+        self.ttls       = { } if ttls is None else dict(ttls)
+        self.entries    = collections.OrderedDict()
+        self.changed    = collections.OrderedDict()
+        self.deleted    = collections.OrderedDict()
+        self.generation = 0
+        self.pruned     = 0
+        self.hits       = 0
+        self.misses     = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __contains__(self, path):
+        return make_key(path) in self.entries
+
+    def get(self, path, default=None):
+        key = make_key(path)
+        now = time.time()
+
+        with self.lock:
+            try:
+                value, expire = self.entries[key]
+            except KeyError:
+                self.misses += 1
+                return default
+
+            if expire <= now:
+                del self.entries[key]
+                self.misses += 1
+                return default
+
+            # Move the entry to the end of the ordered dict so it's the last one to
+            # be evicted.
+            del self.entries[key]
+            self.entries[key] = value, expire
+            self.hits += 1
+            return value
+
+    def put(self, path, value, generation=None):
+        """
+        Stores the value for the given path, if `generation` is set and the path
+        was modified by a server signal since it was obtained (from the
+        `generation` attribute), the value is considered stale and discarded.
+        """
+        key = make_key(path)
+        ttl = self.get_ttl(key)
+
+        with self.lock:
+            if generation is not None and self._changed_since(key, generation):
+                return False
+            self.entries.pop(key, None)
+            self.entries[key] = value, time.time() + ttl
+
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+        return True
+
+    def remove(self, path):
+        key = make_key(path)
+
+        with self.lock:
+            self._change(self.changed, key)
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.generation += 1
+            self.pruned = self.generation
+            self.entries.clear()
+            self.changed.clear()
+            self.deleted.clear()
+
+    def signal(self, type, path, payload):
+        """
+        Applies a change pushed by the server to the cache, this is called by
+        clients when they receive update or delete signals.
+        """
+        key = make_key(path)
+
+        with self.lock:
+            self._change(self.changed, key)
+
+            if type == fmp.UPDATE and cacheable(key):
+                # Objects that are already cached get replaced with their new version,
+                # we don't populate the cache with objects that were never read.
+                try:
+                    _, expire = self.entries[key]
+                    self.entries[key] = payload, expire
+                except KeyError:
+                    pass
+                return
+
+            if type == fmp.DELETE:
+                # Deleting an object invalidates everything cached below its path
+                # (deleting a room drops its member lists for example).
+                self._change(self.deleted, key)
+                size = len(key)
+                for k in [k for k in self.entries if k[:size] == key]:
+                    del self.entries[k]
+
+            # Changes to an item of a collection invalidate the collection itself
+            # (a new room owner invalidates the list of owners for example).
+            if len(key) > 1:
+                self._invalidate(key[:-1])
+
+            # Adding or removing users of a room changes the room count.
+            if len(key) == 4 and key[0] == 'rooms' and key[2] in ROOM_LISTS:
+                self._invalidate(key[:2] + ('count',))
+
+    def _invalidate(self, key):
+        self._change(self.changed, key)
+        self.entries.pop(key, None)
+
+    def _change(self, table, key):
+        self.generation += 1
+        table.pop(key, None)
+        table[key] = self.generation
+
+        while len(table) > self.size:
+            _, generation = table.popitem(last=False)
+            self.pruned   = max(self.pruned, generation)
+
+    def _changed_since(self, key, generation):
+        if generation < self.pruned or self.changed.get(key, 0) > generation:
+            return True
+        for size in range(1, len(key) + 1):
+            if self.deleted.get(key[:size], 0) > generation:
+                return True
+        return False
+
+    def get_ttl(self, key):
+        for template, ttl in six.iteritems(self.ttls):
+            if model.match(key, template):
+                return ttl
+        return self.ttl
+
+def cacheable(path):
+    for template in CACHEABLE:
+        if model.match(path, template):
+            return True
+    return False
+
+def make_key(path):
+    return tuple(six.text_type(x) for x in path)
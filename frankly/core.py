@@ -27,68 +27,95 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from copy import copy
+from six.moves import queue
 from six.moves import urllib
 urlparse   = urllib.parse.urlparse
 urlunparse = urllib.parse.urlunparse
 
-import requests
 import six
 import threading
 import time
 
 from . import auth
 from . import async
+from . import cache
 from . import events
 from . import errors
 from . import logger as log
+from . import metrics
 from . import model
 from . import fmp
 from . import util
 from . import http
-from . import ws
+from . import window
 
 __all__ = [
+    'Batch',
     'BaseClient',
     'EventIterator',
 ]
 
+# Interval (in seconds) at which clients check for timed out requests.
+PULSE_INTERVAL = 0.1
+
 class BaseClient(events.Emitter):
 
-    def __init__(self, url, connect_timeout=None, request_timeout=None, async=False):
+    def __init__(self, url, connect_timeout=None, request_timeout=None, async=False, pool_size=10, pool_idle_timeout=60, flush_delay=0, cache=None, models=False, max_inflight=1024):
         events.Emitter.__init__(self, logger=log)
 
         # Immutable members of the client object.
         self._lock            = threading.Lock()
         self._BackendClass    = None
+        self._backend_options = { }
         self._running         = False
         self._async           = async
         self._url             = url
         self._address         = url.scheme + '://' + url.netloc
         self._connect_timeout = connect_timeout
         self._request_timeout = request_timeout
+        self._pool_size       = pool_size
+        self._pool_timeout    = pool_idle_timeout
+        self._cache           = cache
+        self._models          = models
+        self._routes          = events.Router()
 
         # Mutable members of the client object (used when an asynchronous worker is
         # started).
         self._pending = None
+        self._window  = window.Window(maximum=max_inflight) if max_inflight else None
         self._worker  = None
         self._timer   = None
         self._version = 0
         self._idseq   = 1
 
+        # Promises of the read requests currently in flight, indexed by path and
+        # parameters.
+        self._inflight = { }
+
+        # Thread pools running the operations of HTTP batches, indexed by their
+        # concurrency.
+        self._batch_pools = { }
+
         # Mutable members of the client object (used when the backend is accessed
         # directly).
         self._backend = None
 
+        # Backends decode payloads straight into model classes on typed clients.
+        self._backend_options['models'] = models
+
         if self._url.scheme in ('http', 'https'):
-            # In asynchronous mode the HTTP backend uses a pool of workers to dispatch
-            # requests.
-            if async:
-                workers.start_once()
             self._BackendClass = http.Backend
+            # Connections are pooled at the client level so they survive backends
+            # getting re-created after a re-authentication.
+            self._backend_options['pool'] = http.ConnectionPool(pool_size, pool_idle_timeout)
             return
 
         if self._url.scheme in ('ws', 'wss'):
+            # The websocket backend pulls in ssl and http.client, it's only loaded
+            # by clients that use it.
+            from . import ws
             self._BackendClass = ws.Backend
+            self._backend_options['flush_delay'] = flush_delay
             return
 
         raise TypeError("url scheme is none of http, https, ws or wss: " + self._address)
@@ -134,7 +161,7 @@ class BaseClient(events.Emitter):
                 log.debug("starting async backend to %s", self._address)
                 async.workers.start_once()
                 self._pending = fmp.RequestStore()
-                self._timer   = async.Timer(1, self._pulse)
+                self._timer   = async.Timer(PULSE_INTERVAL, self._pulse)
                 self._worker  = async.Worker(lambda jobs: self._run(jobs, authenticator, self._version))
                 self._timer.start()
                 self._worker.start()
@@ -146,7 +173,7 @@ class BaseClient(events.Emitter):
             log.debug("authenticated with %s", session)
 
             log.debug("opening sync backend to %s", self._address)
-            self._backend = self._BackendClass(self._address, session)
+            self._backend = self._BackendClass(self._address, session, **self._backend_options)
             self._backend.open(timeout=self._connect_timeout, async=False)
 
         # There's no worker to fire these events, we use the current thread to emulate the
@@ -179,6 +206,7 @@ class BaseClient(events.Emitter):
                 log.debug("closing sync backend with code = %s and reason = %s", code, reason)
                 self._backend.close(code, reason)
                 self._backend = None
+                self._close_pool()
             else:
                 # When a worker is available we schedule the closing method to be called
                 # on the worker, stop it and wait for it to terminate.
@@ -217,9 +245,12 @@ class BaseClient(events.Emitter):
             params = { }
 
         timeout = self._request_timeout
-        expire  = time.time() + timeout
+        start   = time.time()
+        expire  = start + timeout
         path    = [six.text_type(x) for x in path]
         packet  = fmp.Packet(operation, 0, 0, path, params, payload)
+        store   = None
+        flight  = None
 
         with self._lock:
             if not self._running:
@@ -228,17 +259,79 @@ class BaseClient(events.Emitter):
             worker  = self._worker
             packet.id, self._idseq = self._idseq, self._idseq + 1
 
+        # Read operations may be served from the cache, the generation is captured
+        # before sending the request so results don't overwrite changes that the
+        # server pushed in the meantime.
+        if self._cache is not None and operation == fmp.READ and not params and cache.cacheable(path):
+            store      = self._cache
+            generation = store.generation
+            result     = store.get(path)
+
+            if result is not None:
+                if self.async:
+                    promise = async.Promise(None)
+                    promise.resolve(result)
+                    return promise
+                return result
+
+        # Concurrent identical reads share a single request, callers that find a
+        # matching request in flight get its promise instead of sending a packet.
+        if operation == fmp.READ:
+            flight = (tuple(path), repr(sorted(six.iteritems(params))))
+
+            with self._lock:
+                promise = self._inflight.get(flight)
+                leader  = promise is None
+                if leader:
+                    promise = self._inflight[flight] = async.Promise(None)
+
+            if not leader:
+                return promise if self.async else promise.wait(timeout)
+        else:
+            promise = async.Promise(None)
+
+        def land():
+            with self._lock:
+                self._inflight.pop(flight, None)
+
+        def resolve(result):
+            if store is not None:
+                store.put(path, result, generation)
+            if flight is not None:
+                land()
+            promise.resolve(result)
+
+        def reject(error):
+            if flight is not None:
+                land()
+            promise.reject(error)
+
+        if metrics.hooks:
+            metrics.emit('enqueue', packet)
+
         # No worker is available, the client has direct ownership of the backend, simply
         # sending the request in blocking mode.
         if worker is None:
-            return backend.send(packet, timeout=timeout)
+            try:
+                result = backend.send(packet, timeout=timeout)
+            except Exception as e:
+                if metrics.hooks:
+                    metrics.emit('response', packet, getattr(e, 'status', 500), time.time() - start)
+                reject(e)
+                raise
+            if metrics.hooks:
+                metrics.emit('response', packet, 200, time.time() - start)
+            resolve(result)
+            return result
 
         # When a worker is available we schedule the request to be executed
         # asynchronously.
-        promise = async.Promise(None)
         with self._lock:
-            req = self._pending.store(packet, expire, promise.resolve, promise.reject)
-            worker.schedule(None, lambda: req)
+            req = self._pending.store(packet, expire, resolve, reject, start)
+            # Requests that don't fit in the window are sent when responses to the
+            # ones in flight free some room.
+            if self._window is None or self._window.acquire(req, start):
+                worker.schedule(None, lambda: req)
 
         # If the client is configured for asynchronous operations we simply
         # return the promise.
@@ -249,6 +342,104 @@ class BaseClient(events.Emitter):
         # for the promise to be resolved.
         return promise.wait(timeout)
 
+    def _request_many(self, requests, concurrency=None):
+        # Sends the operations of a batch, `requests` is a list of (operation, path,
+        # params, payload, promise) tuples and each promise gets resolved with the
+        # result of its operation.
+        with self._lock:
+            if not self._running:
+                raise RuntimeError("submitting request to closed client")
+            worker = self._worker
+
+        if concurrency is None:
+            concurrency = self._pool_size
+
+        # WebSocket connections pipeline requests, the whole batch is stored while
+        # holding the lock once and handed to the worker as a single job, which
+        # writes the packets in bursts.
+        if worker is not None and self._url.scheme in ('ws', 'wss'):
+            start   = time.time()
+            expire  = start + self._request_timeout
+            pending = [ ]
+
+            with self._lock:
+                for operation, path, params, payload, promise in requests:
+                    path   = [six.text_type(x) for x in path]
+                    packet = fmp.Packet(operation, 0, self._idseq, path, params or { }, payload)
+                    self._idseq += 1
+                    pending.append(self._pending.store(packet, expire, promise.resolve, promise.reject, start))
+
+                if self._window is not None:
+                    burst = [req for req in pending if self._window.acquire(req, start)]
+                else:
+                    burst = pending
+
+                if burst:
+                    worker.schedule(None, lambda: burst)
+
+            if metrics.hooks:
+                for req in pending:
+                    metrics.emit('enqueue', req.packet)
+            return
+
+        # Each HTTP request holds a connection until it completes, operations are
+        # run by a pool of `concurrency` threads so they only get submitted (and
+        # their timeout starts) when a connection is available. Pools are kept for
+        # the next batches, their threads exit after being idle for as long as the
+        # connections of the client.
+        with self._lock:
+            pool = self._batch_pools.get(concurrency)
+            if pool is None:
+                pool = self._batch_pools[concurrency] = async.WorkerPool(concurrency, idle_timeout=self._pool_timeout)
+
+        for operation, path, params, payload, promise in requests:
+            pool.schedule(promise, self._request_wait, operation, path, params, payload)
+
+    def _request_wait(self, operation, path, params=None, payload=None):
+        result = self._request(operation, path, params, payload)
+        if self.async:
+            result = result.wait(self._request_timeout)
+        return result
+
+    def _iter_pages(self, path, params=None, start=None, stop=None, page_size=100, prefetch=True):
+        # Generator walking a collection paginated by id, from `start` (or the most
+        # recent element) back to `stop` (excluded). The next page is requested
+        # before the elements of the current one are yielded, so at most two pages
+        # are held in memory. Without prefetching the next page is only requested
+        # once the current one was consumed, callers running many iterations at
+        # once use it to keep a single request in flight per iteration.
+        def fetch(offset):
+            query = dict(params or { }, limit=page_size)
+            if offset is not None:
+                query['offset'] = offset
+            if not prefetch:
+                return lambda: self._request_wait(fmp.READ, path, query)
+            return async.Promise(self._request_wait, fmp.READ, path, query).wait
+
+        offset = start
+        page   = fetch(offset)
+
+        while page is not None:
+            items = page()
+            page  = None
+
+            if not items:
+                break
+
+            # Pages go from the offset towards older elements, the next one starts
+            # below the lowest id of this one. A page that doesn't move the cursor
+            # ends the iteration instead of looping forever.
+            lowest = min(item.id for item in items)
+
+            if lowest > 1 and (offset is None or lowest <= offset) and (stop is None or (lowest - 1) > stop):
+                offset = lowest - 1
+                page   = fetch(offset)
+
+            for item in items:
+                if stop is not None and item.id <= stop:
+                    continue
+                yield item
+
     def _upload(self, url, params=None, content=None, content_length=None, content_type=None, content_encoding=None, timeout=None, emitter=None):
         uploader = Uploader(
             url              = url,
@@ -284,18 +475,30 @@ class BaseClient(events.Emitter):
 
     def _pulse(self):
         now = time.time()
-        exp = [ ]
 
-        # Every second the pulse method gets called and the client checks for expired
-        # requests.
+        # Every pulse the client checks for expired requests, the request store
+        # keeps them ordered by expiration time so only the requests that timed
+        # out are visited while holding the lock.
         with self._lock:
-            for req in self._pending:
-                if req.expire <= now:
-                    exp.append(req)
-            for req in exp:
-                log.debug("request with packet id %s timed out", req.packet.id)
-                self._pending.load(req.packet)
-                self._worker.schedule(None, req.timeout)
+            exp    = self._pending.expire(now)
+            worker = self._worker
+            ready  = [ ]
+
+            if self._window is not None:
+                for req in exp:
+                    ready.extend(self._window.expire(req, now))
+
+        if worker is None:
+            return
+
+        for req in exp:
+            log.debug("request with packet id %s timed out", req.packet.id)
+            if metrics.hooks:
+                metrics.emit('timeout', req.packet, now - req.start)
+            worker.schedule(None, req.timeout)
+
+        if ready:
+            worker.schedule(None, lambda: ready)
 
     def _run(self, jobs, authenticator, version):
         # This method is executed by the asynchronous worker when once is started,
@@ -335,28 +538,45 @@ class BaseClient(events.Emitter):
         backend = None
         session = None
         delay   = 0
+        retry   = False
 
-        def incr_delay(delay):
-            return min(15, max(1, 2 * delay))
+        def incr_delay(delay, error):
+            delay = min(15, max(1, 2 * delay))
+            if metrics.hooks:
+                metrics.emit('backoff', delay, error)
+            return delay
 
         def on_open():
+            # Signals may have been missed while the client was disconnected, cached
+            # results can't be trusted anymore.
+            if self._cache is not None:
+                self._cache.clear()
             jobs.push(self.emit, 'connect')
 
         def on_close(code, reason):
             jobs.push(self.emit, 'disconnect')
 
         def on_signal(packet):
-            if packet.type == fmp.UPDATE:
-                jobs.push(self.emit, 'update', model.build(packet.path, packet.payload))
-                return
-            if packet.type == fmp.DELETE:
-                jobs.push(self.emit, 'delete', model.build(packet.path, packet.payload))
-                return
+            signal = self._route_signal(packet)
+            if signal is not None:
+                jobs.push(self._dispatch_signal, *signal)
 
         def on_response(packet):
+            now    = time.time()
+            status = 200 if packet.type == fmp.OK else packet.payload.status
+            ready  = None
+
             with self._lock:
                 req = self._pending.load(packet)
+                if req is not None and self._window is not None:
+                    ready = self._window.release(req, status, now)
+
+            if ready:
+                jobs.push(lambda: ready)
+
             if req is not None:
+                if metrics.hooks:
+                    metrics.emit('response', req.packet, status, now - req.start)
                 if packet.type == fmp.OK:
                     jobs.push(req.resolve, packet.payload)
                 else:
@@ -372,6 +592,32 @@ class BaseClient(events.Emitter):
             else:
                 on_response(packet)
 
+        def fail(req, error):
+            # Requests that fail without a response from the server still complete,
+            # hooks tracking requests in flight must hear about them.
+            if metrics.hooks:
+                metrics.emit('response', req.packet, getattr(error, 'status', 500), time.time() - req.start)
+            req.reject(error)
+
+        def reject(failed):
+            # Rejects the requests of packets that the backend refused to send (for
+            # example because their payload couldn't be encoded), the connection
+            # remains usable.
+            ready = [ ]
+            with self._lock:
+                reqs = [(self._pending.load(packet), error) for packet, error in failed]
+                if self._window is not None:
+                    now = time.time()
+                    for req, _ in reqs:
+                        if req is not None:
+                            ready.extend(self._window.cancel(req, now))
+            if ready:
+                jobs.push(lambda: ready)
+            for req, error in reqs:
+                log.error("failed to send request: %s", error)
+                if req is not None:
+                    fail(req, error)
+
         while self._version_match(version):
             # On the first pass delay is zero so this call returns immediately.
             # The delay gets increased if authenticating or connecting fails.
@@ -380,11 +626,16 @@ class BaseClient(events.Emitter):
                     return
                 time.sleep(1)
 
+            # Every pass but the first one is an attempt to reconnect.
+            if retry and metrics.hooks:
+                metrics.emit('reconnect', delay)
+            retry = True
+
             # 1. Authentication
             try:
                 session = authenticator()
             except Exception as e:
-                delay = incr_delay(delay)
+                delay = incr_delay(delay, e)
                 log.exception(e)
                 self.emit('error', e)
                 continue
@@ -392,13 +643,13 @@ class BaseClient(events.Emitter):
 
             # 2. Connection
             try:
-                backend = self._BackendClass(self._address, session)
+                backend = self._BackendClass(self._address, session, **self._backend_options)
                 backend.on('open', on_open)
                 backend.on('close', on_close)
                 backend.on('packet', on_packet)
                 backend.open(timeout=self._connect_timeout, async=True)
             except Exception as e:
-                delay = incr_delay(delay)
+                delay = incr_delay(delay, e)
                 log.exception(e)
                 self.emit('error', e)
                 continue
@@ -412,9 +663,13 @@ class BaseClient(events.Emitter):
                     backend.remove_event_listeners(None, on_open, on_close, on_packet)
                     backend.close(None, None)
                     return
-                for req in self._pending:
-                    packet = req.packet
-                    jobs.push(lambda: req)
+                # Requests still queued in the window haven't been sent yet, they
+                # are sent when the window has room for them.
+                pending = list(self._pending)
+                if self._window is not None:
+                    pending = self._window.resend(pending, time.time())
+                for req in pending:
+                    jobs.push(lambda req=req: req)
 
             # 4. Process new jobs
             for job in jobs:
@@ -426,19 +681,13 @@ class BaseClient(events.Emitter):
                 if isinstance(todo, fmp.Request):
                     req = todo
                     try:
-                        packet = copy(req.packet)
-
-                        if packet.seed == 0:
-                            req.packet.seed = session.info.seed
-
-                        elif packet.seed == session.info.seed:
-                            packet = copy(packet)
-                            packet.seed = 0
-
+                        packet = prepare_packet(req.packet, session.info.seed)
                         log.debug("sending pending %s", packet)
                         backend.send(packet, timeout=self._request_timeout)
+                    except errors.Error as e:
+                        reject([(packet, e)])
                     except Exception as e:
-                        delay = incr_delay(delay)
+                        delay = incr_delay(delay, e)
                         log.exception(e)
 
                         # Something went wrong while submitting the request, we must reject
@@ -446,11 +695,35 @@ class BaseClient(events.Emitter):
                         with self._lock:
                             req = self._pending.load(packet)
                         if req is not None:
-                            req.reject(e)
+                            fail(req, e)
 
                         self.emit('error', e)
                         break
 
+                elif isinstance(todo, list):
+                    # The requests of a batch are sent with a single call to the
+                    # backend.
+                    packets = [prepare_packet(req.packet, session.info.seed) for req in todo]
+                    try:
+                        failed = backend.send_many(packets, timeout=self._request_timeout)
+                    except Exception as e:
+                        delay = incr_delay(delay, e)
+                        log.exception(e)
+
+                        with self._lock:
+                            reqs = [self._pending.load(packet) for packet in packets]
+                        for req in reqs:
+                            if req is not None:
+                                fail(req, e)
+
+                        self.emit('error', e)
+                        break
+
+                    # Backends return the packets they refused to send, only the
+                    # requests they belong to are rejected.
+                    if failed:
+                        reject(failed)
+
                 elif isinstance(todo, Uploader):
                     uploader = todo
                     uploader.headers = backend.headers
@@ -464,7 +737,7 @@ class BaseClient(events.Emitter):
 
                 if not backend.opened:
                     backend = None
-                    delay = incr_delay(delay)
+                    delay = incr_delay(delay, None)
                     break
 
             # If the backend is still available then we existed the job processing
@@ -488,20 +761,77 @@ class BaseClient(events.Emitter):
                 return
             exp = [req for req in self._pending]
             self._pending.clear()
+            if self._window is not None:
+                self._window.clear()
+
+        now = time.time()
 
         for req in exp:
+            if metrics.hooks:
+                metrics.emit('response', req.packet, 500, now - req.start)
             req.cancel()
 
+        self._close_pool()
         self.emit('close')
 
+    def _route_signal(self, packet):
+        # Updates the cache with a signal and returns the event name, event object
+        # and subscriptions that it must be dispatched to, or None when nothing
+        # listens to it so the event object doesn't get built. On typed clients
+        # the payload is only loaded as models if it's going to be used.
+        if packet.type == fmp.UPDATE:
+            name = 'update'
+        elif packet.type == fmp.DELETE:
+            name = 'delete'
+        else:
+            name = None
+
+        routes   = () if name is None else self._routes.match(packet.path)
+        listened = name is not None and (routes or self.listeners(name))
+
+        if not listened and self._cache is None:
+            return None
+
+        if self._models:
+            fmp.load(packet)
+
+        if self._cache is not None:
+            self._cache.signal(packet.type, packet.path, packet.payload)
+
+        if not listened:
+            return None
+
+        return name, model.build(packet.path, packet.payload, self._models), routes
+
+    def _dispatch_signal(self, name, event, routes):
+        self.emit(name, event)
+
+        for callback in routes:
+            try:
+                callback(name, event)
+            except Exception as e:
+                log.exception(e)
+
+    def _close_pool(self):
+        pool = self._backend_options.get('pool')
+        if pool is not None:
+            pool.close()
+
+        # This method may be called while holding the lock, the pools are swapped
+        # without taking it.
+        pools, self._batch_pools = self._batch_pools, { }
+
+        for pool in pools.values():
+            pool.stop()
+
     def _version_match(self, version):
         with self._lock:
             return version == self._version
 
 class EventIterator(events.Iterator):
 
-    def __init__(self, client):
-        events.Iterator.__init__(self, client, 'open', 'close', 'connect', 'disconnect', 'authenticate', 'update', 'delete')
+    def __init__(self, client, **options):
+        events.Iterator.__init__(self, client, 'open', 'close', 'connect', 'disconnect', 'authenticate', 'update', 'delete', **options)
 
     def __iter__(self):
         for name, args, kwargs in events.Iterator.__iter__(self):
@@ -513,6 +843,117 @@ class EventIterator(events.Iterator):
         for _ in events.Iterator.__iter__(self):
             pass
 
+    def batches(self, size=100, timeout=None):
+        for batch in events.Iterator.batches(self, size, timeout):
+            names = [name for name, _, _ in batch]
+            if 'close' in names:
+                yield batch[:names.index('close') + 1]
+                self.stop()
+                break
+            yield batch
+
+        for _ in events.Iterator.batches(self, size):
+            pass
+
+class Batch(object):
+    """
+    Collects operations on a client to send them together, see `Client.batch`.
+
+    The batch exposes the `create_*`, `read_*`, `update_*` and `delete_*`
+    methods of the client, calling one of them records the operation and
+    returns a promise resolved with its result once the batch was sent.
+    """
+
+    def __init__(self, client, concurrency=None):
+        self.client      = client
+        self.concurrency = concurrency
+        self.requests    = [ ]
+        self.sent        = False
+
+        # Operations run the client's methods on a copy of the client whose
+        # _request method records them, they have access to the same members as
+        # on the client.
+        self.view = copy(client)
+        self.view._request = self._request
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, type, value, traceback):
+        if type is None:
+            self.send()
+
+    def __len__(self):
+        return len(self.requests)
+
+    def __getattr__(self, name):
+        # Only the methods listed by the client can be batched, the others may send
+        # requests in other ways or need their result right away.
+        if name not in getattr(self.client, 'batch_operations', ()):
+            raise AttributeError("%s isn't an operation that can be batched" % name)
+        return getattr(self.view, name)
+
+    def _request(self, operation, path, params=None, payload=None):
+        if self.sent:
+            raise RuntimeError("adding operation to a batch that was already sent")
+        promise = async.Promise(None)
+        self.requests.append((operation, path, params, payload, promise))
+        return promise
+
+    def send(self):
+        if self.sent:
+            return
+        self.sent = True
+        self.client._request_many(self.requests, self.concurrency)
+
+    def results(self, timeout=None):
+        """
+        Waits for all operations to complete and returns a list of (result, error)
+        tuples in the order the operations were added to the batch.
+        """
+        self.send()
+        return [unwrap(promise, timeout) for _, _, _, _, promise in self.requests]
+
+    def as_completed(self, timeout=None):
+        """
+        Generator yielding (index, result, error) tuples as the operations of the
+        batch complete, `index` is the position of the operation in the batch.
+        """
+        self.send()
+        done = queue.Queue()
+
+        def callback(index):
+            return (
+                lambda result: done.put((index, result, None)),
+                lambda error: done.put((index, None, error)),
+            )
+
+        for index, (_, _, _, _, promise) in enumerate(self.requests):
+            promise.then(*callback(index))
+
+        for _ in self.requests:
+            yield done.get(timeout=timeout)
+
+def prepare_packet(packet, seed):
+    # Returns the packet to put on the wire for a request, requests are sent
+    # with a zero seed unless they are retried on a new session, then they carry
+    # the seed of the session they were first sent on.
+    sent = copy(packet)
+
+    if packet.seed == 0:
+        packet.seed = seed
+
+    elif packet.seed == seed:
+        sent.seed = 0
+
+    return sent
+
+def unwrap(promise, timeout=None):
+    try:
+        return promise.wait(timeout), None
+    except Exception as e:
+        return None, e
+
 class Uploader(object):
 
     def __init__(self, url=None, params=None, content=None, content_length=None, content_type=None, content_encoding=None, emitter=None, headers=None, timeout=None, promise=None):
@@ -539,6 +980,7 @@ class Uploader(object):
         if self.content_encoding is not None:
             headers['Content-Encoding'] = self.content_encoding
 
+        import requests
         try:
             response = requests.put(
                 url     = urlunparse(self.url),
@@ -583,8 +1025,11 @@ class FileProgressUpload(object):
         self.emitter = emitter
 
     def read(self, size):
-        data = self.fileobj.read(size)
+        return self.progress(self.fileobj.read(size))
 
+    def progress(self, data):
+        # Accounts for a chunk of data read from the file object, asyncio clients
+        # read it in an executor and call this method from the event loop.
         if self.emitter is not None:
             if len(data) == 0:
                 if self.upload == 0:
@@ -0,0 +1,234 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import io
+import os
+import six
+
+from . import async
+from . import fmp
+from . import logger as log
+from .util import JsonEncoder
+
+__all__ = [
+    'Sink',
+    'CallbackSink',
+    'NDJSONSink',
+    'crawl',
+]
+
+class Sink(object):
+    """
+    Destination of the messages read by `crawl`.
+
+    Each room is crawled by a single thread, `start`, `write` and `finish` are
+    called in this order for a room and `write` gets its messages from the most
+    recent to the oldest one. Different rooms are crawled concurrently, so the
+    methods may be called from multiple threads at once for different rooms.
+    """
+
+    def start(self, room_id):
+        pass
+
+    def write(self, room_id, message):
+        pass
+
+    def finish(self, room_id, error):
+        pass
+
+class CallbackSink(Sink):
+    """
+    Sink passing every message to `callback(room_id, message)`.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def write(self, room_id, message):
+        self.callback(room_id, message)
+
+class NDJSONSink(Sink):
+    """
+    Sink writing the messages of each room to `<room_id>.ndjson` in `directory`,
+    one JSON object per line.
+
+    Messages are written to `<room_id>.ndjson.part` first, the file is renamed
+    when the room was fully crawled so an interrupted export never leaves a
+    truncated file that looks complete.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.encoder   = JsonEncoder()
+        self.files     = { }
+
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+
+    def path(self, room_id):
+        return os.path.join(self.directory, '%s.ndjson' % room_id)
+
+    def start(self, room_id):
+        self.files[room_id] = io.open(self.path(room_id) + '.part', 'w', encoding='utf-8')
+
+    def write(self, room_id, message):
+        self.files[room_id].write(six.text_type(self.encoder.encode(message)) + '\n')
+
+    def finish(self, room_id, error):
+        path = self.path(room_id)
+        file = self.files.pop(room_id, None)
+
+        if file is None:
+            return
+
+        file.close()
+
+        if error is None:
+            os.rename(path + '.part', path)
+
+def crawl(client, sink, rooms=None, concurrency=8, page_size=100, **params):
+    """
+    Reads the message history of many rooms concurrently.
+
+    Rooms are crawled by a pool of `concurrency` threads, each thread walks the
+    history of one room at a time and waits for a page to be consumed by the
+    sink before requesting the next one, so there are never more than
+    `concurrency` requests in flight. The history of every room is passed to
+    the sink in order, from the most recent to the oldest message.
+
+    **Arguments**
+
+    - `client (frankly.Client)`  
+    An opened client, either synchronous or asynchronous.
+
+    - `sink (Sink or callable)`  
+    Where the messages are sent, a callable is wrapped in a `CallbackSink`.
+
+    - `rooms (list)`  
+    The ids of the rooms to crawl, defaults to every room of the app.
+
+    - `concurrency (int)`  
+    How many rooms are crawled at the same time.
+
+    - `page_size (int)`  
+    How many messages are requested per call to the API.
+
+    Other keyword arguments are passed as query parameters to every request.
+
+    **Return**
+
+    The function returns a dict mapping each room id to a `(count, error)`
+    tuple, where `count` is the number of messages passed to the sink and
+    `error` is the exception that interrupted the crawl of the room, or None.
+    A room failing doesn't stop the crawl of the others.
+    """
+    if concurrency <= 0:
+        raise ValueError("concurrency must be a positive value")
+
+    if page_size <= 0:
+        raise ValueError("page size must be a positive value")
+
+    if not isinstance(sink, Sink):
+        if not callable(sink):
+            raise TypeError("sink must be a frankly.crawler.Sink or a callable but %s was found" % type(sink))
+        sink = CallbackSink(sink)
+
+    if rooms is None:
+        rooms = [room.id for room in client._request_wait(fmp.READ, ('rooms',))]
+
+    def crawl_room(room_id):
+        return room_id, crawl_room_messages(client, sink, room_id, page_size, params)
+
+    # The pool is waited for even if the crawl is interrupted, so no thread is
+    # still writing to the sink after crawl returns.
+    pool = async.WorkerPool(concurrency)
+    try:
+        return dict(pool.map(crawl_room, rooms))
+    finally:
+        pool.shutdown(wait=True)
+
+def crawl_room_messages(client, sink, room_id, page_size, params):
+    count = 0
+    error = None
+    pages = client._iter_pages(('rooms', room_id, 'messages'), params, page_size=page_size, prefetch=False)
+
+    try:
+        sink.start(room_id)
+        for message in pages:
+            sink.write(room_id, message)
+            count += 1
+    except Exception as e:
+        log.exception(e)
+        error = e
+
+    # The sink is always given a chance to clean up, even if it failed to start,
+    # and a room that couldn't be finished is reported as failed.
+    try:
+        sink.finish(room_id, error)
+    except Exception as e:
+        log.exception(e)
+        if error is None:
+            error = e
+
+    return count, error
+
+def main(address, app_key, app_secret, output, rooms=None, concurrency=8, page_size=100):
+    """
+    Exports the messages of an app to NDJSON files, one per room.
+    """
+    import frankly
+
+    with frankly.Client(address) as client:
+        client.open(app_key, app_secret)
+        results = crawl(client, NDJSONSink(output), rooms, concurrency, page_size)
+
+    failed = 0
+    total  = 0
+
+    for room_id, (count, error) in sorted(results.items()):
+        total += count
+        if error is not None:
+            failed += 1
+            print('room', room_id, 'failed after', count, 'messages:', error)
+
+    print('exported', total, 'messages from', len(results) - failed, 'of', len(results), 'rooms to', output)
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(description='Exports the message history of a Frankly app to NDJSON files.')
+    parser.add_argument('address', help='address of the Frankly API')
+    parser.add_argument('--app-key', required=True)
+    parser.add_argument('--app-secret', required=True)
+    parser.add_argument('--output', default='.', help='directory where <room_id>.ndjson files are written')
+    parser.add_argument('--room', default=None, type=int, action='append', dest='rooms', help='id of a room to export (repeatable), defaults to all rooms')
+    parser.add_argument('--concurrency', default=8, type=int, help='number of rooms exported at the same time')
+    parser.add_argument('--page-size', default=100, type=int, help='number of messages per request')
+    args = parser.parse_args()
+    sys.exit(main(args.address, args.app_key, args.app_secret, args.output, args.rooms, args.concurrency, args.page_size))
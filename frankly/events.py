@@ -26,24 +26,36 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from collections import deque
 from six.moves import queue
 
 import six
 import threading
+import time
 
 from . import logger as log
+from . import util
 
 __all__ = [
+    'EventQueue',
     'Iterator',
     'Emitter',
     'Listener',
+    'Router',
 ]
 
 class Emitter(object):
 
     def __init__(self, logger=None):
-        self._events_cblist = { }
-        self._events_lock   = threading.Lock()
+        # Listeners are stored in tuples that are never modified, adding or removing
+        # a listener swaps the tuple (while holding the lock) so emit can read them
+        # without locking or copying. Names of events that have once-listeners are
+        # tracked separately so emit only takes the lock when some must be removed,
+        # otherwise it calls the persistent callbacks from `_events_callbacks`.
+        self._events_cblist    = { }
+        self._events_callbacks = { }
+        self._events_once      = set()
+        self._events_lock      = threading.Lock()
 
     def on(self, name, *callbacks):
         return self.add_event_listeners(name, *callbacks, once=False)
@@ -52,49 +64,102 @@ class Emitter(object):
         return self.add_event_listeners(name, *callbacks, once=True)
 
     def emit(self, name, *args, **kwargs):
-        cblist = None
-        log.debug("emitting %s event from %s", name, self)
-
-        with self._events_lock:
-            try:
-                cblist = self._events_cblist[name]
-            except KeyError:
-                return
-            self._events_cblist[name] = [x for x in cblist if not x.once]
-
-        for cb in cblist:
+        callbacks = self._events_callbacks.get(name, ())
+
+        # Once-listeners are only called by the emit that removes them while
+        # holding the lock, so concurrent calls never run them twice.
+        if name in self._events_once:
+            with self._events_lock:
+                cblist = self._events_cblist.get(name, ())
+                self._events_once.discard(name)
+                self._set_event_listeners(name, tuple(x for x in cblist if not x.once))
+            callbacks = tuple(x.callback for x in cblist)
+
+        for cb in callbacks:
             try:
                 cb(*args, **kwargs)
             except Exception as e:
                 log.exception(e)
 
+    def listeners(self, name):
+        return self._events_cblist.get(name, ())
+
     def add_event_listeners(self, name, *callbacks, **kwargs):
         once = bool(kwargs.get('once'))
-        listeners = [Listener(cb, once) for cb in callbacks]
+        listeners = tuple(Listener(cb, once) for cb in callbacks)
 
         with self._events_lock:
-            for listener in listeners:
-                try:
-                    self._events_cblist[name].append(listener)
-                except KeyError:
-                    self._events_cblist[name] = [listener]
+            self._set_event_listeners(name, self._events_cblist.get(name, ()) + listeners)
+            if once and listeners:
+                self._events_once.add(name)
 
     def remove_event_listeners(self, name, *callbacks):
-        def remove(name, listeners):
-            try:
-                cblist = self._events_cblist[name]
-                self._events_cblist[name] = [x for x in cblist if x not in listeners]
-            except KeyError:
-                pass
-
-        listeners = [Listener(cb) for cb in callbacks]
+        def remove(name):
+            cblist = self._events_cblist.get(name, ())
+            self._set_event_listeners(name, tuple(x for x in cblist if x.callback not in callbacks))
 
         with self._events_lock:
             if name is not None:
-                remove(name, listeners)
+                remove(name)
             else:
-                for name in list(six.iterkeys(self._events_cblist)):
-                    remove(name, listeners)
+                for name in list(self._events_cblist):
+                    remove(name)
+
+    def _set_event_listeners(self, name, cblist):
+        if cblist:
+            self._events_cblist[name]    = cblist
+            self._events_callbacks[name] = tuple(x.callback for x in cblist if not x.once)
+        else:
+            self._events_cblist.pop(name, None)
+            self._events_callbacks.pop(name, None)
+            self._events_once.discard(name)
+
+class Router(object):
+    """
+    Index of callbacks keyed by path patterns, where None matches any path
+    segment.
+
+    Patterns are indexed in tables built by `util.pattern_table`, they are
+    rebuilt and swapped when routes are added or removed so lookups don't take
+    any lock.
+    """
+
+    def __init__(self):
+        self.lock   = threading.Lock()
+        self.routes = ()
+        self.tables = { }
+
+    def __len__(self):
+        return len(self.routes)
+
+    def add(self, pattern, callback):
+        with self.lock:
+            self.routes = self.routes + ((make_pattern(pattern), callback),)
+            self.tables = make_tables(self.routes)
+
+    def remove(self, pattern, callback):
+        pattern = make_pattern(pattern)
+        with self.lock:
+            self.routes = tuple(x for x in self.routes if x != (pattern, callback))
+            self.tables = make_tables(self.routes)
+
+    def match(self, path):
+        callbacks = ()
+        for _, getter, table in self.tables.get(len(path), ()):
+            found = table.get(getter(path))
+            if found is not None:
+                callbacks += found
+        return callbacks
+
+def make_pattern(pattern):
+    return tuple(None if x is None else six.text_type(x) for x in pattern)
+
+def make_tables(routes):
+    tables = { }
+    for pattern, callback in routes:
+        table, key = util.pattern_table(tables, pattern)
+        table[key] = table.get(key, ()) + (callback,)
+    return tables
 
 class Listener(object):
 
@@ -111,12 +176,146 @@ class Listener(object):
     def __ne__(self, other):
         return not self.__eq__(other)
 
+OVERFLOW_POLICIES = ('block', 'drop-oldest', 'drop-newest')
+
+class EventQueue(object):
+    """
+    Queue of events with an optional bound on its size.
+
+    When the queue is full `overflow` decides what happens to new events:
+    `'drop-oldest'` (the default) discards the event at the head of the queue,
+    `'drop-newest'` discards the incoming event and `'block'` makes the
+    producer wait for room. Dropped events are counted in `dropped`, producers
+    that had to wait for room are counted in `blocked`.
+
+    Blocking applies backpressure to the thread emitting the events, on
+    clients it's the thread that also resolves the promises of requests. A
+    consumer that makes a synchronous call on the client while the queue is
+    full waits for a response that can't be delivered until the call times
+    out, `'block'` is only safe if consumers never call the client.
+
+    Closing the queue wakes up producers and consumers, events that were
+    already queued can still be read until the queue is empty.
+    """
+
+    def __init__(self, maxsize=0, overflow='drop-oldest'):
+        if maxsize < 0:
+            raise ValueError("queue size must be a positive value")
+
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("unsupported overflow policy: " + overflow)
+
+        self.maxsize   = maxsize
+        self.overflow  = overflow
+        self.closed    = False
+        self.received  = 0
+        self.dropped   = 0
+        self.blocked   = 0
+        self.items     = deque()
+        self.lock      = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full  = threading.Condition(self.lock)
+
+    def __len__(self):
+        return len(self.items)
+
+    def open(self):
+        with self.lock:
+            self.closed = False
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.not_empty.notify_all()
+            self.not_full.notify_all()
+
+    def put(self, item):
+        with self.lock:
+            if self.closed:
+                self.dropped += 1
+                return False
+
+            self.received += 1
+
+            if self.maxsize and len(self.items) >= self.maxsize:
+                if self.overflow == 'drop-newest':
+                    self.dropped += 1
+                    return False
+
+                if self.overflow == 'drop-oldest':
+                    self.items.popleft()
+                    self.dropped += 1
+
+                else:
+                    self.blocked += 1
+                    while len(self.items) >= self.maxsize and not self.closed:
+                        self.not_full.wait()
+                    if self.closed:
+                        self.dropped += 1
+                        return False
+
+            self.items.append(item)
+            self.not_empty.notify()
+            return True
+
+    def get(self, block=True, timeout=None):
+        batch = self.get_batch(1, block=block, timeout=timeout)
+        if not batch:
+            raise queue.Empty()
+        return batch[0]
+
+    def get_batch(self, size, block=True, timeout=None, linger=None):
+        """
+        Removes up to `size` events from the queue and returns them in a list.
+
+        The method waits for at least one event to be available (unless `block`
+        is False, or for at most `timeout` seconds), then for at most `linger`
+        seconds for the batch to fill up. An empty list is returned if no events
+        were available, or if the queue was closed and is empty.
+        """
+        with self.lock:
+            if block:
+                self._wait(lambda: self.items, timeout)
+
+            if linger and self.items:
+                self._wait(lambda: len(self.items) >= size, linger)
+
+            batch = [ ]
+            while self.items and len(batch) < size:
+                batch.append(self.items.popleft())
+
+            if batch:
+                self.not_full.notify(len(batch))
+            return batch
+
+    def _wait(self, ready, timeout):
+        # Called while holding the lock, returns when `ready` becomes true, the
+        # queue gets closed or the timeout expires.
+        if timeout is None:
+            while not (ready() or self.closed):
+                self.not_empty.wait()
+            return
+
+        expire = time.time() + timeout
+        while not (ready() or self.closed):
+            remaining = expire - time.time()
+            if remaining <= 0:
+                break
+            self.not_empty.wait(remaining)
+
 class Iterator(object):
+    """
+    Collects the events emitted by `emitter` under the given names so they can
+    be consumed by iterating over the object, one at a time or in batches.
 
-    def __init__(self, emitter, *events):
+    The `maxsize` and `overflow` options configure the queue the events are
+    buffered in, see `EventQueue` and the hazard of its `'block'` policy.
+    """
+
+    def __init__(self, emitter, *events, **options):
         self._iter_emitter   = emitter
         self._iter_running   = False
-        self._iter_queue     = queue.Queue()
+        self._iter_queue     = EventQueue(**options)
         self._iter_lock      = threading.Lock()
         self._iter_callbacks = [ ]
 
@@ -135,23 +334,40 @@ class Iterator(object):
 
     def __iter__(self):
         while True:
-            event = self._iter_queue.get()
-            if event is None:
+            batch = self._iter_queue.get_batch(1)
+            if not batch:
                 break
-            yield event
-
-        try:
-            while True:
-                event = self._iter_queue.get_nowait()
-                if event is not None:
-                    yield event
-        except queue.Empty:
-            pass
+            yield batch[0]
+
+    @property
+    def received(self):
+        return self._iter_queue.received
+
+    @property
+    def dropped(self):
+        return self._iter_queue.dropped
+
+    @property
+    def blocked(self):
+        return self._iter_queue.blocked
+
+    def batches(self, size=100, timeout=None):
+        """
+        Generator yielding lists of at most `size` events, a batch is produced
+        as soon as it's full or `timeout` seconds after its first event was
+        available.
+        """
+        while True:
+            batch = self._iter_queue.get_batch(size, linger=timeout)
+            if not batch:
+                break
+            yield batch
 
     def start(self):
         with self._iter_lock:
             if self._iter_running:
                 return
+            self._iter_queue.open()
             for event, callback in self._iter_callbacks:
                 self._iter_emitter.on(event, callback)
             self._iter_running = True
@@ -163,7 +379,14 @@ class Iterator(object):
             for event, callback in self._iter_callbacks:
                 self._iter_emitter.remove_event_listeners(event, callback)
             self._iter_running = False
-        self._iter_queue.put(None)
+        self._iter_queue.close()
 
     def get(self, block=True, timeout=None):
-        return self._iter_queue.get(block=block, timeout=timeout)
+        # Returns None once the iterator was stopped and its events consumed, and
+        # raises queue.Empty if no event was available in time.
+        batch = self._iter_queue.get_batch(1, block=block, timeout=timeout)
+        if batch:
+            return batch[0]
+        if self._iter_queue.closed:
+            return None
+        raise queue.Empty()
@@ -26,12 +26,17 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from datetime import datetime
+
+import heapq
 import msgpack
 import os
 import six
+import threading
 
 from . import util
 from . import errors
+from . import model
 from . import logger as log
 
 __all__ = [
@@ -44,7 +49,9 @@ __all__ = [
     'RequestStore',
     'Request',
     'Packet',
+    'Decoder',
     'encode',
+    'encode_many',
     'decode',
 ]
 
@@ -59,6 +66,10 @@ class RequestStore(object):
 
     def __init__(self):
         self.requests = { }
+        # Min-heap of (expire, id, request) tuples used to find expired requests
+        # without scanning the whole store, entries for requests that were loaded
+        # before expiring are discarded lazily.
+        self.expiry   = [ ]
 
     def __iter__(self):
         for _, req in six.iteritems(self.requests):
@@ -73,22 +84,33 @@ class RequestStore(object):
         except KeyError:
             return None
         del self.requests[packet.id]
+
+        # Rebuild the heap when it's mostly made of stale entries so memory usage
+        # stays proportional to the number of pending requests.
+        if len(self.expiry) > 64 and len(self.expiry) > (2 * len(self.requests)):
+            self.expiry = [x for x in self.expiry if self.requests.get(x[1]) is x[2]]
+            heapq.heapify(self.expiry)
         return req
 
-    def store(self, packet, expire, resolve, reject):
-        req = Request(packet, expire, resolve, reject)
+    def store(self, packet, expire, resolve, reject, start=None):
+        req = Request(packet, expire, resolve, reject, start)
         self.requests[packet.id] = req
+        heapq.heappush(self.expiry, (expire, packet.id, req))
         return req
 
-    def timeout(self, now):
+    def expire(self, now):
         expired = [ ]
 
-        for _, req in six.iteritems(self.requests):
-            if req.expire <= now:
+        while self.expiry and self.expiry[0][0] <= now:
+            _, id, req = heapq.heappop(self.expiry)
+            if self.requests.get(id) is req:
+                del self.requests[id]
                 expired.append(req)
 
-        for req in expired:
-            del self.requests[req.packet.id]
+        return expired
+
+    def timeout(self, now):
+        expired = self.expire(now)
 
         for req in expired:
             try:
@@ -98,6 +120,7 @@ class RequestStore(object):
 
     def cancel(self):
         requests, self.requests = self.requests, { }
+        self.expiry = [ ]
 
         for _, req in six.iteritems(requests):
             try:
@@ -107,14 +130,17 @@ class RequestStore(object):
 
     def clear(self):
         self.requests = { }
+        self.expiry   = [ ]
 
 class Request(object):
 
-    def __init__(self, packet, expire, resolve, reject):
+    def __init__(self, packet, expire, resolve, reject, start=None):
         self.packet  = packet
         self.expire  = expire
         self.resolve = resolve
         self.reject  = reject
+        self.start   = start
+        self.sent    = start
 
     def timeout(self):
         self.reject(errors.Error(self.packet.operation, self.packet.path, 408, "the request timed out"))
@@ -172,7 +198,25 @@ class Packet(object):
         return type_string(self.type)
 
 def encode(packet):
-    packer = msgpack.Packer(autoreset=False, encoding='utf-8')
+    packer = get_packer()
+    try:
+        pack(packer, packet)
+        return packer.bytes()
+    finally:
+        packer.reset()
+
+def encode_many(packets):
+    # All packets are written back to back in the same buffer, the result can
+    # be decoded with a single fmp.Decoder.
+    packer = get_packer()
+    try:
+        for packet in packets:
+            pack(packer, packet)
+        return packer.bytes()
+    finally:
+        packer.reset()
+
+def pack(packer, packet):
     properties = int(packet.type) | (1 << 4)
 
     if packet.seed:
@@ -192,25 +236,97 @@ def encode(packet):
     packer.pack(packet.path)
     packer.pack(packet.params)
     packer.pack(packet.payload)
-    return packer.bytes()
+
+def get_packer():
+    # Packers are not thread-safe, each thread gets its own instance which is
+    # reused for every packet it encodes.
+    try:
+        return local.packer
+    except AttributeError:
+        local.packer = msgpack.Packer(autoreset=False, encoding='utf-8', default=pack_default)
+        return local.packer
+
+def pack_default(obj):
+    # Called by the packer for objects that msgpack doesn't support, models (and
+    # the dates they hold) are sent the way the API returned them.
+    if isinstance(obj, model.Model):
+        return dict(obj)
+
+    if isinstance(obj, datetime):
+        return util.format_date(obj)
+
+    raise TypeError("can not serialize %r object" % type(obj).__name__)
+
+local = threading.local()
 
 def decode(chunk):
-    packet = Packet(0, 0, 0, None, None, None)
-    unpacker = msgpack.Unpacker(six.BytesIO(chunk), encoding='utf-8', object_pairs_hook=util.Object)
-    properties = unpacker.unpack()
+    decoder = Decoder()
+    decoder.feed(chunk)
 
-    packet.type = properties & 0x7
+    for packet in decoder:
+        return packet
 
-    if properties & (1 << 6):
-        packet.seed = unpacker.unpack()
+    raise msgpack.OutOfData("incomplete packet")
 
-    if properties & (1 << 5):
-        packet.id = unpacker.unpack()
+class Decoder(object):
+    """
+    Streaming packet decoder, raw bytes are fed to the decoder and iterating
+    over it yields every complete packet that it received so far.
 
-    packet.path = unpacker.unpack()
-    packet.params = unpacker.unpack()
-    packet.payload = unpacker.unpack()
-    return packet
+    A single decoder is meant to be used for the lifetime of a connection, it
+    handles multiple packets in one chunk as well as packets split across
+    chunks.
+
+    When `models` is True the payloads of responses are loaded as the
+    `frankly.model` classes matching the packet paths. Signals (packets with
+    an id of zero) are left as `model.Pairs`, the client calls `load` once it
+    knows that someone uses them.
+    """
+
+    def __init__(self, models=False):
+        self.unpacker = msgpack.Unpacker(encoding='utf-8', object_pairs_hook=model.Pairs if models else util.Object)
+        self.models   = models
+        self.packet   = None
+        self.fields   = None
+        self.index    = 0
+
+    def __iter__(self):
+        for obj in self.unpacker:
+            packet = self.packet
+
+            if packet is None:
+                self.packet = Packet(obj & 0x7, 0, 0, None, None, None)
+                self.fields = PACKET_FIELDS[(obj >> 5) & 0x3]
+                self.index  = 0
+                continue
+
+            setattr(packet, self.fields[self.index], obj)
+            self.index += 1
+
+            if self.index == len(self.fields):
+                self.packet = None
+                if self.models and packet.id != 0:
+                    load(packet)
+                yield packet
+
+    def feed(self, chunk):
+        self.unpacker.feed(chunk)
+
+def load(packet):
+    # Error responses carry a status and a reason instead of the object at the
+    # packet path.
+    path = None if (packet.id != 0 and packet.type == ERROR) else packet.path
+    packet.params  = model.load(None, packet.params)
+    packet.payload = model.load(path, packet.payload)
+
+# Fields following the properties of a packet, indexed by the id and seed bits
+# of the properties.
+PACKET_FIELDS = (
+    ('path', 'params', 'payload'),
+    ('id', 'path', 'params', 'payload'),
+    ('seed', 'path', 'params', 'payload'),
+    ('seed', 'id', 'path', 'params', 'payload'),
+)
 
 def type_string(t):
     if t == READ:   return 'read'
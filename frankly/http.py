@@ -32,24 +32,28 @@ urlparse = urllib.parse.urlparse
 
 import json
 import os
-import requests
+import threading
+import time
 
 from . import auth
 from . import async
 from . import events
 from . import errors
 from . import fmp
+from . import metrics
+from . import model
 from . import util
 
 __all__ = [
     'Backend',
+    'ConnectionPool',
     'decode_response_payload',
     'encode_request_payload',
 ]
 
 class Backend(events.Emitter):
 
-    def __init__(self, address, session):
+    def __init__(self, address, session, pool=None, models=False):
         events.Emitter.__init__(self)
 
         url = urlparse(address)
@@ -59,6 +63,9 @@ class Backend(events.Emitter):
         self.headers = { 'Accept': 'application/json', 'User-Agent' : auth.USER_AGENT }
         self.workers = None
         self.opened  = False
+        self.pool    = ConnectionPool() if pool is None else pool
+        self.owned   = pool is None
+        self.models  = models
 
         if session.cookies is not None:
             cookie = session.cookies.get('app-token')
@@ -99,7 +106,15 @@ class Backend(events.Emitter):
             self.workers.stop()
             self.workers.join()
 
+        # Connections are only released if the pool was created by the backend,
+        # a shared pool outlives the backend so it can be reused after reconnecting.
+        if self.owned:
+            self.pool.close()
+
     def send(self, packet, timeout=None):
+        if metrics.hooks:
+            metrics.emit('send', packet)
+
         if self.workers is None:
             return self._send(packet, timeout)
 
@@ -116,6 +131,10 @@ class Backend(events.Emitter):
 
         self.workers.schedule(async.Promise(None), self._send, packet, timeout).then(success, failure)
 
+    def send_many(self, packets, timeout=None):
+        for packet in packets:
+            self.send(packet, timeout)
+
     def _send(self, packet, timeout=None):
         try:
             content = None
@@ -124,11 +143,11 @@ class Backend(events.Emitter):
             if packet.payload is not None:
                 content = encode_request_payload(packet.payload)
                 headers.update({
-                    'Content-Length' : len(content),
+                    'Content-Length' : str(len(content)),
                     'Content-Type'   : 'application/json',
                 })
 
-            response = requests.request(
+            response = self.pool.request(
                 method  = make_method(packet.type),
                 url     = self.address + '/' + os.path.join(*packet.path),
                 headers = headers,
@@ -143,12 +162,134 @@ class Backend(events.Emitter):
         response.encoding = 'utf-8'
 
         status = response.status_code
-        result = decode_response_payload(response.text)
 
         if status < 200 or status >= 300:
-            raise errors.Error(packet.operation, packet.path, status, result)
+            raise errors.Error(packet.operation, packet.path, status, decode_response_payload(response.text))
+
+        if self.models:
+            return model.loads(packet.path, response.text)
+
+        return decode_response_payload(response.text)
+
+class ConnectionPool(object):
+    """
+    Thread-safe pool of persistent HTTP connections shared by every request
+    submitted through a backend.
+
+    Connections are kept alive between requests and reused across worker
+    threads, up to `size` connections per host. Each connection that stayed
+    idle for more than `idle_timeout` seconds is closed when it's taken out of
+    the pool and reconnected for the next request, a timeout of None keeps
+    idle connections open.
+    """
+
+    def __init__(self, size=10, idle_timeout=60):
+        self.lock         = threading.Lock()
+        self.size         = size
+        self.idle_timeout = idle_timeout
+        self.session      = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def acquire(self):
+        with self.lock:
+            if self.session is None:
+                self.session = make_session(self.size, self.idle_timeout)
+            return self.session
+
+    def release(self):
+        # Idle connections are tracked individually by the connection pools of the
+        # session, there's nothing to do here but the method is kept so callers
+        # can keep pairing it with acquire.
+        pass
+
+    def request(self, **kwargs):
+        session = self.acquire()
+        try:
+            return session.request(**kwargs)
+        finally:
+            self.release()
+
+    def close(self):
+        with self.lock:
+            session, self.session = self.session, None
+        if session is not None:
+            session.close()
 
-        return result
+@async.once
+def make_reject_cookies():
+    # http.cookiejar imports http.client and ssl, it's only loaded when the class
+    # is first needed (see lazy_attributes at the end of the module).
+    from six.moves import http_cookiejar
+
+    class RejectCookies(http_cookiejar.CookiePolicy):
+        # The app-token cookie is set explicitly in the request headers, the pooled
+        # session must not carry cookies from one request or session to another.
+        netscape     = True
+        rfc2965      = False
+        hide_cookie2 = False
+
+        def set_ok(self, cookie, request):
+            return False
+
+        def return_ok(self, cookie, request):
+            return False
+
+        def domain_return_ok(self, domain, request):
+            return False
+
+        def path_return_ok(self, path, request):
+            return False
+
+    RejectCookies.__module__   = __name__
+    RejectCookies.__qualname__ = 'RejectCookies'
+    return RejectCookies
+
+class IdleConnections(object):
+    # Mixed into the urllib3 connection pools of sessions, connections are stamped
+    # when they return to the pool. Sockets that stayed idle for too long are
+    # likely to have been closed by the server or a proxy, they are closed when
+    # taken out of the pool so the request opens a new one instead of failing.
+    idle_timeout = None
+
+    def _get_conn(self, timeout=None):
+        conn = super(IdleConnections, self)._get_conn(timeout)
+        last_used = getattr(conn, 'frankly_last_used', None)
+
+        if last_used is not None and self.idle_timeout is not None and (time.time() - last_used) > self.idle_timeout:
+            conn.close()
+            # Connections tunneled through a proxy can't be opened again.
+            if getattr(conn, 'auto_open', 1) == 0:
+                return self._new_conn()
+
+        return conn
+
+    def _put_conn(self, conn):
+        if conn is not None:
+            conn.frankly_last_used = time.time()
+        super(IdleConnections, self)._put_conn(conn)
+
+def make_pool_classes(idle_timeout):
+    from requests.packages.urllib3 import poolmanager
+    classes = { }
+    for scheme, base in poolmanager.pool_classes_by_scheme.items():
+        classes[scheme] = type(base.__name__, (IdleConnections, base), { 'idle_timeout': idle_timeout })
+    return classes
+
+def make_session(size, idle_timeout=None):
+    import requests
+    import requests.adapters
+    adapter = requests.adapters.HTTPAdapter(pool_connections=size, pool_maxsize=size, pool_block=True)
+    adapter.poolmanager.pool_classes_by_scheme = make_pool_classes(idle_timeout)
+    session = requests.Session()
+    session.cookies.set_policy(make_reject_cookies()())
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
 
 def make_method(type):
     if type == 0: return 'GET'
@@ -164,3 +305,5 @@ def decode_response_payload(payload, default=None):
 
 def encode_request_payload(payload):
     return json.dumps(payload, cls=util.JsonEncoder)
+
+util.lazy_attributes(__name__, RejectCookies=make_reject_cookies)
@@ -0,0 +1,293 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import math
+import threading
+
+from . import logger as log
+
+__all__ = [
+    'Hooks',
+    'Histogram',
+    'Collector',
+    'register',
+    'unregister',
+    'path_template',
+]
+
+# Registered hooks, the tuple is replaced when hooks are added or removed so the
+# instrumented code only has to test it before calling `emit`, which is all it
+# costs when no hooks are registered.
+hooks = ()
+lock  = threading.Lock()
+
+class Hooks(object):
+    """
+    Base class of instrumentation hooks, the methods are called at different
+    points of the life cycle of requests and connections and do nothing by
+    default. Subclasses override the ones they're interested in.
+
+    Hooks are called synchronously on the threads (or event loop) running the
+    client, they should return quickly. Times are expressed in seconds.
+    """
+
+    def enqueue(self, packet):
+        """Called when a client submits a request."""
+
+    def send(self, packet):
+        """Called when a backend sends a request packet."""
+
+    def response(self, packet, status, elapsed):
+        """
+        Called when the response to the request `packet` was received, `status`
+        is 200 on success or the status code of the error.
+        """
+
+    def timeout(self, packet, elapsed):
+        """Called when a request expires without receiving a response."""
+
+    def reconnect(self, delay):
+        """
+        Called when a client tries to connect again after losing its connection
+        or failing to establish it, `delay` is the time it waited before trying.
+        """
+
+    def backoff(self, delay, error):
+        """
+        Called when authenticating, connecting or sending failed with `error`,
+        the client waits `delay` seconds before trying again.
+        """
+
+    def frame_recv(self, opcode, size):
+        """Called when a websocket backend receives a frame."""
+
+    def frame_send(self, opcode, size):
+        """Called when a websocket backend sends a frame."""
+
+def register(hook):
+    global hooks
+    with lock:
+        hooks = hooks + (hook,)
+
+def unregister(hook):
+    global hooks
+    with lock:
+        hooks = tuple(x for x in hooks if x is not hook)
+
+def emit(name, *args):
+    for hook in hooks:
+        try:
+            getattr(hook, name)(*args)
+        except Exception as e:
+            log.exception(e)
+
+def path_template(path):
+    # Numeric segments of a path are object ids, they're replaced so requests to
+    # different objects of the same type get grouped.
+    return '/' + '/'.join(':id' if x.isdigit() else x for x in path)
+
+class Histogram(object):
+    """
+    Histogram of values (durations) stored in buckets of exponentially growing
+    sizes, every bucket covers values up to `growth` times larger than the
+    previous one so percentiles are accurate within this ratio at any scale
+    while the memory used stays proportional to the range of values.
+
+    Values below `resolution` are counted in the first bucket.
+    """
+
+    def __init__(self, resolution=1e-6, growth=1.05):
+        self.resolution = resolution
+        self.growth     = growth
+        self.scale      = 1 / math.log(growth)
+        self.buckets    = { }
+        self.count      = 0
+        self.total      = 0.0
+        self.min        = None
+        self.max        = None
+
+    def __len__(self):
+        return self.count
+
+    def add(self, value):
+        if value <= self.resolution:
+            index = 0
+        else:
+            index = int(math.ceil(math.log(value / self.resolution) * self.scale))
+
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+        if self.min is None or value < self.min:
+            self.min = value
+
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def percentile(self, p):
+        """
+        Returns the value below which `p` percent of the values fall, or None if
+        the histogram is empty.
+        """
+        if not self.count:
+            return None
+
+        rank = max(1, int(math.ceil(self.count * p / 100)))
+        seen = 0
+
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                break
+
+        # The upper bound of the bucket is reported, clamped to the range of the
+        # values actually recorded.
+        return min(max(self.resolution * self.growth ** index, self.min), self.max)
+
+    def summary(self, percentiles=(50, 90, 99)):
+        summary = {
+            'count' : self.count,
+            'mean'  : self.mean(),
+            'min'   : self.min,
+            'max'   : self.max,
+        }
+        for p in percentiles:
+            summary['p%s' % p] = self.percentile(p)
+        return summary
+
+class Collector(Hooks):
+    """
+    Hooks recording request latencies and connection events in memory.
+
+    Latencies are kept in histograms per operation (`'read'`, `'create'`, ...)
+    and per operation and path template (`'read /rooms/:id'`). The collector
+    also counts events and tracks the number of requests in flight.
+
+    Typical use is to register a collector and periodically export its report:
+
+        collector = frankly.metrics.Collector()
+        frankly.metrics.register(collector)
+        ...
+        print(collector.report())
+    """
+
+    COUNTERS = (
+        'requests',
+        'sent',
+        'responses',
+        'errors',
+        'timeouts',
+        'reconnects',
+        'backoffs',
+        'frames_recv',
+        'frames_sent',
+        'bytes_recv',
+        'bytes_sent',
+    )
+
+    def __init__(self, resolution=1e-6, growth=1.05):
+        self.lock       = threading.Lock()
+        self.resolution = resolution
+        self.growth     = growth
+        self.operations = { }
+        self.paths      = { }
+        self.counters   = dict((x, 0) for x in self.COUNTERS)
+        self.inflight   = 0
+
+    def enqueue(self, packet):
+        with self.lock:
+            self.counters['requests'] += 1
+            self.inflight += 1
+
+    def send(self, packet):
+        with self.lock:
+            self.counters['sent'] += 1
+
+    def response(self, packet, status, elapsed):
+        self._complete(packet, elapsed, 'responses' if status < 400 else 'errors')
+
+    def timeout(self, packet, elapsed):
+        self._complete(packet, elapsed, 'timeouts')
+
+    def reconnect(self, delay):
+        with self.lock:
+            self.counters['reconnects'] += 1
+
+    def backoff(self, delay, error):
+        with self.lock:
+            self.counters['backoffs'] += 1
+
+    def frame_recv(self, opcode, size):
+        with self.lock:
+            self.counters['frames_recv'] += 1
+            self.counters['bytes_recv']  += size
+
+    def frame_send(self, opcode, size):
+        with self.lock:
+            self.counters['frames_sent'] += 1
+            self.counters['bytes_sent']  += size
+
+    def report(self):
+        """
+        Returns a dict with the counters, the number of requests in flight and
+        the summaries of the latency histograms.
+        """
+        with self.lock:
+            return {
+                'counters'   : dict(self.counters),
+                'inflight'   : self.inflight,
+                'operations' : dict((k, v.summary()) for k, v in self.operations.items()),
+                'paths'      : dict((k, v.summary()) for k, v in self.paths.items()),
+            }
+
+    def reset(self):
+        with self.lock:
+            self.operations = { }
+            self.paths      = { }
+            self.counters   = dict((x, 0) for x in self.COUNTERS)
+            self.inflight   = 0
+
+    def _complete(self, packet, elapsed, counter):
+        operation = packet.operation
+        path      = operation + ' ' + path_template(packet.path)
+
+        with self.lock:
+            self.counters[counter] += 1
+            self.inflight = max(0, self.inflight - 1)
+            self._histogram(self.operations, operation).add(elapsed)
+            self._histogram(self.paths, path).add(elapsed)
+
+    def _histogram(self, histograms, key):
+        histogram = histograms.get(key)
+        if histogram is None:
+            histogram = histograms[key] = Histogram(self.resolution, self.growth)
+        return histogram
@@ -0,0 +1,566 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+from collections import deque
+from datetime import datetime
+from six.moves import queue
+
+import binascii
+import json
+import jwt
+import os
+import six
+import threading
+import time
+
+from . import async
+from . import errors
+from . import fmp
+from . import logger as log
+from . import util
+from . import websocket
+from .websocket import http
+
+__all__ = [
+    'Server',
+    'serve',
+]
+
+class Server(object):
+    """
+    In-process stand-in for the Frankly API, it speaks the authentication
+    protocol, the JSON REST paths and FMP over WebSocket so clients can be
+    tested and benchmarked without network access.
+
+    Resources are kept in memory, creating, updating or deleting one pushes a
+    signal to every WebSocket client connected to the server.
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency=0, signal_interval=None, signal_path=None, app_key=None, app_secret=None):
+        """
+        **Arguments**
+
+        - `host (str)`  
+        The network interface that the server listens on.
+
+        - `port (int)`  
+        The port that the server listens on, zero picks a random free port.
+
+        - `latency (float)`  
+        Delay in seconds added before sending every response.
+
+        - `signal_interval (float)`  
+        When set, the server pushes a signal to every WebSocket client at this
+        interval (in seconds).
+
+        - `signal_path (list)`  
+        The path of generated signals, each signal carries a new room message
+        in room 1 by default.
+
+        - `app_key (str)`, `app_secret (str)`  
+        When set, clients must authenticate with these credentials, anything
+        is accepted otherwise.
+        """
+        self.host            = host
+        self.port            = port
+        self.latency         = latency
+        self.signal_interval = signal_interval
+        self.signal_path     = ['rooms', '1', 'messages'] if signal_path is None else [six.text_type(x) for x in signal_path]
+        self.app_key         = app_key
+        self.app_secret      = app_secret
+        self.lock            = threading.Lock()
+        self.server          = None
+        self.thread          = None
+        self.timer           = None
+        self.sockets         = set()
+        self.sessions        = { }
+        self.objects         = { }
+        self.collections     = { }
+        self.idseq           = 1
+        self.seed            = 1
+        self.requests        = 0
+        self.signals         = 0
+
+        self.objects[('apps', '1')] = util.Object(id=1, name='mock', created_on=now(), updated_on=now())
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def address(self):
+        return 'http://%s:%s' % (self.host, self.port)
+
+    @property
+    def ws_address(self):
+        return 'ws://%s:%s' % (self.host, self.port)
+
+    def start(self):
+        assert self.server is None, "mock server already started"
+
+        # The listening socket has a timeout so the accept loop notices when the
+        # server gets closed.
+        self.server = http.bind(self.host, self.port, timeout=0.1)
+        self.server.server = 'frankly-mock'
+        self.port   = self.server.socket.getsockname()[1]
+        self.thread = spawn(self._accept, self.server)
+
+        if self.signal_interval:
+            self.timer = async.Timer(self.signal_interval, self._generate_signal)
+            self.timer.start()
+
+    def close(self):
+        with self.lock:
+            server, self.server = self.server, None
+            timer, self.timer   = self.timer, None
+            sockets = list(self.sockets)
+
+        if server is None:
+            return
+
+        if timer is not None:
+            timer.stop()
+            timer.join()
+
+        for socket in sockets:
+            socket.close()
+
+        self.thread.join()
+        self.thread = None
+        server.close()
+
+    def signal(self, path, payload, type=fmp.UPDATE):
+        """
+        Pushes a signal to every WebSocket client connected to the server.
+        """
+        packet = fmp.Packet(type, 0, 0, [six.text_type(x) for x in path], None, payload)
+        data   = fmp.encode(packet)
+
+        with self.lock:
+            sockets = list(self.sockets)
+            self.signals += 1
+
+        for socket in sockets:
+            socket.push(data)
+
+    def handle(self, operation, path, params, payload, session):
+        """
+        Executes a single operation against the in-memory resources, returns
+        the response payload or raises a `frankly.Error`.
+        """
+        key = tuple(path)
+
+        with self.lock:
+            self.requests += 1
+
+            if key == ('session',):
+                if operation == fmp.READ:
+                    return session
+                if operation == fmp.DELETE:
+                    self.sessions.pop(session.token, None)
+                    return None
+
+            if operation == fmp.READ:
+                result = self._read(key, params)
+            elif operation == fmp.CREATE:
+                key, result = self._create(key, payload)
+            elif operation == fmp.UPDATE:
+                result = self._update(key, payload)
+            elif operation == fmp.DELETE:
+                result = self._delete(key)
+            else:
+                result = None
+
+            if result is None and operation != fmp.DELETE:
+                raise errors.Error(fmp.type_string(operation), path, 404, "not found")
+
+        if operation != fmp.READ:
+            self.signal(key, result, fmp.DELETE if operation == fmp.DELETE else fmp.UPDATE)
+        return result
+
+    def authenticate(self, fields):
+        """
+        Returns the session associated with the request header `fields`, or
+        raises a `frankly.Error` if the request could not be authenticated.
+        """
+        cookie = fields.get('Cookie')
+
+        if cookie is not None:
+            for item in cookie.split(';'):
+                name, _, value = item.strip().partition('=')
+                if name == 'app-token':
+                    with self.lock:
+                        session = self.sessions.get(value)
+                    if session is not None:
+                        return session
+            raise errors.Error('auth', '/auth', 401, "invalid session token")
+
+        key    = fields.get('Frankly-App-Key')
+        secret = fields.get('Frankly-App-Secret')
+
+        if key is None or secret is None:
+            raise errors.Error('auth', '/auth', 401, "missing credentials")
+
+        if self.app_key is not None and (key != self.app_key or secret != self.app_secret):
+            raise errors.Error('auth', '/auth', 401, "invalid credentials")
+
+        return self._make_session(fields.get('Frankly-App-User-Id', 0), fields.get('Frankly-App-User-Role', 'admin'), 0)
+
+    def _make_session(self, uid, role, seed):
+        try:
+            uid = int(uid)
+        except ValueError:
+            pass
+        return util.Object(
+            token      = make_token(),
+            seed       = seed,
+            platform   = 'python',
+            version    = 1,
+            role       = role,
+            app        = self.objects[('apps', '1')],
+            user       = util.Object(id=uid),
+            created_on = now(),
+            updated_on = now(),
+            expires_on = now(),
+        )
+
+    def _authenticate_token(self, fields):
+        token = fields.get('Frankly-App-Identity-Token')
+
+        if token is None:
+            raise errors.Error('auth', '/auth', 401, "missing identity token")
+
+        try:
+            if self.app_secret is None:
+                claims = jwt.decode(token, options={ 'verify_signature': False })
+            else:
+                claims = jwt.decode(token, self.app_secret, algorithms=['HS256'])
+        except Exception as e:
+            raise errors.Error('auth', '/auth', 401, str(e))
+
+        if self.app_key is not None and claims.get('aak') != self.app_key:
+            raise errors.Error('auth', '/auth', 401, "invalid app key")
+
+        with self.lock:
+            seed, self.seed = self.seed, self.seed + 1
+            session = self._make_session(claims.get('uid', 0), claims.get('role', 'regular'), seed)
+            self.sessions[session.token] = session
+        return session
+
+    def _read(self, key, params):
+        result = self.objects.get(key)
+
+        if result is not None:
+            return result
+
+        result = self.collections.get(key)
+
+        if result is None:
+            # Collections that never had any element are empty rather than missing,
+            # their paths have an odd number of components.
+            return [ ] if (len(key) % 2) != 0 else None
+
+        offset = params.get('offset')
+        limit  = params.get('limit')
+        result = list(result.values())
+
+        # Like the message lists of the API, paginated reads go from the element
+        # with the offset id (or the most recent one) towards older elements.
+        if offset is not None or limit is not None:
+            result = sorted(result, key=lambda x: x.get('id', 0), reverse=True)
+            if offset is not None:
+                result = [x for x in result if x.get('id', 0) <= int(offset)]
+            if limit is not None:
+                result = result[:int(limit)]
+        return result
+
+    def _create(self, key, payload):
+        if (len(key) % 2) != 0:
+            # Creating an element of a collection, the server picks its id.
+            id, self.idseq = self.idseq, self.idseq + 1
+            key = key + (six.text_type(id),)
+            obj = util.Object(payload or { })
+            obj.id = id
+        else:
+            # Creating a relationship like a room participant, the element refers
+            # to an existing user when there's one.
+            id  = key[-1]
+            obj = self.objects.get(('users', id))
+            obj = util.Object(id=int(id) if id.isdigit() else id) if obj is None else util.Object(obj)
+
+        obj.created_on = now()
+        obj.updated_on = obj.created_on
+        self.objects[key] = obj
+        self.collections.setdefault(key[:-1], OrderedDict())[key[-1]] = obj
+        return key, obj
+
+    def _update(self, key, payload):
+        obj = self.objects.get(key)
+
+        if obj is not None:
+            obj.update(payload or { })
+            obj.updated_on = now()
+        return obj
+
+    def _delete(self, key):
+        obj = self.objects.pop(key, None)
+
+        if obj is None:
+            raise errors.Error('delete', list(key), 404, "not found")
+
+        self.collections.get(key[:-1], { }).pop(key[-1], None)
+
+        # Resources nested under the deleted one are removed as well.
+        for k in [k for k in self.objects if k[:len(key)] == key]:
+            del self.objects[k]
+        for k in [k for k in self.collections if k[:len(key)] == key]:
+            del self.collections[k]
+        return obj
+
+    def _generate_signal(self):
+        with self.lock:
+            id, self.idseq = self.idseq, self.idseq + 1
+
+        self.signal(self.signal_path + [six.text_type(id)], util.Object(
+            id         = id,
+            contents   = [util.Object(type='text/plain', value='message %s' % id)],
+            created_on = now(),
+            updated_on = now(),
+        ))
+
+    def _accept(self, server):
+        while self.server is server:
+            try:
+                client = server.accept()
+            except Exception:
+                continue
+            client.timeout = None
+            spawn(self._serve, client)
+
+    def _serve(self, client):
+        try:
+            for method, path, query, fragment, fields, content in client:
+                content = content.read()
+
+                if fields.get('Upgrade', '').lower() == 'websocket':
+                    self._serve_websocket(client, fields)
+                    return
+
+                headers = { 'Content-Type': 'application/json' }
+                status, payload = self._serve_http(method, path, query, fields, content, headers)
+
+                if self.latency:
+                    time.sleep(self.latency)
+
+                client.send(status, headers, json.dumps(payload, cls=util.JsonEncoder).encode('utf-8'))
+        except Exception as e:
+            log.exception(e)
+        finally:
+            client.close()
+
+    def _serve_http(self, method, path, query, fields, content, headers):
+        path = [x for x in path.split('/') if x]
+
+        try:
+            if path == ['auth', 'nonce']:
+                return 200, make_token()
+
+            if path == ['auth']:
+                session = self._authenticate_token(fields)
+                headers['Set-Cookie'] = 'app-token=%s; Path=/' % session.token
+                return 200, session
+
+            session   = self.authenticate(fields)
+            operation = HTTP_OPERATIONS.get(method)
+
+            # Only unknown methods are rejected here, errors raised while handling
+            # the request (including bugs in the mock itself) are reported as 500.
+            if operation is None:
+                return 405, "method not allowed"
+
+            payload = json.loads(content.decode('utf-8'), cls=util.JsonDecoder) if content else None
+            return 200, self.handle(operation, path, query, payload, session)
+        except errors.Error as e:
+            return e.status, e.reason
+        except Exception as e:
+            log.exception(e)
+            return 500, str(e)
+
+    def _serve_websocket(self, client, fields):
+        try:
+            session = self.authenticate(fields)
+        except errors.Error as e:
+            client.send(e.status, { 'Content-Type': 'application/json' }, json.dumps(e.reason).encode('utf-8'))
+            return
+
+        socket = Connection(websocket.upgrade(client, fields['Sec-WebSocket-Key'], 'chat'), self.latency)
+
+        with self.lock:
+            if self.server is None:
+                socket.close()
+                return
+            self.sockets.add(socket)
+
+        try:
+            socket.run(lambda packet: self._serve_packet(packet, session))
+        finally:
+            with self.lock:
+                self.sockets.discard(socket)
+            socket.close()
+
+    def _serve_packet(self, packet, session):
+        try:
+            payload = self.handle(packet.type, packet.path, packet.params or { }, packet.payload, session)
+            packet  = fmp.Packet(fmp.OK, packet.seed, packet.id, packet.path, None, payload)
+        except errors.Error as e:
+            packet  = fmp.Packet(fmp.ERROR, packet.seed, packet.id, packet.path, None, util.Object(status=e.status, error=e.reason))
+        return fmp.encode(packet)
+
+class Connection(object):
+    # Frames are written by a dedicated worker so requests pipelined on the
+    # connection overlap instead of adding up their latency.
+
+    def __init__(self, socket, latency=0):
+        self.socket  = socket
+        self.latency = latency
+        self.worker  = async.Worker(self._flush)
+        self.worker.start()
+
+    def close(self):
+        worker, self.worker = self.worker, None
+
+        if worker is not None:
+            worker.stop()
+            worker.join()
+            self.socket.close()
+
+    def push(self, data, delay=0, opcode=websocket.BINARY):
+        worker = self.worker
+        if worker is not None:
+            worker.queue.put((time.time() + delay, opcode, data))
+
+    def run(self, handler):
+        decoder = fmp.Decoder()
+
+        while True:
+            opcode, payload = self.socket.recv(copy=False)
+
+            if opcode is None or opcode == websocket.CLOSE:
+                break
+
+            if opcode == websocket.PING:
+                self.push(bytes(payload), opcode=websocket.PONG)
+                continue
+
+            if opcode == websocket.BINARY:
+                decoder.feed(payload)
+                for packet in decoder:
+                    self.push(handler(packet), self.latency)
+
+    def _flush(self, jobs):
+        pending = deque()
+
+        for job in jobs:
+            pending.append(job)
+
+            try:
+                while True:
+                    job = jobs.get_nowait()
+                    if job is None:
+                        jobs.put(None)
+                        break
+                    pending.append(job)
+            except queue.Empty:
+                pass
+
+            # Every job gets the same latency so they are ordered by due time, all
+            # the frames that are due get written with a single call.
+            while pending:
+                delay = pending[0][0] - time.time()
+
+                if delay > 0:
+                    time.sleep(delay)
+
+                now    = time.time()
+                frames = [ ]
+
+                while pending and pending[0][0] <= now:
+                    _, opcode, data = pending.popleft()
+                    frames.extend(self.socket.make_frame(1, opcode, data))
+
+                try:
+                    self.socket.send_bytes(frames)
+                except Exception as e:
+                    log.exception(e)
+
+HTTP_OPERATIONS = {
+    'GET'    : fmp.READ,
+    'POST'   : fmp.CREATE,
+    'PUT'    : fmp.UPDATE,
+    'DELETE' : fmp.DELETE,
+}
+
+def now():
+    return util.format_date(datetime.utcnow())
+
+def make_token():
+    return binascii.hexlify(os.urandom(16)).decode('ascii')
+
+def spawn(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+def serve(host='127.0.0.1', port=8000, latency=0, signal_interval=None, app_key=None, app_secret=None):
+    """
+    Runs a mock server until the process is interrupted.
+    """
+    with Server(host, port, latency, signal_interval, app_key=app_key, app_secret=app_secret) as server:
+        print('frankly mock server listening on', server.address)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description='Runs a mock Frankly API server.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', default=8000, type=int)
+    parser.add_argument('--latency', default=0, type=float, help='delay added to every response (in seconds)')
+    parser.add_argument('--signal-interval', default=None, type=float, help='interval between generated signals (in seconds)')
+    parser.add_argument('--app-key', default=None)
+    parser.add_argument('--app-secret', default=None)
+    args = parser.parse_args()
+    serve(args.host, args.port, args.latency, args.signal_interval, args.app_key, args.app_secret)
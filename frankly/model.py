@@ -26,16 +26,258 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import json
+import six
+
 from . import util
 
 __all__ = [
-    'build'
+    'App',
+    'Event',
+    'Message',
+    'Model',
+    'Room',
+    'Session',
+    'User',
+    'build',
+    'load',
+    'loads',
+    'register',
 ]
 
-def build(path, payload):
-    for key, builder in MATCH_BUILD:
-        if match(path, key):
-            return builder(path, payload)
+def build(path, payload, typed=False):
+    builder = lookup(path)
+    if builder is not None:
+        event = builder(path, payload)
+        if typed and isinstance(event, dict):
+            event = Event.load(six.iteritems(event))
+        return event
+
+def register(key, builder):
+    """
+    Registers a builder for paths matching `key`, a tuple of path segments
+    where None matches any value.
+
+    When several keys match a path the builder that was registered last is
+    used, a builder registered for a key that already had one replaces it.
+    """
+    global priority
+    table, key = util.pattern_table(tables, key)
+    priority  += 1
+    table[key] = (priority, builder)
+
+def lookup(path):
+    # Keys of the same length that have literal segments at the same positions
+    # share a table indexed by these segments, most paths are resolved with a
+    # single dict lookup.
+    match = None
+
+    for _, getter, table in tables.get(len(path), ()):
+        entry = table.get(getter(path))
+        if entry is not None and (match is None or entry[0] > match[0]):
+            match = entry
+
+    if match is not None:
+        return match[1]
+
+# Sets a slot of a model, bypassing Model.__setattr__.
+setslot = object.__setattr__
+
+class Pairs(list):
+    # Key/value pairs of an object produced by the msgpack or JSON decoders of
+    # typed clients, load turns them into models without building a dict first.
+    pass
+
+class Model(object):
+    """
+    Base class of the typed objects returned by clients created with
+    `models=True`.
+
+    Known properties are stored in slots, properties that a model doesn't
+    declare are kept in a separate dict which is only allocated if there are
+    any. Models support the same attribute and item access as `util.Object`.
+    """
+
+    __slots__ = ('extra',)
+
+    # Map of property names to the model class of their values.
+    types = { }
+
+    def __init__(self, **kwargs):
+        setslot(self, 'extra', None)
+        for key, value in six.iteritems(kwargs):
+            self._set(key, value)
+
+    @classmethod
+    def load(cls, pairs):
+        obj = cls.__new__(cls)
+        setslot(obj, 'extra', None)
+        for key, value in pairs:
+            if key in util.DATE_FIELDS and isinstance(value, six.string_types):
+                value = util.parse_date(value)
+            obj._set(key, convert(cls.types.get(key), value))
+        return obj
+
+    def _set(self, key, value):
+        # Slots are set without going through __setattr__, loading models is the
+        # hot path.
+        if key in self.__slots__:
+            setslot(self, key, value)
+        elif self.extra is None:
+            setslot(self, 'extra', { key: value })
+        else:
+            self.extra[key] = value
+
+    def __setattr__(self, name, value):
+        # Like on `util.Object` any attribute can be set, those that aren't slots
+        # go to the extra dict.
+        try:
+            setslot(self, name, value)
+        except AttributeError:
+            self._set(name, value)
+
+    def __delattr__(self, name):
+        try:
+            object.__delattr__(self, name)
+        except AttributeError:
+            if self.extra is None or name not in self.extra:
+                raise AttributeError(name)
+            del self.extra[name]
+
+    def __getattr__(self, name):
+        # Only called when the property isn't a slot or the slot was never set.
+        if name != 'extra' and self.extra is not None:
+            try:
+                return self.extra[name]
+            except KeyError:
+                pass
+        raise AttributeError(name)
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        self._set(key, value)
+
+    def __contains__(self, key):
+        return key in self.keys()
+
+    def __iter__(self):
+        for key in self.keys():
+            yield key, getattr(self, key)
+
+    def __len__(self):
+        return len(self.keys())
+
+    def __eq__(self, other):
+        if isinstance(other, (Model, dict)):
+            return dict(self) == dict(other)
+        return False
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return '%s(%s)' % (type(self).__name__, ', '.join('%s=%r' % (k, v) for k, v in self))
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def keys(self):
+        keys = [k for k in self.__slots__ if hasattr(self, k)]
+        if self.extra is not None:
+            keys.extend(self.extra)
+        return keys
+
+    def to_object(self):
+        return util.Object(self)
+
+class App(Model):
+    __slots__ = ('id', 'name', 'created_on', 'updated_on')
+
+class User(Model):
+    __slots__ = ('id', 'display_name', 'partner_user_id', 'avatar_image_url', 'role', 'created_on', 'updated_on')
+
+class Room(Model):
+    __slots__ = ('id', 'title', 'status', 'description', 'avatar_image_url', 'featured_image_url', 'featured', 'created_on', 'updated_on')
+
+class Message(Model):
+    __slots__ = ('id', 'sender', 'contents', 'announcement', 'sticky', 'created_on', 'updated_on')
+    types = { 'sender': User }
+
+class Session(Model):
+    __slots__ = ('seed', 'platform', 'role', 'version', 'app', 'user', 'created_on', 'updated_on', 'expires_on')
+    types = { 'app': App, 'user': User }
+
+class Event(Model):
+    __slots__ = ('type', 'room', 'message', 'user', 'count', 'ban', 'app', 'session')
+    types = { 'room': Room, 'user': User }
+
+# Model classes of the objects found at API paths, ids are replaced by None (see
+# schema_key).
+SCHEMA = {
+    ('apps', None)                        : App,
+    ('rooms',)                            : Room,
+    ('rooms', None)                       : Room,
+    ('rooms', None, 'messages')           : Message,
+    ('rooms', None, 'messages', None)     : Message,
+    ('rooms', None, 'owners')             : User,
+    ('rooms', None, 'owners', None)       : User,
+    ('rooms', None, 'moderators')         : User,
+    ('rooms', None, 'moderators', None)   : User,
+    ('rooms', None, 'members')            : User,
+    ('rooms', None, 'members', None)      : User,
+    ('rooms', None, 'announcers')         : User,
+    ('rooms', None, 'announcers', None)   : User,
+    ('rooms', None, 'subscribers')        : User,
+    ('rooms', None, 'subscribers', None)  : User,
+    ('rooms', None, 'participants')       : User,
+    ('rooms', None, 'participants', None) : User,
+    ('session',)                          : Session,
+    ('users',)                            : User,
+    ('users', None)                       : User,
+}
+
+def schema_key(path):
+    # API paths alternate between collection names and ids.
+    return tuple(None if (i % 2) else p for i, p in enumerate(path))
+
+def load(path, value):
+    """
+    Converts a value decoded with `Pairs` as object hook into the models
+    matching `path`, objects that have no model are returned as `util.Object`.
+    """
+    return convert(None if path is None else SCHEMA.get(schema_key(path)), value)
+
+def loads(path, data):
+    """
+    Decodes a JSON document into the models matching `path`.
+    """
+    if len(data) == 0:
+        return None
+    return load(path, json.loads(data, object_pairs_hook=Pairs))
+
+def convert(cls, value):
+    if isinstance(value, Pairs):
+        if cls is not None:
+            return cls.load(value)
+        return util.make_object((k, convert(None, v)) for k, v in value)
+
+    if isinstance(value, list):
+        return [convert(cls, x) for x in value]
+
+    if cls is not None and isinstance(value, dict):
+        return cls.load(six.iteritems(value))
+
+    return value
 
 def match(path, key):
     if len(path) != len(key):
@@ -164,3 +406,11 @@ MATCH_BUILD = (
 
     (('session',), build_session),
 )
+
+# Tables of builders indexed by path length, see lookup.
+tables   = { }
+priority = 0
+
+# Entries that come first in the table have precedence so they are registered last.
+for key, builder in reversed(MATCH_BUILD):
+    register(key, builder)
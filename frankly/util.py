@@ -27,13 +27,21 @@ from __future__ import print_function
 from __future__ import unicode_literals
 
 from datetime import datetime
-from iso8601 import parse_date
 from json import JSONDecoder as BaseJsonDecoder
 from json import JSONEncoder as BaseJsonEncoder
 
+try:
+    from datetime import timezone
+    UTC = timezone.utc
+except ImportError:
+    from iso8601 import UTC
+
 import json
 import logging
+import operator
 import six
+import sys
+import types
 
 logging.getLogger('iso8601').setLevel(logging.ERROR)
 
@@ -77,14 +85,9 @@ class JsonDecoder(BaseJsonDecoder):
 
     def __init__(self, **kwargs):
         kwargs['strict'] = False
-        kwargs['object_pairs_hook'] = Object
+        kwargs['object_pairs_hook'] = make_object
         BaseJsonDecoder.__init__(self, **kwargs)
 
-    def decode(self, s):
-        obj = BaseJsonDecoder.decode(self, s)
-        obj = json_parse_dates(obj)
-        return obj
-
 class JsonEncoder(BaseJsonEncoder):
 
     def __init__(self, **kwargs):
@@ -99,25 +102,43 @@ class JsonEncoder(BaseJsonEncoder):
         if isinstance(obj, set):
             return list(obj)
 
+        # Models returned by typed clients can be sent back to the API, the module
+        # is imported here because it depends on this one.
+        from .model import Model
+        if isinstance(obj, Model):
+            return dict(obj)
+
         return BaseJsonEncoder.default(self, obj)
 
-def json_parse_dates(obj):
-    if isinstance(obj, six.text_type):
-        if len(obj) > 50 or 'T' not in obj:
-            return obj
-        try:
-            return parse_date(obj)
-        except:
-            return obj
+# Properties of API objects that hold dates, other strings are never parsed.
+DATE_FIELDS = frozenset(('created_on', 'updated_on', 'expires_on'))
 
-    if isinstance(obj, list):
-        return [json_parse_dates(x) for x in obj]
+def make_object(pairs):
+    # Object hook of the JSON decoder, dates are converted while the objects
+    # are built instead of walking the decoded tree again.
+    obj = Object(pairs)
 
-    if isinstance(obj, dict):
-        return type(obj)((k, json_parse_dates(v)) for k, v in six.iteritems(obj))
+    for key in DATE_FIELDS:
+        value = obj.get(key)
+        if isinstance(value, six.string_types):
+            obj[key] = parse_date(value)
 
     return obj
 
+def parse_date(s):
+    # Dates sent by the API have a fixed format (see format_date), they're parsed
+    # by slicing the string, anything else goes through iso8601.
+    if len(s) == 24 and s[10] == 'T' and s[23] == 'Z' and s[19] == '.':
+        try:
+            return datetime(int(s[0:4]), int(s[5:7]), int(s[8:10]), int(s[11:13]), int(s[14:16]), int(s[17:19]), int(s[20:23]) * 1000, UTC)
+        except ValueError:
+            pass
+    import iso8601
+    try:
+        return iso8601.parse_date(s)
+    except iso8601.ParseError:
+        return s
+
 def format_date(d):
     tz = d.strftime('%z')
     if tz in ('', '+0000'):
@@ -132,3 +153,64 @@ def format_date(d):
         d.microsecond / 1000,
         tz,
     )
+
+def pattern_table(tables, pattern):
+    """
+    Returns the table of `tables` where `pattern` is indexed and its key in
+    this table, creating the table if needed. Patterns are tuples of path
+    segments where None matches any value.
+
+    Patterns of the same length with literal segments at the same positions
+    share a table indexed by these segments, `tables` maps pattern lengths to
+    lists of (positions, getter, table) tuples and the values matching a path
+    are found with a dict lookup per group of patterns:
+
+        for _, getter, table in tables.get(len(path), ()):
+            value = table.get(getter(path))
+    """
+    positions = tuple(i for i, x in enumerate(pattern) if x is not None)
+    groups    = tables.setdefault(len(pattern), [ ])
+
+    for group in groups:
+        if group[0] == positions:
+            break
+    else:
+        group = (positions, make_getter(positions), { })
+        groups.append(group)
+
+    _, getter, table = group
+    return table, getter(pattern)
+
+def make_getter(positions):
+    if not positions:
+        return lambda path: ()
+    return operator.itemgetter(*positions)
+
+class LazyModule(types.ModuleType):
+    # Type of the modules made lazy by lazy_attributes, modules can only define
+    # __getattr__ since Python 3.7.
+
+    def __getattr__(self, name):
+        try:
+            load = self.__dict__['_lazy_attributes'][name]
+        except KeyError:
+            raise AttributeError("module %r has no attribute %r" % (self.__name__, name))
+        value = load()
+        setattr(self, name, value)
+        return value
+
+def lazy_attributes(module_name, **loaders):
+    """
+    Makes each attribute of a module in `loaders` get its value from calling
+    the associated function on first access, for attributes that would require
+    importing expensive modules.
+    """
+    module = sys.modules[module_name]
+    module._lazy_attributes = loaders
+    try:
+        module.__class__ = LazyModule
+    except TypeError:
+        # Python 2 doesn't allow changing the type of a module, the attributes
+        # are loaded right away.
+        for name, load in six.iteritems(loaders):
+            setattr(module, name, load())
@@ -50,6 +50,7 @@ __all__ = [
     'PONG',
     'OPCODES',
     'OutOfData',
+    'RecvBuffer',
     'UpgradeFailure',
     'WebSocket',
     'connect',
@@ -68,18 +69,82 @@ PING = 0x09
 PONG = 0x0A
 OPCODES = (CONTINUATION, TEXT, BINARY, CLOSE, PING, PONG)
 
+# Maximum number of buffers passed to a single sendmsg call.
+IOV_MAX = 1024
+
 class OutOfData(Exception):
     pass
 
 class UpgradeFailure(http_client.HTTPException):
     pass
 
+class RecvBuffer(object):
+    """
+    Growable receive buffer owned by a websocket, it is filled with large
+    `recv_into` calls and frames are parsed out of it in place so a single
+    system call can serve many small frames.
+    """
+
+    def __init__(self, size=65536):
+        self.size  = size
+        self.data  = bytearray(size)
+        self.start = 0
+        self.end   = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def view(self, offset, length):
+        return memoryview(self.data)[(self.start + offset):(self.start + offset + length)]
+
+    def consume(self, length):
+        self.start += length
+
+        if self.start == self.end:
+            self.start = 0
+            self.end   = 0
+
+    def reserve(self, length):
+        # Makes sure at least 'length' bytes can be held by the buffer, moving
+        # pending bytes to the front or allocating a larger buffer when needed.
+        # A new bytearray is allocated instead of resizing the current one so
+        # memory views returned by previous calls don't prevent the operation.
+        size = len(self)
+
+        if (self.start + length) <= len(self.data):
+            return
+
+        if length <= len(self.data):
+            self.data[:size] = self.data[self.start:self.end]
+        else:
+            data = bytearray(max(length, 2 * len(self.data)))
+            data[:size] = self.data[self.start:self.end]
+            self.data = data
+
+        self.start = 0
+        self.end   = size
+
+    def shrink(self):
+        # Releases memory held after receiving a large frame, only once every
+        # pending byte has been consumed.
+        if self.start == self.end and len(self.data) > self.size:
+            self.data = bytearray(self.size)
+
+    def fill(self, socket):
+        if self.end == len(self.data):
+            self.reserve(len(self) + self.size)
+        recv = socket.recv_into(memoryview(self.data)[self.end:])
+        if recv == 0:
+            raise OutOfData
+        self.end += recv
+        return recv
+
 class WebSocket(object):
 
-    def __init__(self, socket, mask=False):
-        self.socket  = socket
-        self.mask    = mask
-        self.pending = None
+    def __init__(self, socket, mask=False, recv_buffer_size=65536):
+        self.socket = socket
+        self.mask   = mask
+        self.buffer = RecvBuffer(recv_buffer_size)
 
     def __iter__(self):
         while True:
@@ -106,7 +171,7 @@ class WebSocket(object):
             if self.socket is not None:
                 self.socket.close()
         finally:
-            self.pending = None
+            self.buffer = RecvBuffer(self.buffer.size)
 
     def detach(self):
         socket, self.socket = self.socket, None
@@ -115,34 +180,22 @@ class WebSocket(object):
     def fileno(self):
         return -1 if self.socket is None else self.socket.fileno()
 
-    def recv_bytes(self, data, size):
-        view = memoryview(data)[size:]
-        recv = self.socket.recv_into(view)
-        if recv == 0:
-            raise OutOfData
-        return size + recv
-
     def recv_frame(self, size_max=None):
+        """
+        Reads the next frame from the socket, the payload is returned as a memory
+        view into the receive buffer which stays valid until the next call to
+        one of the receive methods.
+        """
         header = webtools.websocket_header()
-        offset = 0
-
-        if bool(self.pending):
-            data, self.pending = self.pending, None
-            size = len(data)
-            offset = header.decode(data)
-        else:
-            data = bytearray(16)
-            size = 0
+        buffer = self.buffer
+        buffer.shrink()
 
         # Load websocket header
-        while offset <= 0:
-            size   = self.recv_bytes(data, size)
-            offset = header.decode(data[:size])
-
-        # BUG: must keep a buffer of extra data read from the socket that don't
-        # belong to this frame!
-        data  = data[offset:size]
-        size -= offset
+        while True:
+            offset = header.decode(buffer.data, buffer.start, buffer.end)
+            if offset > 0:
+                break
+            buffer.fill(self.socket)
 
         # Make sure the mask is valid
         assert bool(self.mask) != bool(header.mask), "got frame with invalid mask bit"
@@ -150,27 +203,35 @@ class WebSocket(object):
         # Make sure payload length is not greater than 'size_max'
         assert size_max is None or header.length <= size_max, "got frame longer than maixmum allow length"
 
-        # Extend buffer if too small to receive message
-        if size < header.length:
-            tmp = bytearray(header.length)
-            tmp[:size] = data
-            data = tmp
+        # Load websocket payload, bytes read past the end of the frame stay in the
+        # buffer and are used by the next call.
+        size = offset + header.length
+        buffer.reserve(size)
 
-        # Load websocket payload
-        while size < header.length:
-            size = self.recv_bytes(data, size)
+        while len(buffer) < size:
+            buffer.fill(self.socket)
 
-        # Make sure we don't consumed more data than we should
-        if len(data) > header.length:
-            data, self.pending = data[:header.length], data[header.length:]
+        data = buffer.view(offset, header.length)
+        buffer.consume(size)
 
-        # Apply mask if needed
+        # Apply mask if needed, memory views don't support assigning integers
+        # to their items on Python 2 so the payload gets copied in that case.
         if header.mask:
+            if six.PY2:
+                data = bytearray(data)
             webtools.xor_mask(data, header.key)
 
         return header.fin, header.opcode, data
 
-    def recv(self, size_max=None):
+    def recv(self, size_max=None, copy=True):
+        """
+        Reads the next message from the socket.
+
+        When `copy` is False and the message was made of a single frame the
+        payload is returned as a memory view into the receive buffer, it must
+        then be consumed before the next call to `recv`. Payloads are always
+        copied on Python 2.
+        """
         opcode  = None
         payload = None
 
@@ -183,6 +244,11 @@ class WebSocket(object):
                     opcode  = code
                     payload = frame
 
+                    if fin and not copy and six.PY3:
+                        break
+
+                    payload = bytearray(frame)
+
                 else:
                     # Only one opcode must be set per message
                     if code != CONTINUATION:
@@ -209,12 +275,14 @@ class WebSocket(object):
                     data.extend(chunk)
                 return self.socket.sendall(data)
 
-            full = sum(len(x) for x in iovec)
-            size = 0
+            full  = sum(len(x) for x in iovec)
+            size  = 0
+            index = 0
 
-            while bool(iovec):
-                # Efficiently send data avoiding user-space copy using sendmsg(2)
-                rc = self.socket.sendmsg(iovec)
+            while index < len(iovec):
+                # Efficiently send data avoiding user-space copy using sendmsg(2),
+                # the kernel accepts at most IOV_MAX buffers per call.
+                rc = self.socket.sendmsg(iovec[index:(index + IOV_MAX)])
                 if rc == 0:
                     raise IOError("failed to send data over websocket")
                 size += rc
@@ -226,11 +294,11 @@ class WebSocket(object):
                 # Discard data from the io vector, because python documentation says
                 # sendmsg may not send all data (although it should if it's used in
                 # blocking mode).
-                while bool(iovec) and rc >= len(iovec[0]):
-                    rc -= len(iovec[0])
-                    del iovec[0]
+                while index < len(iovec) and rc >= len(iovec[index]):
+                    rc -= len(iovec[index])
+                    index += 1
                 if rc != 0:
-                    iovec[0] = iovec[0][rc:]
+                    iovec[index] = memoryview(iovec[index])[rc:]
 
             return size
     else:
@@ -241,6 +309,9 @@ class WebSocket(object):
             return self.socket.sendall(data)
 
     def send_frame(self, fin, opcode, frame):
+        return self.send_bytes(self.make_frame(fin, opcode, frame))
+
+    def make_frame(self, fin, opcode, frame):
         # Setup websocket header structure
         header          = webtools.websocket_header()
         header.key      = 0
@@ -254,23 +325,24 @@ class WebSocket(object):
         if self.mask:
             if not isinstance(frame, bytearray):
                 frame = bytearray(frame)
-            header.key = random.randint(0, 4294967296)
+            header.key = random.randint(0, 4294967295)
             webtools.xor_mask(frame, header.key)
 
         # Encode websocket header
         data = bytearray(16)
         size = header.encode(data)
-
-        # Send message over the socket
-        return self.send_bytes([data[:size], frame])
+        return [data[:size], frame]
 
     def send(self, payload):
-        if isinstance(payload, six.text_type):
-            opcode  = TEXT
-            payload = payload.encode('utf-8')
-        else:
-            opcode  = BINARY
-        return self.send_frame(1, opcode, payload)
+        return self.send_frame(1, *make_message(payload))
+
+    def send_many(self, payloads):
+        # Every payload is sent as its own message but all frames are submitted
+        # to the kernel in a single call.
+        iovec = [ ]
+        for payload in payloads:
+            iovec.extend(self.make_frame(1, *make_message(payload)))
+        return self.send_bytes(iovec)
 
     def ping(self, payload):
         return self.send_frame(1, PING, payload)
@@ -293,6 +365,11 @@ class WebSocket(object):
     def settimeout(self, timeout):
         self.socket.settimeout(timeout)
 
+def make_message(payload):
+    if isinstance(payload, six.text_type):
+        return TEXT, payload.encode('utf-8')
+    return BINARY, payload
+
 def hash_key(key):
     key += '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
     key = key.encode('utf-8')
@@ -26,6 +26,7 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import binascii
 import six
 import struct
 
@@ -34,21 +35,42 @@ __all__ = [
     'websocket_header',
 ]
 
+if six.PY3:
+    def _xor_mask_loop(data, key):
+        for i in range(len(data)):
+            data[i] ^= key[i % 4]
+
+    def _xor_mask_int(data, key):
+        # The whole buffer is masked with a single XOR between two big integers,
+        # the loop runs in C instead of once per byte in the interpreter.
+        size = len(data)
+        if size != 0:
+            mask = (key * ((size + 3) // 4))[:size]
+            data[:] = (int.from_bytes(data, 'little') ^ int.from_bytes(mask, 'little')).to_bytes(size, 'little')
+else:
+    def _xor_mask_loop(data, key):
+        for i in xrange(len(data)):
+            data[i] ^= ord(key[i % 4])
+
+    def _xor_mask_int(data, key):
+        # Python 2 has no int.from_bytes, integers are converted from and to
+        # their hexadecimal representation instead.
+        size = len(data)
+        if size != 0:
+            mask = (key * ((size + 3) // 4))[:size]
+            data[:] = binascii.unhexlify('%0*x' % (2 * size, int(binascii.hexlify(data), 16) ^ int(binascii.hexlify(mask), 16)))
+
 try:
     from wsaccel.xormask import XorMaskerSimple
 
-    def _xor_mask(data, key):
+    def _xor_mask_wsaccel(data, key):
         data[:] = XorMaskerSimple(key).process(data)
 
+    _xor_mask = _xor_mask_wsaccel
+
 except ImportError:
-    if six.PY3:
-        def _xor_mask(data, key):
-            for i in range(len(data)):
-                data[i] ^= key[i % 4]
-    else:
-        def _xor_mask(data, key):
-            for i in xrange(len(data)):
-                data[i] ^= ord(key[i % 4])
+    _xor_mask_wsaccel = None
+    _xor_mask = _xor_mask_int
 
 def xor_mask(data, key):
     if type(key) in six.integer_types:
@@ -98,35 +120,40 @@ class websocket_header(object):
 
         return offset
 
-    def decode(self, data):
-        if len(data) < 2:
+    def decode(self, data, start=0, end=None):
+        # The header is decoded in place from data[start:end] so callers don't
+        # have to slice (and copy) their receive buffer.
+        if end is None:
+            end = len(data)
+
+        if (end - start) < 2:
             return -1
-        offset = 2
+        offset = start + 2
 
-        byte   = data[0]
+        byte   = data[start]
         fin    = byte >> 7
         opcode = byte & 0x0F
 
-        byte   = data[1]
+        byte   = data[start + 1]
         mask   = byte >> 7
         paylen = byte & 0x7F
 
         if paylen == 126:
-            if len(data) < 4:
+            if end < (offset + 2):
                 return -1
-            paylen = struct.unpack(b'!H', data[2:4])[0]
-            offset = 4
+            paylen = struct.unpack_from(b'!H', data, offset)[0]
+            offset += 2
 
         elif paylen == 127:
-            if len(data) < 10:
+            if end < (offset + 8):
                 return -1
-            paylen = struct.unpack(b'!Q', data[2:10])[0]
-            offset = 10
+            paylen = struct.unpack_from(b'!Q', data, offset)[0]
+            offset += 8
 
         if mask:
-            if len(data) < (offset + 4):
+            if end < (offset + 4):
                 return -1
-            key = struct.unpack(b'=I', data[offset:(offset + 4)])[0]
+            key = struct.unpack_from(b'=I', data, offset)[0]
             offset += 4
         else:
             key = 0
@@ -136,4 +163,4 @@ class websocket_header(object):
         self.fin    = fin
         self.opcode = opcode
         self.mask   = mask
-        return offset
+        return offset - start
@@ -0,0 +1,167 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from collections import OrderedDict
+
+__all__ = [
+    'Window',
+]
+
+class Window(object):
+    """
+    Adaptive limit on the number of requests in flight (AIMD).
+
+    Responses received with a healthy latency, no more than `tolerance` times
+    (or `slack` seconds above) the lowest latency observed so far, grow the
+    window: by one request per response until the first congestion event, then
+    by one request per window's worth of responses. The window is halved when
+    a request times out or gets a 429 or 5xx response, at most once per round
+    trip so a burst of failures only counts as one congestion event. The size
+    stays between `minimum` and `maximum`.
+
+    Requests submitted while the window is full are queued and handed back
+    in order by `release` and `expire` as room becomes available. Latencies are
+    measured from the time requests leave the queue, the `sent` attribute of
+    requests is set to that time.
+
+    The window isn't thread safe, clients only use it while holding their lock.
+    """
+
+    def __init__(self, initial=16, minimum=1, maximum=1024, tolerance=2.0, slack=0.01):
+        self.size      = float(max(minimum, min(initial, maximum)))
+        self.minimum   = minimum
+        self.maximum   = maximum
+        self.threshold = maximum
+        self.tolerance = tolerance
+        self.slack     = slack
+        self.inflight  = 0
+        self.queue     = OrderedDict()
+        self.base      = None
+        self.recovery  = 0
+
+    def __len__(self):
+        return len(self.queue)
+
+    def queued(self, req):
+        return req.packet.id in self.queue
+
+    def acquire(self, req, now):
+        """
+        Returns True if the request can be sent right away, otherwise it gets
+        queued until the window has room for it.
+        """
+        if self.queue or self.inflight >= int(self.size):
+            self.queue[req.packet.id] = req
+            return False
+        self.inflight += 1
+        req.sent = now
+        return True
+
+    def release(self, req, status, now):
+        """
+        Accounts for the response to a request, returns the list of queued
+        requests that can now be sent.
+        """
+        if self.queue.pop(req.packet.id, None) is not None:
+            return [ ]
+
+        self.inflight = max(0, self.inflight - 1)
+        elapsed = now - req.sent
+
+        if status == 429 or status >= 500:
+            self._decrease(elapsed, now)
+
+        elif self.base is None or elapsed < self.base:
+            self.base = elapsed
+            self._increase()
+
+        elif elapsed <= max(self.base * self.tolerance, self.base + self.slack):
+            self._increase()
+
+        return self._ready(now)
+
+    def expire(self, req, now):
+        """
+        Accounts for a request that timed out, returns the list of queued
+        requests that can now be sent.
+        """
+        if self.queue.pop(req.packet.id, None) is not None:
+            return [ ]
+        self.inflight = max(0, self.inflight - 1)
+        self._decrease(now - req.sent, now)
+        return self._ready(now)
+
+    def cancel(self, req, now):
+        """
+        Accounts for a request that failed before being sent, returns the list of
+        queued requests that can now be sent.
+        """
+        if self.queue.pop(req.packet.id, None) is not None:
+            return [ ]
+        self.inflight = max(0, self.inflight - 1)
+        return self._ready(now)
+
+    def resend(self, reqs, now):
+        """
+        Called when requests get sent again after reconnecting, returns those of
+        `reqs` which had been sent before followed by the queued requests that
+        now fit in the window.
+        """
+        sent = [req for req in reqs if req.packet.id not in self.queue]
+        self.inflight = len(sent)
+        for req in sent:
+            req.sent = now
+        return sent + self._ready(now)
+
+    def clear(self):
+        self.inflight = 0
+        self.queue.clear()
+
+    def _increase(self):
+        if self.size < self.threshold:
+            self.size = min(self.threshold, self.size + 1)
+        else:
+            self.size = min(self.maximum, self.size + 1 / self.size)
+
+    def _decrease(self, elapsed, now):
+        # Requests that were sent before the last decrease don't reflect its
+        # effect yet, they don't shrink the window again.
+        if (now - elapsed) < self.recovery:
+            return
+        self.size      = max(self.minimum, self.size / 2)
+        self.threshold = self.size
+        self.recovery  = now
+
+    def _ready(self, now):
+        ready = [ ]
+        while self.queue and self.inflight < int(self.size):
+            _, req = self.queue.popitem(last=False)
+            self.inflight += 1
+            req.sent = now
+            ready.append(req)
+        return ready
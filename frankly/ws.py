@@ -26,26 +26,41 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from six.moves import queue
 from six.moves import urllib
 urlparse = urllib.parse.urlparse
 
 import ssl
 import six
+import time
 
 from . import auth
 from . import async
+from . import errors
 from . import events
 from . import fmp
 from . import logger as log
+from . import metrics
 from . import websocket as ws
 
 __all__ = [
     'Backend',
 ]
 
+# Maximum number of packets written to the socket in a single call.
+SEND_BATCH_MAX = 512
+
+def encode(packet):
+    # Payloads that can't be encoded are reported like requests rejected by the
+    # API, the connection remains usable.
+    try:
+        return fmp.encode(packet)
+    except Exception as e:
+        raise errors.Error(packet.operation, packet.path, 400, str(e))
+
 class Backend(events.Emitter):
 
-    def __init__(self, address, session):
+    def __init__(self, address, session, flush_delay=0, models=False):
         events.Emitter.__init__(self)
 
         url = urlparse(address)
@@ -75,6 +90,8 @@ class Backend(events.Emitter):
         self.address     = address
         self.headers     = headers
         self.socket      = None
+        self.flush_delay = flush_delay
+        self.models      = models
         self.send_worker = None
         self.recv_worker = None
         self.ping_worker = None
@@ -102,7 +119,7 @@ class Backend(events.Emitter):
 
         self.socket = ws.connect(host, port=port, fields=self.headers, protocols=['chat'], timeout=timeout, secure=secure)
 
-        self.send_worker = async.Worker()
+        self.send_worker = async.Worker(self._flush)
         self.recv_worker = async.Worker()
         self.ping_worker = async.Timer(20, self._pulse)
 
@@ -133,7 +150,68 @@ class Backend(events.Emitter):
         self.socket = None
 
     def send(self, packet, timeout=None):
-        self.send_worker.schedule(None, self.socket.send, fmp.encode(packet))
+        # Packets are encoded by the caller, a payload that can't be encoded fails
+        # its own request instead of the batch it would have been written with.
+        frame = encode(packet)
+        if metrics.hooks:
+            metrics.emit('send', packet)
+        self.send_worker.put(frame)
+
+    def send_many(self, packets, timeout=None):
+        # Returns the list of (packet, error) pairs for the packets that couldn't
+        # be encoded, the others are sent.
+        failed = [ ]
+
+        for packet in packets:
+            try:
+                frame = encode(packet)
+            except errors.Error as e:
+                failed.append((packet, e))
+                continue
+            if metrics.hooks:
+                metrics.emit('send', packet)
+            self.send_worker.put(frame)
+
+        return failed
+
+    def _flush(self, jobs):
+        # The send worker doesn't run one job per frame, it drains every frame
+        # queued at once (waiting up to flush_delay for more to come) and writes
+        # them to the socket with a single call.
+        stop = False
+
+        for frame in jobs:
+            frames = [frame]
+
+            if self.flush_delay:
+                time.sleep(self.flush_delay)
+
+            try:
+                while len(frames) < SEND_BATCH_MAX:
+                    frame = jobs.get_nowait()
+                    if frame is None:
+                        stop = True
+                        break
+                    frames.append(frame)
+            except queue.Empty:
+                pass
+
+            # Nothing may escape this loop, the worker would die with it and the
+            # frames queued after would never be sent.
+            try:
+                self.socket.send_many(frames)
+            except Exception as e:
+                log.exception(e)
+            else:
+                if metrics.hooks:
+                    for frame in frames:
+                        metrics.emit('frame_send', ws.BINARY, len(frame))
+
+            if stop:
+                # Put the stop marker back so the queue iterator terminates after
+                # flushing the frames that may still be queued.
+                jobs.put(None)
+                stop = False
 
     def _pulse(self):
         try:
@@ -142,16 +220,26 @@ class Backend(events.Emitter):
             log.exception(e)
 
     def _run(self):
+        decoder = fmp.Decoder(self.models)
         try:
             while True:
-                opcode, payload = self.socket.recv()
+                # Payloads are memory views into the socket's receive buffer, they
+                # must be consumed before reading the next message.
+                opcode, payload = self.socket.recv(copy=False)
+
+                if opcode is None:
+                    self.emit('close', 1006, 'the connection was lost')
+                    break
+
+                if metrics.hooks:
+                    metrics.emit('frame_recv', opcode, len(payload))
 
                 if opcode == ws.CLOSE:
-                    self.emit('close', *ws.decode_close_frame(payload))
+                    self.emit('close', *ws.decode_close_frame(bytes(payload)))
                     break
 
                 if opcode == ws.PING:
-                    self.socket.pong(payload)
+                    self.socket.pong(bytes(payload))
                     continue
 
                 if opcode == ws.PONG:
@@ -161,12 +249,15 @@ class Backend(events.Emitter):
                     continue
 
                 if opcode == ws.BINARY:
+                    # The decoder is kept for the whole connection, a frame may carry
+                    # multiple packets or only part of one.
                     try:
-                        packet = fmp.decode(payload)
+                        decoder.feed(payload)
+                        for packet in decoder:
+                            self.emit('packet', packet)
                     except Exception as e:
                         log.exception(e)
-                    else:
-                        self.emit('packet', packet)
+                        decoder = fmp.Decoder(self.models)
                     continue
         except Exception as e:
             log.exception(e)
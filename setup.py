@@ -26,6 +26,7 @@ if __name__ == '__main__':
               'pyjwt>=1.1.0',
               'requests>=2.4.0',
               'six>=1.9.0',
+              'futures>=3.0.0; python_version < "3.0"',
           ]
     )
 
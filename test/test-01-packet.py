@@ -80,3 +80,34 @@ class TestPacket(unittest.TestCase):
         ))
         string = fmp.encode(packet)
         self.assertEqual(packet, fmp.decode(string))
+
+    def test_decoder_01_many(self):
+        packets = [
+            fmp.Packet(0, 0, 0, ['path'], util.Object(), None),
+            fmp.Packet(1, 1, 0, ['path'], util.Object(), util.Object(hello='world')),
+            fmp.Packet(2, 0, 42, ['path', '1234'], util.Object(), None),
+            fmp.Packet(3, 1, 42, ['path', '1234'], util.Object(), [1, 2, 3]),
+        ]
+        decoder = fmp.Decoder()
+        decoder.feed(b''.join(fmp.encode(p) for p in packets))
+        self.assertEqual(list(decoder), packets)
+        self.assertEqual(list(decoder), [ ])
+
+    def test_decoder_02_split(self):
+        packet = fmp.Packet(1, 1, 42, ['path'], util.Object(), util.Object(hello='world'))
+        string = fmp.encode(packet)
+        decoder = fmp.Decoder()
+
+        for i in range(len(string) - 1):
+            decoder.feed(string[i:i + 1])
+            self.assertEqual(list(decoder), [ ])
+
+        decoder.feed(string[-1:])
+        self.assertEqual(list(decoder), [packet])
+
+    def test_encode_many_01(self):
+        packets = [fmp.Packet(1, 1, i + 1, ['path', str(i)], util.Object(), util.Object(index=i)) for i in range(10)]
+        decoder = fmp.Decoder()
+        decoder.feed(fmp.encode_many(packets))
+        self.assertEqual(list(decoder), packets)
+        self.assertEqual(fmp.encode_many([ ]), b'')
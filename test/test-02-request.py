@@ -179,6 +179,39 @@ class TestRequestStore(unittest.TestCase):
         self.assertEqual(x['res'].status, 500)
         self.assertEqual(x['cnt'], 3)
 
+    def test_request_store_03_expire(self):
+        def callback(r):
+            pass
+
+        rs = fmp.RequestStore()
+        t0 = time.time()
+
+        r3 = rs.store(make_packet(1, 3), t0 + 3, callback, callback)
+        r1 = rs.store(make_packet(1, 1), t0 + 1, callback, callback)
+        r2 = rs.store(make_packet(1, 2), t0 + 2, callback, callback)
+
+        self.assertEqual(rs.expire(t0), [ ])
+        self.assertEqual(rs.load(make_packet(1, 1)), r1)
+        self.assertEqual(rs.expire(t0 + 2.5), [r2])
+        self.assertEqual(len(rs), 1)
+        self.assertEqual(rs.expire(t0 + 10), [r3])
+        self.assertEqual(len(rs), 0)
+
+    def test_request_store_04_compact(self):
+        def callback(r):
+            pass
+
+        rs = fmp.RequestStore()
+        t0 = time.time()
+
+        for i in range(1, 1001):
+            rs.store(make_packet(1, i), t0 + i, callback, callback)
+        for i in range(1, 1001):
+            rs.load(make_packet(1, i))
+
+        self.assertEqual(len(rs), 0)
+        self.assertTrue(len(rs.expiry) <= 64)
+
 def make_packet(seed, id):
     return fmp.Packet(0, seed, id, ['path'], { }, None)
 
@@ -54,3 +54,12 @@ class TestPromise(unittest.TestCase):
         promise = async.Promise(None)
         promise.reject(AssertionError())
         self.assertRaises(AssertionError, promise.wait, timeout=1)
+
+    def test_05_multiple_callbacks(self):
+        results = [ ]
+        promise = async.Promise(None)
+        promise.then(lambda x: results.append(('a', x)), lambda e: None)
+        promise.then(lambda x: results.append(('b', x)), lambda e: None)
+        promise.resolve(42)
+        promise.then(lambda x: results.append(('c', x)), lambda e: None)
+        self.assertEqual(results, [('a', 42), ('b', 42), ('c', 42)])
@@ -26,8 +26,13 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from concurrent import futures
+
 import frankly.async as async
+import threading
+import time
 import unittest
+import warnings
 
 async.workers.start_once()
 
@@ -38,6 +43,28 @@ class TestWorkers(unittest.TestCase):
             p = w.schedule(async.Promise(None), lambda: True)
             self.assertTrue(p.wait(timeout=1))
 
+    def test_timer(self):
+        # The target runs once per interval until the timer is stopped, clients
+        # rely on it to expire requests.
+        ticks = threading.Semaphore(0)
+        timer = async.Timer(0.01, ticks.release)
+        timer.start()
+        try:
+            for _ in range(5):
+                self.assertTrue(ticks.acquire(timeout=1))
+        finally:
+            timer.stop()
+            timer.join()
+
+    def test_timer_no_target(self):
+        timer = async.Timer(0.01)
+        timer.start()
+        time.sleep(0.05)
+        self.assertTrue(timer.is_alive())
+        timer.stop()
+        timer.join(1)
+        self.assertFalse(timer.is_alive())
+
     def test_worker_pool(self):
         n = 5
         with async.WorkerPool(n) as w:
@@ -46,3 +73,85 @@ class TestWorkers(unittest.TestCase):
                 p.append(w.schedule(async.Promise(None), lambda: True))
             for i in range(n):
                 self.assertTrue(p[i].wait(timeout=1))
+
+    def test_worker_pool_slow_job(self):
+        with async.WorkerPool(2) as w:
+            event = threading.Event()
+            slow  = w.schedule(async.Promise(None), event.wait, 1)
+
+            # The second thread picks up the jobs while the first one is busy.
+            p = [w.schedule(async.Promise(None), lambda: True) for _ in range(5)]
+            for i in range(5):
+                self.assertTrue(p[i].wait(timeout=1))
+
+            event.set()
+            self.assertTrue(slow.wait(timeout=1))
+
+    def test_worker_pool_max_queue(self):
+        with async.WorkerPool(1, max_queue=1) as w:
+            event = threading.Event()
+            w.schedule(None, event.wait, 1)
+
+            # Wait for the thread to take the first job from the queue.
+            while w.pending:
+                time.sleep(0.001)
+            w.schedule(None, lambda: None)
+
+            thread = threading.Thread(target=w.schedule, args=(None, lambda: None))
+            thread.start()
+            thread.join(0.05)
+            self.assertTrue(thread.is_alive())
+
+            event.set()
+            thread.join(1)
+            self.assertFalse(thread.is_alive())
+
+    def test_worker_pool_idle_timeout(self):
+        with async.WorkerPool(4, idle_timeout=0.01) as w:
+            p = [w.schedule(async.Promise(None), time.sleep, 0.01) for _ in range(4)]
+            for i in range(4):
+                p[i].wait(timeout=1)
+
+            for _ in range(100):
+                if not w.threads:
+                    break
+                time.sleep(0.01)
+            self.assertEqual(len(w.threads), 0)
+            self.assertEqual(len(w), 4)
+
+            self.assertTrue(w.schedule(async.Promise(None), lambda: True).wait(timeout=1))
+
+    def test_worker_pool_executor(self):
+        with async.WorkerPool(2) as w:
+            self.assertEqual(w.submit(pow, 2, 10).result(timeout=1), 1024)
+            self.assertEqual(list(w.map(abs, [-1, -2, -3])), [1, 2, 3])
+            self.assertRaises(ZeroDivisionError, w.submit(lambda: 1 / 0).result, 1)
+            self.assertIsInstance(w.submit(lambda: None), futures.Future)
+
+            p = async.Promise.from_future(w.submit(lambda: True))
+            self.assertTrue(p.wait(timeout=1))
+
+        self.assertRaises(RuntimeError, w.submit, lambda: None)
+
+    def test_worker_pool_map(self):
+        with async.WorkerPool(1) as w:
+            event   = threading.Event()
+            results = w.map(lambda x: event.wait(1) and x, [1, 2, 3], timeout=0.05)
+
+            # The timeout applies to the whole iteration like Executor.map, and
+            # jobs that didn't start are cancelled when it's abandoned.
+            self.assertRaises(futures.TimeoutError, next, results)
+            event.set()
+            self.assertEqual(list(w.map(abs, [-1, -2], timeout=1)), [1, 2])
+
+    def test_worker_pool_deprecated(self):
+        with async.WorkerPool(2) as w:
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter('always')
+                self.assertIs(w.pick(), w)
+                self.assertEqual(list(w), [w, w])
+                self.assertIs(w[1], w)
+                self.assertTrue(w.pick().schedule(async.Promise(None), lambda: True).wait(timeout=1))
+
+        self.assertEqual(len(caught), 4)
+        self.assertTrue(all(issubclass(x.category, DeprecationWarning) for x in caught))
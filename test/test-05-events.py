@@ -26,7 +26,11 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+from six.moves import queue
+
 import frankly.events as events
+import threading
+import time
 import unittest
 
 class TestEmitter(unittest.TestCase):
@@ -67,7 +71,40 @@ class TestEmitter(unittest.TestCase):
         emitter.emit('pulse', False)
         self.assertTrue(x['ok'])
 
-    def test_03_iterator(self):
+    def test_03_remove(self):
+        calls = [ ]
+        a = lambda: calls.append('a')
+        b = lambda: calls.append('b')
+
+        emitter = events.Emitter()
+        emitter.on('pulse', a, b)
+        emitter.once('pulse', a)
+        emitter.on('other', a)
+
+        emitter.remove_event_listeners('pulse', a)
+        emitter.emit('pulse')
+        emitter.emit('other')
+        self.assertEqual(calls, ['b', 'a'])
+
+        emitter.remove_event_listeners(None, a, b)
+        emitter.emit('pulse')
+        emitter.emit('other')
+        self.assertEqual(calls, ['b', 'a'])
+
+    def test_04_once_concurrent(self):
+        calls   = [ ]
+        emitter = events.Emitter()
+        emitter.once('pulse', lambda: calls.append(1))
+
+        threads = [threading.Thread(target=emitter.emit, args=('pulse',)) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(calls, [1])
+
+    def test_05_iterator(self):
         emitter = events.Emitter()
 
         with events.Iterator(emitter, 'one', 'two', 'three') as iterator:
@@ -88,3 +125,113 @@ class TestEmitter(unittest.TestCase):
             self.assertEqual(kwargs, {'plus': 2})
 
         self.assertRaises(StopIteration, next, generator)
+
+    def test_06_iterator_batches(self):
+        emitter = events.Emitter()
+
+        with events.Iterator(emitter, 'pulse') as iterator:
+            for i in range(5):
+                emitter.emit('pulse', i)
+
+            batches = iterator.batches(2, timeout=0.01)
+            self.assertEqual([args for _, args, _ in next(batches)], [(0,), (1,)])
+            self.assertEqual([args for _, args, _ in next(batches)], [(2,), (3,)])
+            self.assertEqual([args for _, args, _ in next(batches)], [(4,)])
+
+        self.assertRaises(StopIteration, next, batches)
+
+    def test_07_iterator_overflow(self):
+        emitter = events.Emitter()
+
+        with events.Iterator(emitter, 'pulse', maxsize=2, overflow='drop-oldest') as iterator:
+            for i in range(5):
+                emitter.emit('pulse', i)
+            self.assertEqual([iterator.get()[1], iterator.get()[1]], [(3,), (4,)])
+            self.assertEqual((iterator.received, iterator.dropped), (5, 3))
+
+        with events.Iterator(emitter, 'pulse', maxsize=2, overflow='drop-newest') as iterator:
+            for i in range(5):
+                emitter.emit('pulse', i)
+            self.assertEqual([iterator.get()[1], iterator.get()[1]], [(0,), (1,)])
+            self.assertEqual((iterator.received, iterator.dropped), (5, 3))
+
+        self.assertRaises(ValueError, events.Iterator, emitter, 'pulse', overflow='drop-all')
+
+    def test_08_iterator_block(self):
+        emitter = events.Emitter()
+
+        with events.Iterator(emitter, 'pulse', maxsize=1, overflow='block') as iterator:
+            emitter.emit('pulse', 0)
+
+            thread = threading.Thread(target=emitter.emit, args=('pulse', 1))
+            thread.start()
+            thread.join(0.05)
+            self.assertTrue(thread.is_alive())
+
+            self.assertEqual(iterator.get()[1], (0,))
+            thread.join()
+            self.assertEqual(iterator.get()[1], (1,))
+            self.assertEqual((iterator.blocked, iterator.dropped), (1, 0))
+
+            # Stopping the iterator releases producers waiting for room.
+            emitter.emit('pulse', 2)
+            thread = threading.Thread(target=emitter.emit, args=('pulse', 3))
+            thread.start()
+            thread.join(0.05)
+
+        thread.join()
+        self.assertEqual([args for _, args, _ in iterator], [(2,)])
+        self.assertEqual(iterator.dropped, 1)
+
+    def test_09_iterator_get(self):
+        emitter = events.Emitter()
+
+        with events.Iterator(emitter, 'pulse', maxsize=1) as iterator:
+            self.assertRaises(queue.Empty, iterator.get, timeout=0.01)
+            emitter.emit('pulse', 0)
+            emitter.emit('pulse', 1)
+            self.assertEqual(iterator.get()[1], (1,))
+            self.assertEqual(iterator.dropped, 1)
+
+        # Stopped iterators return None like they did before being bounded.
+        self.assertIsNone(iterator.get())
+        self.assertIsNone(iterator.get(block=False))
+
+    def test_10_call_order(self):
+        calls   = [ ]
+        emitter = events.Emitter()
+        emitter.once('pulse', lambda: calls.append('a'))
+        emitter.on('pulse', lambda: calls.append('b'))
+        emitter.once('pulse', lambda: calls.append('c'))
+
+        # Listeners are called in the order they were added, whether or not
+        # they were added with once.
+        emitter.emit('pulse')
+        emitter.emit('pulse')
+        self.assertEqual(calls, ['a', 'b', 'c', 'b'])
+        self.assertEqual(len(emitter.listeners('pulse')), 1)
+
+    def test_11_once_concurrent_stale(self):
+        class SlowSet(set):
+            # Delays the first lookup so a concurrent emit removes the once-listener
+            # after the first call read the listeners but before it checks them.
+            delay = 0.05
+
+            def __contains__(self, item):
+                delay, self.delay = self.delay, 0
+                time.sleep(delay)
+                return set.__contains__(self, item)
+
+        calls   = [ ]
+        emitter = events.Emitter()
+        emitter.on('pulse', lambda: calls.append('on'))
+        emitter.once('pulse', lambda: calls.append('once'))
+        emitter._events_once = SlowSet(emitter._events_once)
+
+        thread = threading.Thread(target=emitter.emit, args=('pulse',))
+        thread.start()
+        time.sleep(0.01)
+        emitter.emit('pulse')
+        thread.join()
+
+        self.assertEqual(sorted(calls), ['on', 'on', 'once'])
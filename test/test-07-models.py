@@ -26,8 +26,10 @@ from __future__ import absolute_import
 from __future__ import print_function
 from __future__ import unicode_literals
 
+import frankly.fmp as fmp
 import frankly.model as model
 import frankly.util as util
+import json
 import unittest
 
 class TestModels(unittest.TestCase):
@@ -146,3 +148,100 @@ class TestModels(unittest.TestCase):
         object2 = model.build(('session',), object1)
         self.assertEqual(object2.type, 'session')
         self.assertEqual(object2.session, object1)
+
+    def test_unknown(self):
+        self.assertIs(model.build(('widgets', '1', 'parts'), util.Object()), None)
+        self.assertIs(model.build(('rooms', '42', 'unknown'), util.Object()), None)
+
+    def test_register(self):
+        model.register(('gadgets', None), lambda path, payload: ('any', path[1]))
+        model.register(('gadgets', 'special'), lambda path, payload: ('special', path[1]))
+        self.assertEqual(model.build(('gadgets', '1'), None), ('any', '1'))
+        self.assertEqual(model.build(('gadgets', 'special'), None), ('special', 'special'))
+
+        model.register(('gadgets', None), lambda path, payload: ('other', path[1]))
+        self.assertEqual(model.build(('gadgets', '1'), None), ('other', '1'))
+        self.assertEqual(model.build(('gadgets', 'special'), None), ('other', 'special'))
+
+    def test_load_json(self):
+        messages = model.loads(['rooms', '42', 'messages'], json.dumps([{
+            'id'         : 1234,
+            'sender'     : { 'id': 1, 'display_name': 'Luke Skywalker' },
+            'contents'   : [{ 'type': 'text/plain', 'value': 'Hello World!' }],
+            'created_on' : '2015-06-01T12:30:00.000Z',
+            'pinned'     : True,
+        }]))
+        message = messages[0]
+        self.assertIsInstance(message, model.Message)
+        self.assertIsInstance(message.sender, model.User)
+        self.assertEqual(message.id, 1234)
+        self.assertEqual(message['sender'].display_name, 'Luke Skywalker')
+        self.assertEqual(message.contents[0].value, 'Hello World!')
+        self.assertEqual(message.created_on.hour, 12)
+        self.assertEqual(message.pinned, True)
+        self.assertFalse(hasattr(message, 'sticky'))
+        self.assertEqual(message.get('sticky'), None)
+        self.assertNotIn('sticky', message)
+        self.assertEqual(message.sender, util.Object(id=1, display_name='Luke Skywalker'))
+
+    def test_load_msgpack(self):
+        decoder = fmp.Decoder(models=True)
+        decoder.feed(fmp.encode_many([
+            fmp.Packet(fmp.OK, 0, 1, ['session'], None, { 'seed': 42, 'app': { 'id': 1 }, 'user': { 'id': 2 } }),
+            fmp.Packet(fmp.ERROR, 0, 2, ['rooms', '1'], None, { 'status': 404, 'error': 'not found' }),
+            fmp.Packet(fmp.UPDATE, 0, 0, ['files', '1'], None, { 'id': 1 }),
+        ]))
+        session, error, signal = list(decoder)
+        self.assertIsInstance(session.payload, model.Session)
+        self.assertIsInstance(session.payload.app, model.App)
+        self.assertEqual(session.payload.user.id, 2)
+        self.assertEqual(type(error.payload), util.Object)
+        self.assertEqual(error.payload.status, 404)
+
+        # Signals are loaded by the client only if they're used.
+        self.assertEqual(type(signal.payload), model.Pairs)
+        fmp.load(signal)
+        self.assertEqual(type(signal.payload), util.Object)
+
+    def test_build_typed(self):
+        message = model.Message(id=1234)
+        event   = model.build(('rooms', '42', 'messages', '1234'), message, typed=True)
+        self.assertIsInstance(event, model.Event)
+        self.assertIsInstance(event.room, model.Room)
+        self.assertEqual(event.type, 'room-message')
+        self.assertEqual(event.room.id, 42)
+        self.assertIs(event.message, message)
+
+    def test_encode_models(self):
+        message = model.Message.load([
+            ('id', 1),
+            ('sender', model.Pairs([('id', 2), ('display_name', 'Luke Skywalker')])),
+            ('created_on', '2015-06-01T12:00:00.000Z'),
+            ('pinned', True),
+        ])
+        expected = {
+            'id'         : 1,
+            'sender'     : { 'id': 2, 'display_name': 'Luke Skywalker' },
+            'created_on' : '2015-06-01T12:00:00.000Z',
+            'pinned'     : True,
+        }
+        self.assertEqual(json.loads(json.dumps(message, cls=util.JsonEncoder)), expected)
+
+        decoder = fmp.Decoder()
+        decoder.feed(fmp.encode(fmp.Packet(fmp.UPDATE, 0, 1, ['rooms', '1', 'messages', '1'], None, message)))
+        packet, = list(decoder)
+        self.assertEqual(packet.payload, expected)
+
+        self.assertRaises(TypeError, fmp.encode, fmp.Packet(fmp.UPDATE, 0, 1, ['rooms'], None, object()))
+
+    def test_model_attributes(self):
+        room = model.Room(id=1)
+        room.title = 'Hoth'
+        room.owner = 'Leia'
+        self.assertEqual(room.title, 'Hoth')
+        self.assertEqual(room.extra, { 'owner': 'Leia' })
+        self.assertEqual(dict(room), { 'id': 1, 'title': 'Hoth', 'owner': 'Leia' })
+        del room.owner
+        del room.title
+        self.assertEqual(dict(room), { 'id': 1 })
+        self.assertRaises(AttributeError, delattr, room, 'owner')
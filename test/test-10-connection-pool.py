@@ -0,0 +1,74 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.http as http
+import socket
+import time
+import unittest
+
+class TestConnectionPool(unittest.TestCase):
+
+    def test_01_reuse(self):
+        with http.ConnectionPool(size=2) as pool:
+            s1 = pool.acquire()
+            s2 = pool.acquire()
+            self.assertIs(s1, s2)
+            pool.release()
+            pool.release()
+            self.assertIs(pool.acquire(), s1)
+            pool.release()
+
+    def test_02_idle_eviction(self):
+        with http.ConnectionPool(size=2, idle_timeout=0.05) as pool:
+            session = pool.acquire()
+            pool.release()
+            conns = session.get_adapter('http://127.0.0.1').poolmanager.connection_from_host('127.0.0.1', 80, scheme='http')
+
+            # Connections are taken out of the pool before being set up so they don't
+            # replace the empty slots of the pool.
+            old, new = conns._get_conn(), conns._get_conn()
+            old.sock, new.sock = socket.socketpair()
+            conns._put_conn(old)
+            time.sleep(0.1)
+            conns._put_conn(new)
+
+            # Only the connection that stayed idle for too long gets closed.
+            self.assertIs(conns._get_conn(), new)
+            self.assertIsNotNone(new.sock)
+            self.assertIs(conns._get_conn(), old)
+            self.assertIsNone(old.sock)
+            new.close()
+
+            time.sleep(0.1)
+            self.assertIs(pool.acquire(), session)
+            pool.release()
+
+    def test_03_validation(self):
+        self.assertRaises(TypeError, frankly.Client, 'https', pool_idle_timeout=None)
+        self.assertRaises(ValueError, frankly.Client, 'https', pool_idle_timeout=-1)
@@ -0,0 +1,257 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import io
+import frankly.auth as auth
+import frankly.aio as aio
+import frankly.events as events
+import frankly.fmp as fmp
+import frankly.metrics as metrics
+import frankly.mock as mock
+import frankly.util as util
+import frankly.websocket as websocket
+import json
+import unittest
+
+async def read_request(reader):
+    request = (await reader.readline()).decode('utf-8').split()
+    fields  = { }
+    while True:
+        line = (await reader.readline()).decode('utf-8').strip()
+        if not line:
+            break
+        name, _, value = line.partition(':')
+        fields[name.strip().lower()] = value.strip()
+    return request, fields
+
+async def http_handler(reader, writer):
+    while True:
+        request, fields = await read_request(reader)
+        if not request:
+            break
+        content = json.dumps({ 'method': request[0], 'path': request[1], 'key': fields.get('frankly-app-key') }).encode('utf-8')
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: ' + str(len(content)).encode('utf-8') + b'\r\n\r\n' + content)
+        await writer.drain()
+    writer.close()
+
+async def ws_handler(reader, writer):
+    request, fields = await read_request(reader)
+    writer.write((
+        'HTTP/1.1 101 Switching Protocols\r\n'
+        'Connection: Upgrade\r\n'
+        'Upgrade: websocket\r\n'
+        'Sec-WebSocket-Accept: %s\r\n\r\n' % websocket.hash_key(fields['sec-websocket-key'])
+    ).encode('utf-8'))
+    socket = aio.WebSocket(reader, writer, mask=False)
+    while True:
+        opcode, payload = await socket.recv()
+        if opcode is None or opcode == websocket.CLOSE:
+            break
+        packet = fmp.decode(bytes(payload))
+        await socket.send(fmp.encode(fmp.Packet(fmp.OK, packet.seed, packet.id, packet.path, None, util.Object(path=packet.path, seed=packet.seed))))
+    socket.close()
+
+class TestAsyncioClient(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+
+    def tearDown(self):
+        self.loop.close()
+
+    def serve(self, handler):
+        server = self.loop.run_until_complete(asyncio.start_server(handler, '127.0.0.1', 0, loop=self.loop))
+        return server, server.sockets[0].getsockname()[1]
+
+    def test_01_http(self):
+        server, port = self.serve(http_handler)
+
+        async def run():
+            async with aio.Client('http://127.0.0.1:%s' % port, loop=self.loop) as client:
+                await client.open('key', 'secret')
+                r1 = await client.read_room(42)
+                r2 = await client.delete_room(42)
+                return r1, r2
+
+        try:
+            r1, r2 = self.loop.run_until_complete(run())
+        finally:
+            server.close()
+
+        self.assertEqual(r1, util.Object(method='GET', path='/rooms/42', key='key'))
+        self.assertEqual(r2, util.Object(method='DELETE', path='/rooms/42', key='key'))
+
+    def test_02_websocket(self):
+        server, port = self.serve(ws_handler)
+
+        async def run():
+            async with aio.Client('ws://127.0.0.1:%s' % port, loop=self.loop) as client:
+                await client.open('key', 'secret')
+                return await asyncio.gather(*[client.read_room(i) for i in range(10)], loop=self.loop)
+
+        try:
+            result = self.loop.run_until_complete(run())
+        finally:
+            server.close()
+
+        self.assertEqual([x.path for x in result], [['rooms', str(i)] for i in range(10)])
+
+    def test_03_coalescing(self):
+        server, port = self.serve(ws_handler)
+
+        async def run():
+            async with aio.Client('ws://127.0.0.1:%s' % port, loop=self.loop) as client:
+                await client.open('key', 'secret')
+                sent = [ ]
+                send = client._send_packet
+
+                async def send_packet(socket, req):
+                    sent.append(req.packet.path)
+                    await send(socket, req)
+
+                client._send_packet = send_packet
+                result = await asyncio.gather(*[client.read_room(1) for _ in range(5)], loop=self.loop)
+                return sent, result
+
+        try:
+            sent, result = self.loop.run_until_complete(run())
+        finally:
+            server.close()
+
+        self.assertEqual(sent, [['rooms', '1']])
+        self.assertEqual([x.path for x in result], [['rooms', '1']] * 5)
+
+    def test_04_coalescing_cancelled(self):
+        server, port = self.serve(ws_handler)
+
+        async def run():
+            async with aio.Client('ws://127.0.0.1:%s' % port, loop=self.loop) as client:
+                await client.open('key', 'secret')
+                sent = [ ]
+                send = client._send_packet
+
+                async def send_packet(socket, req):
+                    sent.append(req.packet.path)
+                    await asyncio.sleep(0.05, loop=self.loop)
+                    await send(socket, req)
+
+                client._send_packet = send_packet
+
+                # Cancelling the first caller doesn't cancel the request for the
+                # others.
+                first  = self.loop.create_task(client.read_room(1))
+                second = self.loop.create_task(client.read_room(1))
+                await asyncio.sleep(0.01, loop=self.loop)
+                first.cancel()
+                result = await second
+                self.assertTrue(first.cancelled())
+
+                # Cancelling every caller cancels the request, the next read sends a
+                # new one.
+                third = self.loop.create_task(client.read_room(2))
+                await asyncio.sleep(0.01, loop=self.loop)
+                third.cancel()
+                await asyncio.sleep(0.01, loop=self.loop)
+                self.assertEqual(client._inflight, { })
+                await client.read_room(2)
+                return sent, result
+
+        try:
+            sent, result = self.loop.run_until_complete(run())
+        finally:
+            server.close()
+
+        self.assertEqual(result.path, ['rooms', '1'])
+        self.assertEqual(sent, [['rooms', '1'], ['rooms', '2'], ['rooms', '2']])
+
+    def test_05_send_failure(self):
+        server, port = self.serve(ws_handler)
+
+        async def run():
+            async with aio.Client('ws://127.0.0.1:%s' % port, loop=self.loop) as client:
+                await client.open('key', 'secret')
+                await client.read_room(0)
+
+                async def send_packet(socket, req):
+                    raise IOError('broken pipe')
+
+                client._send_packet = send_packet
+                with self.assertRaises(IOError):
+                    await client.read_room(1)
+                return len(list(client._pending))
+
+        collector = metrics.Collector()
+        metrics.register(collector)
+        try:
+            pending = self.loop.run_until_complete(run())
+        finally:
+            metrics.unregister(collector)
+            server.close()
+
+        self.assertEqual(pending, 0)
+        self.assertEqual(collector.report()['inflight'], 0)
+
+    def test_06_upload(self):
+        async def run(address):
+            async with aio.Client(address, loop=self.loop) as client:
+                await client.open('key', 'secret')
+                room    = await client.create_room(title='Hoth')
+                content = json.dumps({ 'title': 'Dagobah' }).encode('utf-8')
+                emitter = events.Emitter()
+                chunks  = [ ]
+                emitter.on('progress', lambda sent, total: chunks.append((sent, total)))
+                result  = await client.update_file(address + '/rooms/%s' % room.id, io.BytesIO(content), len(content), 'application/json', emitter=emitter)
+                return result, chunks, len(content)
+
+        with mock.Server() as server:
+            result, chunks, size = self.loop.run_until_complete(run(server.address))
+
+        self.assertEqual(result.title, 'Dagobah')
+        self.assertEqual(chunks, [(size, size)])
+
+    def test_07_packet_seed(self):
+        server, port = self.serve(ws_handler)
+        session = auth.Session('key', 'secret', info=util.Object(seed=7))
+
+        async def authenticator():
+            return session
+
+        async def run():
+            async with aio.Client('ws://127.0.0.1:%s' % port, loop=self.loop) as client:
+                await client._open(authenticator, ready=True)
+                return await client.read_room(1)
+
+        try:
+            result = self.loop.run_until_complete(run())
+        finally:
+            server.close()
+
+        # Like the synchronous client, requests are sent with a zero seed on the
+        # session they were submitted on.
+        self.assertEqual(result.seed, 0)
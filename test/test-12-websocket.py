@@ -0,0 +1,120 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly.async as async
+import frankly.auth as auth
+import frankly.fmp as fmp
+import frankly.util as util
+import frankly.websocket as websocket
+import frankly.websocket.net as net
+import frankly.websocket.webtools as webtools
+import frankly.ws as ws
+import os
+import socket
+import unittest
+
+def make_pair(**kwargs):
+    s1, s2 = socket.socketpair()
+    return (
+        websocket.WebSocket(net.socket(s1.family, socket=s1), mask=True, **kwargs),
+        websocket.WebSocket(net.socket(s2.family, socket=s2), mask=False, **kwargs),
+    )
+
+class TestWebSocket(unittest.TestCase):
+
+    def test_01_send_recv(self):
+        client, server = make_pair()
+        with client, server:
+            client.send(b'hello')
+            client.send('world')
+            self.assertEqual(server.recv(), (websocket.BINARY, bytearray(b'hello')))
+            self.assertEqual(server.recv(), (websocket.TEXT, 'world'))
+
+    def test_02_many_frames(self):
+        client, server = make_pair()
+        with client, server:
+            for i in range(100):
+                server.send(b'%d' % i)
+            for i in range(100):
+                opcode, payload = client.recv(copy=False)
+                self.assertEqual(opcode, websocket.BINARY)
+                self.assertEqual(bytes(payload), b'%d' % i)
+
+    def test_03_large_frames(self):
+        client, server = make_pair(recv_buffer_size=16)
+        with client, server:
+            for i in range(3):
+                server.send(bytes(bytearray([i]) * 100000))
+                opcode, payload = client.recv()
+                self.assertEqual(opcode, websocket.BINARY)
+                self.assertEqual(payload, bytearray([i]) * 100000)
+
+    def test_04_fragments(self):
+        client, server = make_pair()
+        with client, server:
+            client.send_frame(0, websocket.BINARY, b'hello ')
+            client.send_frame(1, websocket.CONTINUATION, b'world')
+            self.assertEqual(server.recv(copy=False), (websocket.BINARY, bytearray(b'hello world')))
+
+    def test_05_send_many(self):
+        client, server = make_pair()
+        with client, server:
+            client.send_many([b'%d' % i for i in range(1500)])
+            for i in range(1500):
+                self.assertEqual(server.recv(), (websocket.BINARY, bytearray(b'%d' % i)))
+
+    def test_06_backend_flush(self):
+        client, server = make_pair()
+        with client, server:
+            backend = ws.Backend('ws://localhost', auth.Session('key', 'secret'), flush_delay=0.01)
+            backend.socket = client
+            backend.send_worker = async.Worker(backend._flush)
+            packets = [fmp.Packet(0, 0, i + 1, ['rooms', str(i)], util.Object(), None) for i in range(100)]
+
+            with backend.send_worker:
+                backend.send_many(packets[:50])
+                for packet in packets[50:]:
+                    backend.send(packet)
+
+            for packet in packets:
+                opcode, payload = server.recv()
+                self.assertEqual(opcode, websocket.BINARY)
+                self.assertEqual(fmp.decode(payload), packet)
+
+    def test_07_xor_mask(self):
+        key = b'\x01\x02\x7f\xff'
+        for size in (0, 1, 3, 4, 5, 1000, 65537):
+            data = bytearray(os.urandom(size))
+            d1, d2, d3 = bytearray(data), bytearray(data), memoryview(bytearray(data))
+            webtools._xor_mask_loop(d1, key)
+            webtools._xor_mask_int(d2, key)
+            webtools.xor_mask(d3, 0xff7f0201)
+            self.assertEqual(d1, d2)
+            self.assertEqual(d1, d3.tobytes())
+            webtools.xor_mask(d2, key)
+            self.assertEqual(d2, data)
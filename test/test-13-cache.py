@@ -0,0 +1,146 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.cache as cache
+import frankly.fmp as fmp
+import frankly.mock as mock
+import frankly.util as util
+import time
+import unittest
+
+class TestCache(unittest.TestCase):
+
+    def test_01_get_put(self):
+        c = cache.Cache()
+        self.assertIs(c.get(('rooms', 42)), None)
+        c.put(('rooms', 42), util.Object(id=42))
+        self.assertEqual(c.get(('rooms', '42')), util.Object(id=42))
+        self.assertEqual((c.hits, c.misses), (1, 1))
+
+    def test_02_lru(self):
+        c = cache.Cache(size=2)
+        c.put(('rooms', 1), 1)
+        c.put(('rooms', 2), 2)
+        c.get(('rooms', 1))
+        c.put(('rooms', 3), 3)
+        self.assertEqual(len(c), 2)
+        self.assertIn(('rooms', 1), c)
+        self.assertNotIn(('rooms', 2), c)
+        self.assertIn(('rooms', 3), c)
+
+    def test_03_ttl(self):
+        c = cache.Cache(ttl=60, ttls={ ('rooms', None, 'count'): 0.01 })
+        c.put(('rooms', 1), 1)
+        c.put(('rooms', 1, 'count'), 10)
+        time.sleep(0.05)
+        self.assertEqual(c.get(('rooms', 1)), 1)
+        self.assertIs(c.get(('rooms', 1, 'count')), None)
+
+    def test_04_signal_update(self):
+        c = cache.Cache()
+        c.put(('rooms', '1'), util.Object(id=1, title='A'))
+        c.signal(fmp.UPDATE, ['rooms', '1'], util.Object(id=1, title='B'))
+        c.signal(fmp.UPDATE, ['rooms', '2'], util.Object(id=2, title='C'))
+        self.assertEqual(c.get(('rooms', 1)).title, 'B')
+        self.assertNotIn(('rooms', 2), c)
+
+    def test_05_signal_delete(self):
+        c = cache.Cache()
+        c.put(('rooms', 1), util.Object(id=1))
+        c.put(('rooms', 1, 'owners'), [ ])
+        c.put(('rooms', 2), util.Object(id=2))
+        c.signal(fmp.DELETE, ['rooms', '1'], None)
+        self.assertNotIn(('rooms', 1), c)
+        self.assertNotIn(('rooms', 1, 'owners'), c)
+        self.assertIn(('rooms', 2), c)
+
+    def test_06_signal_collection(self):
+        c = cache.Cache()
+        c.put(('rooms', 1, 'owners'), [ ])
+        c.signal(fmp.UPDATE, ['rooms', '1', 'owners', '7'], util.Object(id=7))
+        self.assertNotIn(('rooms', 1, 'owners'), c)
+
+    def test_07_generation(self):
+        c = cache.Cache()
+        generation = c.generation
+        c.signal(fmp.UPDATE, ['rooms', '1'], util.Object(id=1))
+        self.assertFalse(c.put(('rooms', 1), util.Object(id=1), generation))
+        self.assertNotIn(('rooms', 1), c)
+
+    def test_08_generation_paths(self):
+        c = cache.Cache()
+        generation = c.generation
+
+        # Signals for other paths don't discard reads that were in flight.
+        c.signal(fmp.UPDATE, ['rooms', '2'], util.Object(id=2))
+        c.signal(fmp.UPDATE, ['rooms', '1', 'messages', '7'], util.Object(id=7))
+        self.assertTrue(c.put(('rooms', 1), util.Object(id=1), generation))
+        self.assertTrue(c.put(('users', 1), util.Object(id=1), generation))
+
+        c.signal(fmp.UPDATE, ['rooms', '1', 'owners', '7'], util.Object(id=7))
+        self.assertFalse(c.put(('rooms', 1, 'owners'), [ ], generation))
+
+        c.signal(fmp.DELETE, ['rooms', '3'], None)
+        self.assertFalse(c.put(('rooms', 3, 'members'), [ ], generation))
+        self.assertTrue(c.put(('rooms', 4, 'members'), [ ], generation))
+
+    def test_09_signal_count(self):
+        c = cache.Cache()
+        c.put(('rooms', 1, 'count'), 10)
+        c.put(('rooms', 2, 'count'), 20)
+        generation = c.generation
+        c.signal(fmp.DELETE, ['rooms', '1', 'members', '7'], None)
+        self.assertNotIn(('rooms', 1, 'count'), c)
+        self.assertIn(('rooms', 2, 'count'), c)
+        self.assertFalse(c.put(('rooms', 1, 'count'), 10, generation))
+
+    def test_10_generation_pruned(self):
+        c = cache.Cache(size=2)
+        generation = c.generation
+        for i in range(3):
+            c.signal(fmp.UPDATE, ['users', str(i)], util.Object(id=i))
+        self.assertEqual(len(c.changed), 2)
+        self.assertFalse(c.put(('rooms', 1), util.Object(id=1), generation))
+        self.assertTrue(c.put(('rooms', 1), util.Object(id=1), c.generation))
+
+    def test_11_signal_traffic(self):
+        c = cache.Cache()
+
+        # The server keeps pushing room messages, they must not discard the reads
+        # of other paths that are in flight when they arrive.
+        with mock.Server(latency=0.02, signal_interval=0.001) as server:
+            with frankly.Client(server.ws_address, cache=c) as client:
+                client.open('key', 'secret')
+                room = client.create_room(title='Hoth')
+                user = client.create_user(display_name='Luke')
+                for _ in range(10):
+                    client.read_room(room.id)
+                    client.read_user(user.id)
+
+        self.assertEqual((c.hits, c.misses), (18, 2))
@@ -0,0 +1,105 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.fmp as fmp
+import threading
+import time
+import unittest
+
+class Backend(object):
+
+    def __init__(self):
+        self.sent  = [ ]
+        self.event = threading.Event()
+
+    def send(self, packet, timeout=None):
+        self.sent.append(packet)
+        self.event.wait(timeout)
+        if packet.path[0] == 'fail':
+            raise ValueError(packet.path)
+        return list(packet.path)
+
+def make_client():
+    client = frankly.Client(request_timeout=1)
+    client._backend = Backend()
+    client._running = True
+    return client
+
+def spawn(target, *args):
+    thread = threading.Thread(target=target, args=args)
+    thread.daemon = True
+    thread.start()
+    return thread
+
+class TestCoalescing(unittest.TestCase):
+
+    def test_01_identical_reads(self):
+        client  = make_client()
+        results = [ ]
+        threads = [spawn(lambda: results.append(client._request(fmp.READ, ('rooms', 1)))) for _ in range(4)]
+        time.sleep(0.05)
+        client._backend.event.set()
+
+        for thread in threads:
+            thread.join(1)
+
+        self.assertEqual(len(client._backend.sent), 1)
+        self.assertEqual(results, [['rooms', '1']] * 4)
+        self.assertEqual(client._inflight, { })
+
+    def test_02_distinct_requests(self):
+        client  = make_client()
+        client._backend.event.set()
+        client._request(fmp.READ, ('rooms', 1))
+        client._request(fmp.READ, ('rooms', 1), { 'limit': 1 })
+        client._request(fmp.READ, ('rooms', 2))
+        client._request(fmp.UPDATE, ('rooms', 2))
+        client._request(fmp.UPDATE, ('rooms', 2))
+        self.assertEqual(len(client._backend.sent), 5)
+
+    def test_03_rejected_reads(self):
+        client  = make_client()
+        errors  = [ ]
+
+        def read():
+            try:
+                client._request(fmp.READ, ('fail',))
+            except ValueError as e:
+                errors.append(e)
+
+        threads = [spawn(read) for _ in range(3)]
+        time.sleep(0.05)
+        client._backend.event.set()
+
+        for thread in threads:
+            thread.join(1)
+
+        self.assertEqual(len(client._backend.sent), 1)
+        self.assertEqual(len(errors), 3)
+        self.assertEqual(client._inflight, { })
@@ -0,0 +1,143 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.mock as mock
+import frankly.model as model
+import threading
+import time
+import unittest
+
+APP_KEY    = 'key'
+APP_SECRET = 'secret'
+
+def collect(client, name, count):
+    event  = threading.Event()
+    events = [ ]
+
+    def callback(*args):
+        events.append(args[0])
+        if len(events) >= count:
+            event.set()
+
+    client.on(name, callback)
+    return event, events
+
+class TestMockServer(unittest.TestCase):
+
+    def test_01_http(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.address) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+                room = client.create_room(title='Hoth', status='active')
+                self.assertEqual(client.read_room(room.id).title, 'Hoth')
+                self.assertEqual(client.update_room(room.id, title='Dagobah').title, 'Dagobah')
+                self.assertEqual([x.id for x in client.read_room_list()], [room.id])
+                self.assertEqual(client.read_session().role, 'admin')
+                client.delete_room(room.id)
+                self.assertRaises(frankly.Error, client.read_room, room.id)
+            self.assertEqual(server.requests, 7)
+
+    def test_02_websocket(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.ws_address) as client:
+                client.open(frankly.identity_token_generator(APP_KEY, APP_SECRET, uid=42, role='regular'))
+                event, events = collect(client, 'update', 2)
+                msg = client.create_room_message(1, contents=[{ 'type': 'text/plain', 'value': 'beepbeep' }])
+                server.signal(['rooms', 1, 'messages', 1000], { 'id': 1000 })
+                self.assertTrue(event.wait(1))
+                self.assertEqual(client.read_session().user.id, 42)
+
+        self.assertEqual(events[0].type, 'room-message')
+        self.assertEqual(events[0].message.id, msg.id)
+        self.assertEqual(events[1].message.id, 1000)
+
+    def test_03_authentication_failure(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.address) as client:
+                client.open(APP_KEY, 'not my secret')
+                self.assertRaises(frankly.Error, client.read_session)
+
+    def test_04_latency(self):
+        with mock.Server(latency=0.05, signal_interval=0.01) as server:
+            with frankly.Client(server.ws_address) as client:
+                client.open(APP_KEY, APP_SECRET)
+                event, events = collect(client, 'update', 3)
+
+                t0 = time.time()
+                client.read_app(1)
+                t1 = time.time()
+                self.assertGreaterEqual(t1 - t0, 0.05)
+                self.assertTrue(event.wait(1))
+
+        self.assertEqual(events[0].type, 'room-message')
+        self.assertEqual(events[0].room.id, 1)
+
+    def test_05_models(self):
+        with mock.Server() as server:
+            for address in (server.address, server.ws_address):
+                with frankly.Client(address, models=True) as client:
+                    client.open(APP_KEY, APP_SECRET)
+                    room = client.create_room(title='Hoth')
+                    self.assertIsInstance(room, model.Room)
+                    self.assertIsInstance(client.read_room_list()[0], model.Room)
+                    self.assertIsInstance(client.read_session(), model.Session)
+
+    def test_06_unencodable_payload(self):
+        with mock.Server() as server:
+            with frankly.Client(server.ws_address, async=True) as client:
+                client.open(APP_KEY, APP_SECRET)
+                room = client.create_room(title='Hoth').wait(1)
+                bad  = client.update_room(room.id, title=object())
+                good = client.update_room(room.id, title='Dagobah')
+                self.assertRaises(Exception, bad.wait, 1)
+                self.assertEqual(good.wait(1).title, 'Dagobah')
+                self.assertEqual(client.read_room(room.id).wait(1).title, 'Dagobah')
+
+    def test_07_models_round_trip(self):
+        with mock.Server() as server:
+            for address in (server.address, server.ws_address):
+                with frankly.Client(address, models=True) as client:
+                    client.open(APP_KEY, APP_SECRET)
+                    room = client.read_room(client.create_room(title='Hoth').id)
+                    room.title = 'Dagobah'
+                    self.assertEqual(client.update_room(room.id, **room).title, 'Dagobah')
+
+    def test_08_http_errors(self):
+        def handle(*args):
+            raise KeyError('bug')
+
+        fields = { 'Frankly-App-Key': APP_KEY, 'Frankly-App-Secret': APP_SECRET }
+
+        with mock.Server() as server:
+            self.assertEqual(server._serve_http('PATCH', '/rooms', { }, fields, b'', { })[0], 405)
+            self.assertEqual(server._serve_http('GET', '/rooms/42', { }, fields, b'', { })[0], 404)
+
+            # Errors raised by handlers are not mistaken for unsupported methods.
+            server.handle = handle
+            self.assertEqual(server._serve_http('GET', '/rooms', { }, fields, b'', { })[0], 500)
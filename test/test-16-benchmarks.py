@@ -0,0 +1,65 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import benchmarks
+import benchmarks.bench_import as bench_import
+import unittest
+
+def make_results(**times):
+    return { 'results': dict((k, { 'median': v }) for k, v in times.items()) }
+
+class TestBenchmarks(unittest.TestCase):
+
+    def test_01_measure(self):
+        stats = benchmarks.measure(lambda: None, repeat=3, min_time=0.001)
+        self.assertEqual(stats['repeat'], 3)
+        self.assertGreater(stats['number'], 1)
+        self.assertLessEqual(stats['min'], stats['median'])
+        self.assertLessEqual(stats['median'], stats['max'])
+
+    def test_02_compare(self):
+        base    = make_results(a=1.0, b=1.0, c=1.0, d=1.0)
+        head    = make_results(a=1.05, b=1.5, c=0.5, e=1.0)
+        changes = sorted(benchmarks.compare(base, head, threshold=0.1))
+        self.assertEqual(changes, [
+            ('a', 1.0, 1.05, 'ok'),
+            ('b', 1.0, 1.5, 'regression'),
+            ('c', 1.0, 0.5, 'improvement'),
+        ])
+
+    def test_03_run(self):
+        results = benchmarks.run(['model.build[path=first]'], repeat=1, min_time=0.001)
+        self.assertEqual(list(results['results']), ['model.build[path=first]'])
+        self.assertEqual(results['results']['model.build[path=first]']['params'], { 'path': 'first' })
+
+    def test_04_import(self):
+        self.assertEqual(bench_import.loaded('frankly'), [ ])
+
+        # Deferred attributes are still available on the modules.
+        code = 'import frankly, six; print(frankly.ws.__name__, isinstance(frankly.http.RejectCookies(), six.moves.http_cookiejar.CookiePolicy))'
+        self.assertEqual(bench_import.python(code).decode('utf-8').split(), ['frankly.ws', 'True'])
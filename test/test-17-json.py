@@ -0,0 +1,57 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+from datetime import datetime
+
+import frankly.util as util
+import iso8601
+import json
+import unittest
+
+class TestJson(unittest.TestCase):
+
+    def test_01_parse_date(self):
+        for date in ('2015-06-01T12:30:45.123Z', '2015-06-01T12:30:45Z', '2015-06-01T12:30:45.123+02:00'):
+            self.assertEqual(util.parse_date(date), iso8601.parse_date(date))
+        self.assertEqual(util.parse_date('not a date'), 'not a date')
+
+    def test_02_format_date(self):
+        date = datetime(2015, 6, 1, 12, 30, 45, 123000, iso8601.UTC)
+        self.assertEqual(util.parse_date(util.format_date(date)), date)
+
+    def test_03_decode_dates(self):
+        obj = json.loads(json.dumps({
+            'created_on' : '2015-06-01T12:30:45.123Z',
+            'title'      : '2015-06-01T12:30:45.123Z',
+            'messages'   : [{ 'updated_on': '2015-06-01T12:30:45.123Z', 'contents': ['Take off at 2015-06-01T12:30'] }],
+        }), cls=util.JsonDecoder)
+        self.assertIsInstance(obj, util.Object)
+        self.assertIsInstance(obj.created_on, datetime)
+        self.assertIsInstance(obj.messages[0].updated_on, datetime)
+        self.assertEqual(obj.title, '2015-06-01T12:30:45.123Z')
+        self.assertEqual(obj.messages[0].contents, ['Take off at 2015-06-01T12:30'])
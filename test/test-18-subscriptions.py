@@ -0,0 +1,115 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.events as events
+import frankly.fmp as fmp
+import frankly.mock as mock
+import frankly.model as model
+import threading
+import unittest
+
+def make_signal(path, type=fmp.UPDATE):
+    return fmp.Packet(type, 0, 0, path, None, frankly.Object(id=1))
+
+class TestSubscriptions(unittest.TestCase):
+
+    def test_01_router(self):
+        a = lambda *args: None
+        b = lambda *args: None
+        router = events.Router()
+        router.add(('rooms', 42, 'messages', None), a)
+        router.add(('rooms', None, 'messages', None), b)
+        router.add(('rooms', 42), a)
+
+        self.assertEqual(router.match(['rooms', '42', 'messages', '1']), (a, b))
+        self.assertEqual(router.match(['rooms', '1', 'messages', '1']), (b,))
+        self.assertEqual(router.match(['rooms', '42']), (a,))
+        self.assertEqual(router.match(['rooms', '42', 'owners', '1']), ())
+        self.assertEqual(router.match(['users', '1']), ())
+
+        router.remove(('rooms', 42, 'messages', None), a)
+        self.assertEqual(router.match(['rooms', '42', 'messages', '1']), (b,))
+        self.assertEqual(len(router), 2)
+
+    def test_02_route_signal(self):
+        client   = frankly.Client()
+        callback = lambda *args: None
+        self.assertIs(client._route_signal(make_signal(['rooms', '1', 'messages', '2'])), None)
+
+        client.subscribe(('rooms', 1, 'messages', None), callback)
+        name, event, routes = client._route_signal(make_signal(['rooms', '1', 'messages', '2'], fmp.DELETE))
+        self.assertEqual(name, 'delete')
+        self.assertEqual(event.type, 'room-message')
+        self.assertEqual(routes, (callback,))
+        self.assertIs(client._route_signal(make_signal(['rooms', '2', 'messages', '2'])), None)
+
+        client.unsubscribe(('rooms', 1, 'messages', None), callback)
+        self.assertIs(client._route_signal(make_signal(['rooms', '1', 'messages', '2'])), None)
+
+        client.on('update', callback)
+        self.assertEqual(client._route_signal(make_signal(['rooms', '2', 'messages', '2']))[2], ())
+
+    def test_02_route_signal_models(self):
+        client   = frankly.Client(models=True)
+        callback = lambda *args: None
+
+        def make_typed_signal(path):
+            return fmp.Packet(fmp.UPDATE, 0, 0, path, None, model.Pairs([('id', 2), ('contents', [ ])]))
+
+        # Payloads of signals that nobody listens to aren't loaded.
+        signal = make_typed_signal(['rooms', '1', 'messages', '2'])
+        self.assertIs(client._route_signal(signal), None)
+        self.assertIsInstance(signal.payload, model.Pairs)
+
+        client.subscribe(('rooms', 1, 'messages', None), callback)
+        signal = make_typed_signal(['rooms', '1', 'messages', '2'])
+        _, event, _ = client._route_signal(signal)
+        self.assertIsInstance(signal.payload, model.Message)
+        self.assertIs(event.message, signal.payload)
+
+    def test_03_subscribe(self):
+        events = [ ]
+        done   = threading.Event()
+
+        def callback(name, event):
+            events.append((name, event.room.id, event.message.id))
+            if len(events) == 2:
+                done.set()
+
+        with mock.Server() as server:
+            with frankly.Client(server.ws_address) as client:
+                client.subscribe(('rooms', 1, 'messages', None), callback)
+                client.open('key', 'secret')
+                client.read_app(1)
+                server.signal(['rooms', 2, 'messages', 1], { 'id': 1 })
+                server.signal(['rooms', 1, 'messages', 2], { 'id': 2 })
+                server.signal(['rooms', 1, 'messages', 3], { 'id': 3 }, fmp.DELETE)
+                self.assertTrue(done.wait(1))
+
+        self.assertEqual(events, [('update', 1, 2), ('delete', 1, 3)])
@@ -0,0 +1,143 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.metrics as metrics
+import frankly.mock as mock
+import frankly.ws as ws
+import time
+import unittest
+
+APP_KEY    = 'key'
+APP_SECRET = 'secret'
+
+class TestMetrics(unittest.TestCase):
+
+    def setUp(self):
+        self.collector = metrics.Collector()
+        metrics.register(self.collector)
+
+    def tearDown(self):
+        metrics.unregister(self.collector)
+        self.assertEqual(metrics.hooks, ())
+
+    def test_01_histogram(self):
+        histogram = metrics.Histogram(resolution=1e-6, growth=1.05)
+        self.assertIsNone(histogram.percentile(50))
+
+        for i in range(1, 1001):
+            histogram.add(i / 1000)
+
+        self.assertEqual(len(histogram), 1000)
+        self.assertEqual(histogram.min, 0.001)
+        self.assertEqual(histogram.max, 1.0)
+        self.assertAlmostEqual(histogram.mean(), 0.5005)
+        self.assertAlmostEqual(histogram.percentile(50), 0.5, delta=0.5 * 0.05)
+        self.assertAlmostEqual(histogram.percentile(99), 0.99, delta=0.99 * 0.05)
+        self.assertEqual(histogram.percentile(100), 1.0)
+
+    def test_02_path_template(self):
+        self.assertEqual(metrics.path_template(['rooms', '42', 'messages']), '/rooms/:id/messages')
+        self.assertEqual(metrics.path_template([]), '/')
+
+    def test_03_http(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.address) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+                room = client.create_room(title='Hoth', status='active')
+                client.read_room(room.id)
+                client.delete_room(room.id)
+                self.assertRaises(frankly.Error, client.read_room, room.id)
+
+        report = self.collector.report()
+        self.assertEqual(report['counters']['requests'], 4)
+        self.assertEqual(report['counters']['sent'], 4)
+        self.assertEqual(report['counters']['responses'], 3)
+        self.assertEqual(report['counters']['errors'], 1)
+        self.assertEqual(report['inflight'], 0)
+        self.assertEqual(report['operations']['read']['count'], 2)
+        self.assertEqual(report['paths']['read /rooms/:id']['count'], 2)
+        self.assertEqual(report['paths']['create /rooms']['count'], 1)
+
+    def test_04_websocket(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.ws_address) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+                room = client.create_room(title='Hoth', status='active')
+                client.read_room(room.id)
+
+        report = self.collector.report()
+        self.assertEqual(report['counters']['requests'], 2)
+        self.assertEqual(report['counters']['responses'], 2)
+        self.assertGreaterEqual(report['counters']['frames_sent'], 2)
+        self.assertGreaterEqual(report['counters']['frames_recv'], 2)
+        self.assertGreater(report['counters']['bytes_sent'], 0)
+        self.assertGreater(report['paths']['read /rooms/:id']['p50'], 0)
+
+    def test_05_failing_hook(self):
+        class Failing(metrics.Hooks):
+            def enqueue(self, packet):
+                raise ValueError()
+
+        failing = Failing()
+        metrics.register(failing)
+        try:
+            metrics.emit('enqueue', None)
+            metrics.emit('send', None)
+        finally:
+            metrics.unregister(failing)
+
+    def test_06_dropped_connection(self):
+        class Backend(ws.Backend):
+            # Loses the connection when sending the first read of room 0.
+            drops = [ ]
+
+            def send(self, packet, timeout=None):
+                if packet.path == ['rooms', '0'] and not self.drops:
+                    self.drops.append(packet)
+                    raise IOError('broken pipe')
+                return ws.Backend.send(self, packet, timeout)
+
+        with mock.Server() as server:
+            with frankly.Client(server.ws_address, async=True) as client:
+                client._BackendClass = Backend
+                client.open(APP_KEY, APP_SECRET)
+                room   = client.create_room(title='Hoth').wait(2)
+                broken = client.read_room(0)
+                self.assertRaises(IOError, broken.wait, 2)
+
+                # The request that was lost with the connection is not in flight
+                # anymore once the client reconnected.
+                self.assertEqual(client.read_room(room.id).wait(5).id, room.id)
+                report = self.collector.report()
+
+        self.assertEqual(report['counters']['requests'], 3)
+        self.assertEqual(report['counters']['responses'], 2)
+        self.assertEqual(report['counters']['errors'], 1)
+        self.assertEqual(report['counters']['reconnects'], 1)
+        self.assertEqual(report['inflight'], 0)
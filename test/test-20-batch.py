@@ -0,0 +1,128 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.mock as mock
+import unittest
+
+APP_KEY    = 'key'
+APP_SECRET = 'secret'
+
+class TestBatch(unittest.TestCase):
+
+    def run_batch(self, address, **options):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(address(server), **options) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+
+                with client.batch(concurrency=4) as batch:
+                    for i in range(20):
+                        batch.create_room(title='room-%d' % i, status='active')
+                    batch.read_room(1000000)
+
+                results = batch.results(timeout=5)
+                self.assertEqual(len(results), 21)
+
+                for i, (room, error) in enumerate(results[:20]):
+                    self.assertIsNone(error)
+                    self.assertEqual(room.title, 'room-%d' % i)
+
+                room, error = results[20]
+                self.assertIsNone(room)
+                self.assertEqual(error.status, 404)
+
+                with client.batch() as batch:
+                    for room, _ in results[:20]:
+                        batch.read_room(room.id)
+
+                completed = sorted(batch.as_completed(timeout=5), key=lambda x: x[0])
+                self.assertEqual([x[0] for x in completed], list(range(20)))
+                self.assertEqual([x[1].id for x in completed], [x[0].id for x in results[:20]])
+
+    def test_01_http(self):
+        self.run_batch(lambda server: server.address)
+
+    def test_02_http_async(self):
+        self.run_batch(lambda server: server.address, async=True)
+
+    def test_03_websocket(self):
+        self.run_batch(lambda server: server.ws_address)
+
+    def test_04_sent(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.address) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+                batch = client.batch()
+                promise = batch.read_session()
+                self.assertEqual(len(batch), 1)
+                self.assertRaises(AttributeError, getattr, batch, 'upload_file')
+                self.assertRaises(AttributeError, getattr, batch, 'update_file')
+                self.assertRaises(AttributeError, getattr, batch, 'iter_room_messages')
+                batch.send()
+                self.assertEqual(promise.wait(5).role, 'admin')
+                self.assertRaises(RuntimeError, batch.read_session)
+
+    def test_05_unencodable_payload(self):
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with frankly.Client(server.ws_address) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+
+                with client.batch() as batch:
+                    batch.create_room(title='Hoth')
+                    batch.create_room(title=object())
+                    batch.create_room(title='Dagobah')
+
+                (first, e1), (_, e2), (last, e3) = batch.results(timeout=1)
+                self.assertIsNone(e1)
+                self.assertIsNotNone(e2)
+                self.assertIsNone(e3)
+                self.assertEqual([first.title, last.title], ['Hoth', 'Dagobah'])
+
+    def test_06_operations(self):
+        class Client(frankly.Client):
+            batch_operations = frankly.Client.batch_operations | frozenset(['read_room_titled'])
+
+            def read_room_titled(self, room_id):
+                # Uses members of the client besides the request methods.
+                assert self._request_timeout > 0
+                return self.read(('rooms', room_id))
+
+        with mock.Server(app_key=APP_KEY, app_secret=APP_SECRET) as server:
+            with Client(server.address) as client:
+                client.open(APP_KEY, APP_SECRET, role='admin')
+                room = client.create_room(title='Hoth')
+
+                for _ in range(2):
+                    with client.batch(concurrency=2) as batch:
+                        batch.read_room_titled(room.id)
+                    self.assertEqual(batch.results(timeout=5)[0][0].title, 'Hoth')
+
+                # Batches with the same concurrency share a pool.
+                self.assertEqual(list(client._batch_pools), [2])
+
+            self.assertEqual(client._batch_pools, { })
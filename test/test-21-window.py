@@ -0,0 +1,109 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.fmp as fmp
+import frankly.mock as mock
+import frankly.window as window
+import unittest
+
+def make_requests(count):
+    return [fmp.Request(fmp.Packet(fmp.READ, 0, i + 1, ['apps', '1'], { }, None), 0, None, None) for i in range(count)]
+
+class TestWindow(unittest.TestCase):
+
+    def test_01_queue(self):
+        w    = window.Window(initial=2)
+        reqs = make_requests(5)
+
+        self.assertEqual([w.acquire(req, 0) for req in reqs], [True, True, False, False, False])
+        self.assertEqual((w.inflight, len(w)), (2, 3))
+        self.assertTrue(w.queued(reqs[2]))
+
+        # Requests that expire while queued leave the window unchanged.
+        self.assertEqual(w.expire(reqs[4], 1), [ ])
+        self.assertEqual((w.size, len(w)), (2, 2))
+
+        # The window grows by one on every response until the first congestion
+        # event, two queued requests fit once the first response is received.
+        self.assertEqual(w.release(reqs[0], 200, 1), [reqs[2], reqs[3]])
+        self.assertEqual((w.size, w.inflight, len(w)), (3, 3, 0))
+
+    def test_02_increase(self):
+        w    = window.Window(initial=2, maximum=4)
+        reqs = make_requests(100)
+
+        for req in reqs:
+            w.acquire(req, 0)
+            w.release(req, 200, 1)
+
+        self.assertEqual(w.size, 4)
+        self.assertEqual(w.inflight, 0)
+
+    def test_03_decrease(self):
+        w    = window.Window(initial=16)
+        reqs = make_requests(5)
+
+        for req in reqs:
+            w.acquire(req, 0)
+
+        # Failures of requests sent before the window shrank count once.
+        w.release(reqs[0], 503, 1)
+        w.release(reqs[1], 429, 1)
+        w.expire(reqs[2], 1)
+        self.assertEqual(w.size, 8)
+
+        w.acquire(reqs[0], 2)
+        w.release(reqs[0], 500, 3)
+        self.assertEqual(w.size, 4)
+
+        # After a congestion event the window grows by one request per window's
+        # worth of responses, responses much slower than the fastest one don't
+        # grow it.
+        w.release(reqs[3], 200, 4)
+        w.release(reqs[4], 200, 40)
+        self.assertEqual(w.size, 4.25)
+
+    def test_04_resend(self):
+        w    = window.Window(initial=1)
+        reqs = make_requests(3)
+
+        for req in reqs:
+            w.acquire(req, 0)
+
+        self.assertEqual(w.resend(reqs, 5), [reqs[0]])
+        self.assertEqual((w.inflight, len(w), reqs[0].sent), (1, 2, 5))
+
+    def test_05_client(self):
+        with mock.Server(latency=0.005) as server:
+            with frankly.Client(server.ws_address, async=True, max_inflight=2) as client:
+                client.open('key', 'secret')
+                rooms = [client.create_room(title='room %s' % i) for i in range(20)]
+                self.assertEqual(sorted(x.wait(5).title for x in rooms), sorted('room %s' % i for i in range(20)))
+                self.assertEqual(client._window.inflight, 0)
+                self.assertLessEqual(client._window.size, 2)
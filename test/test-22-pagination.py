@@ -0,0 +1,83 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import asyncio
+import frankly
+import frankly.aio as aio
+import frankly.mock as mock
+import unittest
+
+def make_messages(client, room_id, count):
+    return [client.create_room_message(room_id, contents=[{ 'type': 'text/plain', 'value': str(i) }]).id for i in range(count)]
+
+class TestPagination(unittest.TestCase):
+
+    def test_01_http(self):
+        with mock.Server() as server:
+            with frankly.Client(server.address) as client:
+                client.open('key', 'secret')
+                room = client.create_room(title='Hoth')
+                ids  = make_messages(client, room.id, 95)
+
+                messages = client.iter_room_messages(room.id, page_size=10)
+                self.assertEqual([x.id for x in messages], ids[::-1])
+
+                messages = client.iter_room_messages(room.id, start=ids[50], stop=ids[20], page_size=7)
+                self.assertEqual([x.id for x in messages], ids[50:20:-1])
+
+                self.assertEqual(list(client.iter_room_messages(room.id + 1000)), [ ])
+
+    def test_02_websocket(self):
+        with mock.Server() as server:
+            with frankly.Client(server.ws_address, async=True) as client:
+                client.open('key', 'secret')
+                room = client.create_room(title='Hoth').wait(5)
+                ids  = [p.wait(5).id for p in [client.create_room_message(room.id, contents=[ ]) for _ in range(30)]]
+
+                messages = client.iter_room_messages(room.id, page_size=8)
+                self.assertEqual([x.id for x in messages], ids[::-1])
+
+    def test_03_aio(self):
+        loop = asyncio.new_event_loop()
+
+        async def run(address):
+            async with aio.Client(address, loop=loop) as client:
+                await client.open('key', 'secret')
+                room = await client.create_room(title='Hoth')
+                ids  = [(await client.create_room_message(room.id, contents=[ ])).id for _ in range(25)]
+                found = [ ]
+                async for message in client.iter_room_messages(room.id, stop=ids[4], page_size=6):
+                    found.append(message.id)
+                return ids, found
+
+        try:
+            with mock.Server() as server:
+                ids, found = loop.run_until_complete(run(server.address))
+            self.assertEqual(found, ids[:4:-1])
+        finally:
+            loop.close()
@@ -0,0 +1,168 @@
+##
+# The MIT License (MIT)
+#
+# Copyright (c) 2015 Frankly Inc.
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+##
+from __future__ import division
+from __future__ import absolute_import
+from __future__ import print_function
+from __future__ import unicode_literals
+
+import frankly
+import frankly.crawler as crawler
+import frankly.mock as mock
+import io
+import json
+import os
+import shutil
+import tempfile
+import threading
+import unittest
+
+def make_rooms(client, counts):
+    rooms = { }
+    for count in counts:
+        room = client.create_room(title='Hoth')
+        rooms[room.id] = [client.create_room_message(room.id, contents=[{ 'type': 'text/plain', 'value': str(i) }]).id for i in range(count)][::-1]
+    return rooms
+
+class Recorder(crawler.Sink):
+
+    def __init__(self, rooms):
+        self.lock     = threading.Lock()
+        self.messages = dict((room_id, [ ]) for room_id in rooms)
+        self.finished = { }
+        self.active   = 0
+        self.peak     = 0
+
+    def start(self, room_id):
+        with self.lock:
+            self.active += 1
+            self.peak    = max(self.peak, self.active)
+
+    def write(self, room_id, message):
+        self.messages[room_id].append(message.id)
+
+    def finish(self, room_id, error):
+        with self.lock:
+            self.active -= 1
+            self.finished[room_id] = error
+
+class TestCrawler(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_01_sink(self):
+        with mock.Server(latency=0.005) as server:
+            with frankly.Client(server.address) as client:
+                client.open('key', 'secret')
+                rooms  = make_rooms(client, [0, 3, 25, 40, 7, 12])
+                sink   = Recorder(rooms)
+                result = crawler.crawl(client, sink, concurrency=2, page_size=5)
+
+        self.assertEqual(sink.messages, rooms)
+        self.assertEqual(sink.finished, dict((room_id, None) for room_id in rooms))
+        self.assertEqual(result, dict((room_id, (len(ids), None)) for room_id, ids in rooms.items()))
+        self.assertLessEqual(sink.peak, 2)
+        self.assertGreater(sink.peak, 1)
+
+    def test_02_callback(self):
+        def callback(room_id, message):
+            if room_id == broken and message.id == rooms[broken][2]:
+                raise ValueError(message.id)
+            found.append((room_id, message.id))
+
+        with mock.Server() as server:
+            with frankly.Client(server.address) as client:
+                client.open('key', 'secret')
+                rooms  = make_rooms(client, [10, 10, 10])
+                broken = sorted(rooms)[1]
+                found  = [ ]
+                result = crawler.crawl(client, callback, rooms=sorted(rooms), page_size=4)
+
+        self.assertEqual(sorted(result), sorted(rooms))
+        self.assertEqual(result[broken][0], 2)
+        self.assertIsInstance(result[broken][1], ValueError)
+
+        for room_id, ids in rooms.items():
+            expected = ids[:2] if room_id == broken else ids
+            self.assertEqual([i for r, i in found if r == room_id], expected)
+
+        with self.assertRaises(TypeError):
+            crawler.crawl(client, None)
+
+        with self.assertRaises(ValueError):
+            crawler.crawl(client, callback, concurrency=0)
+
+    def test_03_ndjson(self):
+        with mock.Server() as server:
+            with frankly.Client(server.address) as client:
+                client.open('key', 'secret')
+                rooms = make_rooms(client, [15, 4])
+
+            with frankly.Client(server.ws_address, async=True) as client:
+                client.open('key', 'secret')
+                result = crawler.crawl(client, crawler.NDJSONSink(os.path.join(self.tmp, 'export')), page_size=6)
+
+        self.assertEqual(result, dict((room_id, (len(ids), None)) for room_id, ids in rooms.items()))
+        self.assertEqual(sorted(os.listdir(os.path.join(self.tmp, 'export'))), sorted('%s.ndjson' % room_id for room_id in rooms))
+
+        for room_id, ids in rooms.items():
+            with io.open(os.path.join(self.tmp, 'export', '%s.ndjson' % room_id), encoding='utf-8') as f:
+                messages = [json.loads(line) for line in f]
+            self.assertEqual([m['id'] for m in messages], ids)
+            self.assertEqual(messages[0]['contents'][0]['value'], str(len(ids) - 1))
+
+    def test_04_main(self):
+        with mock.Server() as server:
+            with frankly.Client(server.address) as client:
+                client.open('key', 'secret')
+                rooms = make_rooms(client, [3, 5])
+
+            self.assertEqual(crawler.main(server.address, 'key', 'secret', self.tmp, concurrency=4), 0)
+
+        self.assertEqual(sorted(os.listdir(self.tmp)), sorted('%s.ndjson' % room_id for room_id in rooms))
+
+    def test_05_start_failure(self):
+        class Sink(crawler.NDJSONSink):
+            def start(self, room_id):
+                if room_id == broken:
+                    raise IOError(28, 'No space left on device')
+                crawler.NDJSONSink.start(self, room_id)
+
+        with mock.Server() as server:
+            with frankly.Client(server.address) as client:
+                client.open('key', 'secret')
+                rooms  = make_rooms(client, [3, 4, 5])
+                broken = sorted(rooms)[0]
+                result = crawler.crawl(client, Sink(self.tmp), concurrency=2)
+
+        self.assertEqual(result[broken][0], 0)
+        self.assertIsInstance(result[broken][1], IOError)
+        self.assertEqual(sorted(os.listdir(self.tmp)), sorted('%s.ndjson' % room_id for room_id in rooms if room_id != broken))
+
+        for room_id, ids in rooms.items():
+            if room_id != broken:
+                self.assertEqual(result[room_id], (len(ids), None))